@@ -4,6 +4,12 @@ import os
 import logging
 import openai
 import uuid
+import time
+import threading
+import queue
+import re
+from collections.abc import Mapping
+from contextlib import contextmanager, nullcontext
 
 # Setup logging configuration
 def setup_logging():
@@ -21,30 +27,327 @@ def log_info(message):
     """Log informational messages."""
     logging.info(message)
 
+# Long-lived connections per database, so a query does not pay for opening the database every time
+class ConnectionManager:
+    """Pooled connections to one database: one writer and up to max_readers readers.
+
+    The database is switched to WAL mode, so readers never wait for the writer. The
+    connections can be used from any thread: the writer is shared under a lock, and each
+    reader is lent to one thread at a time. Every connection keeps its last
+    cached_statements prepared statements, so repeated queries are not parsed again.
+    """
+
+    def __init__(self, db_name, max_readers=4, cached_statements=256):
+        self.db_name = db_name
+        self.max_readers = max_readers
+        self.cached_statements = cached_statements
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._idle_readers = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(max_readers)
+        self._readers = set()
+        self._on_loan = set()
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_name, check_same_thread=False, cached_statements=self.cached_statements)
+
+    def _open_writer(self):
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+                self._writer.execute("PRAGMA journal_mode=WAL;")
+            return self._writer
+
+    @contextmanager
+    def writer(self):
+        """Lend the writer connection; the work is committed at the end of the block, or rolled back on error."""
+        with self._writer_lock:
+            conn = self._open_writer()
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    @contextmanager
+    def reader(self):
+        """Lend a read-only connection from the pool, waiting while all readers are busy."""
+        if self.db_name == ':memory:':
+            # Every connection to :memory: is a separate database, so reads use the writer too
+            with self.writer() as conn:
+                yield conn
+            return
+
+        with self._reader_slots:
+            with self._lock:
+                try:
+                    conn = self._idle_readers.get_nowait()
+                except queue.Empty:
+                    conn = None
+                else:
+                    self._on_loan.add(conn)
+            if conn is None:
+                if self._writer is None:
+                    self._open_writer()  # Makes sure the database is in WAL mode before readers use it
+                conn = self._connect()
+                conn.execute("PRAGMA query_only=ON;")
+                with self._lock:
+                    self._readers.add(conn)
+                    self._on_loan.add(conn)
+            try:
+                yield conn
+            finally:
+                with self._lock:
+                    self._on_loan.discard(conn)
+                    keep = conn in self._readers
+                    if keep:
+                        self._idle_readers.put(conn)
+                if not keep:
+                    conn.close()  # The pool was closed while this reader was lent out
+
+    def close(self):
+        """Close all connections; readers that are lent out are closed when they are given back."""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._lock:
+            idle = self._readers - self._on_loan
+            self._readers = set()
+            self._idle_readers = queue.LifoQueue()
+        for conn in idle:
+            conn.close()
+
+_connection_managers = {}
+_connection_managers_lock = threading.Lock()
+
+# Function to get the shared connection manager of a database
+def get_connection_manager(db_name):
+    """Return the ConnectionManager of db_name, creating it on first use."""
+    with _connection_managers_lock:
+        manager = _connection_managers.get(db_name)
+        if manager is None:
+            manager = _connection_managers[db_name] = ConnectionManager(db_name)
+        return manager
+
+# Function to close every pooled connection
+def close_connection_managers():
+    """Close the connections of all databases (e.g. before the program exits)."""
+    with _connection_managers_lock:
+        managers = list(_connection_managers.values())
+        _connection_managers.clear()
+    for manager in managers:
+        manager.close()
+
+# Raised when a load or query is stopped through its cancel_event
+class OperationCancelled(Exception):
+    """The operation was cancelled; everything it wrote, including a table it created, has been rolled back."""
+
+# Function to stop between steps of a long operation
+def check_cancelled(cancel_event):
+    """Raise OperationCancelled if cancel_event (a threading.Event) is set."""
+    if cancel_event is not None and cancel_event.is_set():
+        raise OperationCancelled("Operation cancelled.")
+
+# Function to make the statements run on a connection cancellable
+@contextmanager
+def cancellable(conn, cancel_event=None, every=1000):
+    """Inside the block, setting cancel_event aborts the running SQLite statement with OperationCancelled.
+
+    SQLite calls the progress handler every `every` virtual machine instructions, so even a
+    long query stops within milliseconds.
+    """
+    if cancel_event is None:
+        yield
+        return
+    conn.set_progress_handler(cancel_event.is_set, every)  # A true result interrupts the statement
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        if cancel_event.is_set():
+            raise OperationCancelled("Operation cancelled.") from e
+        raise
+    finally:
+        conn.set_progress_handler(None, every)
+
 # Function to load CSV into pandas DataFrame
-def load_csv(csv_file):
-    """Load CSV into pandas DataFrame."""
+def load_csv(csv_file, nrows=None):
+    """Load CSV into pandas DataFrame (only the first nrows rows if given)."""
     try:
-        return pd.read_csv(csv_file)
+        return pd.read_csv(csv_file, nrows=nrows)
     except Exception as e:
         log_error(f"Error loading CSV file {csv_file}: {str(e)}")
         print(f"Error loading CSV file {csv_file}: {str(e)}")
         return None
 
-def load_csv_in_chunks(csv_file, chunk_size=1000):
-    """Load CSV in chunks to handle large files."""
-    chunks = []
-    for chunk in pd.read_csv(csv_file, chunksize=chunk_size):
-        chunks.append(chunk)
-    return chunks
-
-def insert_large_csv_in_chunks(csv_file, table_name, conn, chunk_size=1000):
-    """Insert data in chunks to handle large CSV files efficiently."""
-    chunks = load_csv_in_chunks(csv_file, chunk_size)
-    for chunk in chunks:
-        chunk.to_sql(table_name, conn, if_exists='append', index=False)
+def load_csv_in_chunks(csv_file, chunk_size=1000, dtype=None):
+    """Yield the CSV one chunk at a time, so only one chunk is in memory at once."""
+    with pd.read_csv(csv_file, chunksize=chunk_size, dtype=dtype) as reader:
+        for chunk in reader:
+            yield chunk
+
+# Function to turn a DataFrame column into plain Python values for sqlite3
+def column_values(series):
+    """Return the column as a list, with missing values as None (NULL)."""
+    values = series.tolist()
+    if series.hasnans:
+        values = [None if missing else value for value, missing in zip(values, series.isna().tolist())]
+    return values
+
+# Function to quote a table, column or index name for use in a SQL statement
+def quote_identifier(name):
+    """Return name as a quoted SQL identifier, so spaces, reserved words and quotes in it are safe."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+# Function to insert one DataFrame chunk with the cursor (inside the caller's transaction)
+def insert_chunk(chunk, table_name, cursor):
+    """Insert the rows of a DataFrame with a prepared INSERT statement."""
+    columns = ", ".join(quote_identifier(column) for column in chunk.columns)
+    placeholders = ", ".join("?" for _ in chunk.columns)
+    # Converting column by column is much faster than converting row by row
+    rows = zip(*[column_values(chunk.iloc[:, i]) for i in range(chunk.shape[1])])
+    cursor.executemany(f"INSERT INTO {quote_identifier(table_name)} ({columns}) VALUES ({placeholders})", rows)
+
+# Function to create a table for the rows of a DataFrame, as DataFrame.to_sql does when the table is missing
+def create_table_for_frame(df, table_name, cursor):
+    """Create table_name with the DataFrame's columns (typed with map_data_type) unless it already exists."""
+    columns = ",\n".join(f"{quote_identifier(column)} {map_data_type(df[column].dtype)}" for column in df.columns)
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {quote_identifier(table_name)} (\n{columns}\n);")
+
+# Function to run a block in its own transaction, nested in the caller's when one is open
+@contextmanager
+def transaction(conn, name='assistant_load'):
+    """BEGIN ... COMMIT around the block, or a SAVEPOINT when conn is already in a transaction.
+
+    On error only the block's own work is rolled back: the caller's uncommitted changes
+    are kept, and committing them stays up to the caller.
+    """
+    cursor = conn.cursor()
+    nested = conn.in_transaction
+    cursor.execute(f"SAVEPOINT {name}" if nested else 'BEGIN')
+    try:
+        yield cursor
+    except BaseException:
+        if nested:
+            cursor.execute(f"ROLLBACK TO {name}")
+            cursor.execute(f"RELEASE {name}")
+        else:
+            conn.rollback()
+        raise
+    if nested:
+        cursor.execute(f"RELEASE {name}")
+    else:
         conn.commit()
-        print(f"Inserted chunk of {len(chunk)} records into {table_name}.")
+
+def insert_large_csv_in_chunks(csv_file, table_name, conn, chunk_size=1000, dtype=None, progress=None,
+                               cancel_event=None):
+    """Stream a large CSV file into the table chunk by chunk, in a single transaction.
+
+    Each chunk is inserted as soon as it is read, so memory stays bounded by chunk_size.
+    If anything fails the whole load is rolled back. Returns the number of rows inserted.
+    A missing table is created from the columns of the first chunk, in the same transaction.
+    If conn is already in a transaction, the load runs in a savepoint inside it and is left
+    for the caller to commit. progress(rows) is called after every chunk; setting
+    cancel_event rolls the load back and raises OperationCancelled.
+    """
+    total = 0
+    try:
+        with transaction(conn) as cursor, cancellable(conn, cancel_event):
+            for chunk in load_csv_in_chunks(csv_file, chunk_size, dtype):
+                check_cancelled(cancel_event)
+                if total == 0:
+                    create_table_for_frame(chunk, table_name, cursor)
+                insert_chunk(chunk, table_name, cursor)
+                total += len(chunk)
+                print(f"Inserted chunk of {len(chunk)} records into {table_name} ({total} so far).")
+                if progress is not None:
+                    progress(total)
+    except OperationCancelled:
+        log_info(f"Loading CSV file {csv_file} into table '{table_name}' was cancelled.")
+        print(f"Loading CSV file {csv_file} into table '{table_name}' was cancelled.")
+        raise
+    except Exception as e:
+        log_error(f"Error inserting CSV file {csv_file} into table '{table_name}': {str(e)}")
+        print(f"Error inserting CSV file {csv_file} into table '{table_name}': {str(e)}")
+        return None
+    log_info(f"Data from CSV inserted into table '{table_name}' ({total} rows).")
+    return total
+
+# Function to apply fast bulk-load settings for the duration of a with block
+@contextmanager
+def bulk_load_pragmas(conn, synchronous='OFF', cache_size_mb=256):
+    """Temporarily use WAL, fewer fsyncs and a larger page cache; the old settings are restored afterwards.
+
+    The journal mode and fsyncs cannot be changed inside a transaction, so if conn is in
+    one only the page cache is enlarged.
+    """
+    cursor = conn.cursor()
+    names = ('cache_size',) if conn.in_transaction else ('journal_mode', 'synchronous', 'cache_size')
+    saved = {name: cursor.execute(f"PRAGMA {name};").fetchone()[0] for name in names}
+    if not conn.in_transaction:
+        cursor.execute("PRAGMA journal_mode=WAL;")
+        cursor.execute(f"PRAGMA synchronous={synchronous};")
+    cursor.execute(f"PRAGMA cache_size={-int(cache_size_mb * 1024)};")  # Negative values are in KiB
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            cursor.execute(f"PRAGMA {name}={value};")
+
+# Function to drop the indexes of a table before a bulk load
+def drop_table_indexes(table_name, conn):
+    """Drop the indexes of a table and return their CREATE INDEX statements, to rebuild them later."""
+    cursor = conn.cursor()
+    # Indexes created by UNIQUE / PRIMARY KEY constraints have no SQL and cannot be dropped
+    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type='index' AND tbl_name=? AND sql IS NOT NULL;",
+                   (table_name,))
+    indexes = cursor.fetchall()
+    for name, _ in indexes:
+        cursor.execute(f"DROP INDEX IF EXISTS {quote_identifier(name)};")
+    return [sql for _, sql in indexes]
+
+# Function to create indexes on columns of a table
+def create_indexes(table_name, indexes, conn):
+    """Create an index for every entry of indexes: a column name or a tuple of column names."""
+    cursor = conn.cursor()
+    for columns in indexes:
+        columns = [columns] if isinstance(columns, str) else list(columns)
+        index_name = f"idx_{table_name}_{'_'.join(columns)}"
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {quote_identifier(index_name)} ON {quote_identifier(table_name)} "
+                       f"({', '.join(quote_identifier(column) for column in columns)});")
+
+# Function to load a large CSV file as fast as possible
+def bulk_insert_csv(csv_file, table_name, conn, chunk_size=50000, indexes=None, dtype=None,
+                    synchronous='OFF', cache_size_mb=256, progress=None, cancel_event=None):
+    """Bulk-load a CSV file into an existing table and report the rows/sec.
+
+    The rows are streamed in one transaction with prepared executemany inserts, under
+    bulk_load_pragmas. The table's indexes are dropped first and rebuilt once after the
+    load, together with the new indexes asked for in indexes. Returns the number of rows
+    inserted, or None if the load failed and was rolled back. If conn is already in a
+    transaction, the load runs in a savepoint inside it and is left for the caller to
+    commit. progress and cancel_event work as in insert_large_csv_in_chunks.
+    """
+    start = time.perf_counter()
+    with bulk_load_pragmas(conn, synchronous, cache_size_mb), transaction(conn, 'assistant_bulk_load') as cursor:
+        # A cancelled load rolls the whole transaction back, which also brings back the dropped indexes
+        index_statements = drop_table_indexes(table_name, conn)
+        rows = insert_large_csv_in_chunks(csv_file, table_name, conn, chunk_size, dtype, progress, cancel_event)
+        # Building an index once over all rows is much faster than updating it for every insert.
+        # The dropped indexes are rebuilt even when the load failed.
+        for statement in index_statements:
+            cursor.execute(statement)
+        if rows is not None:
+            create_indexes(table_name, indexes or [], conn)
+    elapsed = time.perf_counter() - start
+
+    if rows is not None:
+        rate = rows / elapsed if elapsed > 0 else float('inf')
+        log_info(f"Bulk-loaded {rows} rows into '{table_name}' in {elapsed:.1f} s ({rate:,.0f} rows/sec).")
+        print(f"Bulk-loaded {rows} rows into '{table_name}' in {elapsed:.1f} s ({rate:,.0f} rows/sec).")
+    return rows
 
 # Function to map pandas data types to SQLite data types
 def map_data_type(pandas_dtype):
@@ -58,89 +361,177 @@ def map_data_type(pandas_dtype):
     else:
         return 'TEXT'  # Default to TEXT for any other types
 
+# Function to infer the table schema from the first rows of a CSV file
+def infer_schema(csv_file, sample_rows=10000):
+    """Return a list of (column, SQLite type) guessed from the first sample_rows rows."""
+    sample = load_csv(csv_file, nrows=sample_rows)
+    if sample is None:
+        return None
+    return [(column, map_data_type(sample[column].dtype)) for column in sample.columns]
+
 # Function to create table based on CSV schema
-def create_table_from_csv(csv_file, table_name, db_name):
-    """Create or handle schema conflict when creating a table."""
-    df = load_csv(csv_file)
-    if df is None:
+def create_table_from_csv(csv_file, table_name, db_name, chunk_size=10000, sample_rows=10000, bulk=False,
+                          indexes=None, progress=None, cancel_event=None, on_conflict=None):
+    """Create or handle schema conflict when creating a table, then stream the CSV into it.
+
+    The column types come from the first sample_rows rows; the rows are then inserted
+    chunk_size at a time, so files larger than memory can be loaded. bulk=True loads
+    through bulk_insert_csv and creates the indexes (column names or tuples) afterwards.
+    progress and cancel_event work as in insert_large_csv_in_chunks. on_conflict says what
+    to do if the table already exists ('overwrite', 'rename' or 'skip'); if it is None the
+    user is asked on the console. Returns the number of rows inserted, or None if nothing
+    was loaded.
+    """
+    schema = infer_schema(csv_file, sample_rows)
+    if schema is None:
         return
 
-    # Connect to SQLite database
-    conn = sqlite3.connect(db_name)
-    cursor = conn.cursor()
-
-    # Check if the table exists
-    cursor.execute(f"PRAGMA table_info({table_name});")
-    existing_columns = cursor.fetchall()
-
-    if existing_columns:
+    # Ask before taking the writer, so other writes are not blocked while the user answers
+    action = on_conflict
+    if action is None and table_exists(table_name, db_name):
         print(f"Table '{table_name}' already exists.")
         action = prompt_user_for_conflict_resolution()
 
-        if action == 'overwrite':
-            cursor.execute(f"DROP TABLE IF EXISTS {table_name};")
+    # Use the database's long-lived writer connection; it stays open for the next load or query.
+    # The bulk-load settings cannot be changed inside a transaction, so they are applied first.
+    with get_connection_manager(db_name).writer() as conn, (bulk_load_pragmas(conn) if bulk else nullcontext()):
+        cursor = conn.cursor()
+        # Dropping, creating and loading the table is one transaction: if the load fails or is
+        # cancelled, the database is left as it was
+        cursor.execute("BEGIN")
+        try:
+            # Check if the table exists
+            cursor.execute(f"PRAGMA table_info({quote_identifier(table_name)});")
+            existing_columns = cursor.fetchall()
+
+            if existing_columns:
+                if action == 'overwrite':
+                    cursor.execute(f"DROP TABLE IF EXISTS {quote_identifier(table_name)};")
+                    print(f"Table '{table_name}' has been dropped and will be recreated.")
+                elif action == 'rename':
+                    new_table_name = renamed_table(table_name)
+                    print(f"Renaming table to '{new_table_name}'.")
+                    table_name = new_table_name
+                elif action == 'skip':
+                    print(f"Skipping table creation for '{table_name}'.")
+                    return
+                else:
+                    print("Invalid action. Skipping operation.")
+                    return
+
+            # Build CREATE TABLE SQL statement
+            column_definitions = []
+            for column, column_type in schema:
+                column_definition = f"{quote_identifier(column)} {column_type}"
+                column_definitions.append(column_definition)
+
+            create_table_query = f"CREATE TABLE IF NOT EXISTS {quote_identifier(table_name)} (\n" + \
+                                 ",\n".join(column_definitions) + "\n);"
+
+            try:
+                cursor.execute(create_table_query)
+                log_info(f"Table '{table_name}' created successfully in '{db_name}'.")
+                print(f"Table '{table_name}' created successfully in '{db_name}'.")
+            except Exception as e:
+                log_error(f"Error creating table '{table_name}': {str(e)}")
+                print(f"Error creating table '{table_name}': {str(e)}")
+                return None
+
+            # Stream the data into the table. TEXT columns are read as text in every chunk,
+            # so values such as account codes keep their leading zeros.
+            text_columns = {column: str for column, column_type in schema if column_type == 'TEXT'}
+            if bulk:
+                rows = bulk_insert_csv(csv_file, table_name, conn, chunk_size, indexes, dtype=text_columns,
+                                       progress=progress, cancel_event=cancel_event)
+            else:
+                rows = insert_large_csv_in_chunks(csv_file, table_name, conn, chunk_size, dtype=text_columns,
+                                                  progress=progress, cancel_event=cancel_event)
+            if rows is None:
+                return None  # The rollback also undoes the CREATE TABLE and an overwritten table's DROP
             conn.commit()
-            print(f"Table '{table_name}' has been dropped and will be recreated.")
-        elif action == 'rename':
-            new_table_name = f"{table_name}_{str(uuid.uuid4())[:8]}"  # Unique identifier for table rename
-            print(f"Renaming table to '{new_table_name}'.")
-            table_name = new_table_name
-        elif action == 'skip':
-            print(f"Skipping table creation for '{table_name}'.")
-            conn.close()
-            return
-        else:
-            print("Invalid action. Skipping operation.")
-            conn.close()
-            return
-
-    # Build CREATE TABLE SQL statement
-    columns = df.columns
-    column_definitions = []
-    for column in columns:
-        column_type = map_data_type(df[column].dtype)
-        column_definition = f"{column} {column_type}"
-        column_definitions.append(column_definition)
-
-    create_table_query = f"CREATE TABLE IF NOT EXISTS {table_name} (\n" + \
-                         ",\n".join(column_definitions) + "\n);"
-
-    try:
-        cursor.execute(create_table_query)
-        conn.commit()
-        log_info(f"Table '{table_name}' created successfully in '{db_name}'.")
-        print(f"Table '{table_name}' created successfully in '{db_name}'.")
-    except Exception as e:
-        log_error(f"Error creating table '{table_name}': {str(e)}")
-        print(f"Error creating table '{table_name}': {str(e)}")
-
-    # Insert the data into the table
-    insert_data_into_table(df, table_name, conn)
-
-    conn.close()
+            print(f"Data from CSV inserted into table '{table_name}' ({rows} rows).")
+            return rows
+        finally:
+            # Ends the transaction before the bulk-load settings are restored; does nothing after a commit
+            conn.rollback()
 
 # Function to insert DataFrame data into SQLite table
 def insert_data_into_table(df, table_name, conn):
-    """Insert DataFrame data into SQLite table."""
+    """Insert DataFrame data into SQLite table, creating the table from the DataFrame's columns if it is missing."""
     try:
-        df.to_sql(table_name, conn, if_exists='append', index=False)
-        conn.commit()
+        create_table_for_frame(df, table_name, conn.cursor())
+        with transaction(conn) as cursor:
+            insert_chunk(df, table_name, cursor)
         log_info(f"Data from CSV inserted into table '{table_name}'.")
         print(f"Data from CSV inserted into table '{table_name}'.")
     except Exception as e:
         log_error(f"Error inserting data into table '{table_name}': {str(e)}")
         print(f"Error inserting data into table '{table_name}': {str(e)}")
 
+# Function to check whether a query only reads data
+# Comments, quoted strings and names, parentheses, semicolons and words of a SQL statement
+_SQL_TOKEN = re.compile(r"--[^\n]*|/\*.*?(?:\*/|$)|'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\]|[();]|\w+",
+                        re.DOTALL)
+
+def statement_keyword(query):
+    """Return the upper-case keyword of the statement query runs, skipping comments and WITH clauses.
+
+    For WITH t AS (...) INSERT ... this is INSERT, and for a query that starts with a
+    comment it is the first keyword after it. Returns None for an empty query.
+    """
+    first = None
+    depth = 0
+    for token in _SQL_TOKEN.findall(query):
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif depth == 0 and token[0].isalpha():
+            word = token.upper()
+            if first is None:
+                if word != 'WITH':
+                    return word
+                first = word
+            elif word in ('SELECT', 'VALUES', 'INSERT', 'REPLACE', 'UPDATE', 'DELETE'):
+                return word
+    return first
+
+def is_read_query(query):
+    """Return True for statements that can run on a read-only connection (SELECT, EXPLAIN, VALUES)."""
+    return statement_keyword(query) in ('SELECT', 'EXPLAIN', 'VALUES')
+
+def _fetch_all(conn, query, params, cancel_event=None):
+    with cancellable(conn, cancel_event):
+        cursor = conn.cursor()
+        if params is None:
+            cursor.execute(query)
+        else:
+            cursor.execute(query, params)
+        return cursor.fetchall()
+
+# Function to run one statement on a pooled connection
+def execute_query(query, params=None, db_name="example.db", cancel_event=None):
+    """Run a query on a reader when it only reads, otherwise on the writer (committed), and return the rows.
+
+    Setting cancel_event stops the query with OperationCancelled.
+    """
+    manager = get_connection_manager(db_name)
+    if is_read_query(query):
+        try:
+            with manager.reader() as conn:
+                return _fetch_all(conn, query, params, cancel_event)
+        except sqlite3.OperationalError as e:
+            # e.g. a SELECT of a function that writes: readers refuse to write, so run it on the writer instead
+            if 'readonly' not in str(e):
+                raise
+    with manager.writer() as conn:
+        return _fetch_all(conn, query, params, cancel_event)
+
 # Function to run an arbitrary SQL query
 def run_sql_query(query, db_name):
     """Execute a user-provided SQL query."""
     try:
-        conn = sqlite3.connect(db_name)
-        cursor = conn.cursor()
-        cursor.execute(query)
-        result = cursor.fetchall()
-        conn.close()
-        return result
+        return execute_query(query, None, db_name)
     except sqlite3.Error as e:
         log_error(f"Error executing SQL query: {str(e)}")
         print(f"Error executing SQL query: {str(e)}")
@@ -150,46 +541,114 @@ def run_sql_query(query, db_name):
 def run_sql_query_safe(query, params=None, db_name="example.db"):
     """Execute SQL query safely with parameters to avoid SQL injection."""
     try:
-        conn = sqlite3.connect(db_name)
-        cursor = conn.cursor()
-        cursor.execute(query, params or ())
-        result = cursor.fetchall()
-        conn.close()
-        return result
+        return execute_query(query, params or (), db_name)
     except sqlite3.Error as e:
         log_error(f"Error executing SQL query: {str(e)}")
         print(f"Error executing SQL query: {str(e)}")
         return None
 
+# Function to check whether a query can be paginated by wrapping it in SELECT ... LIMIT
+def is_pageable_query(query):
+    """Return True for SELECT and VALUES statements, with or without a WITH clause."""
+    return statement_keyword(query) in ('SELECT', 'VALUES')
+
+# Function to remove the semicolon that ends a statement
+def _without_terminator(query):
+    """Return query without its final ';', keeping any comments after it."""
+    end = None
+    for match in _SQL_TOKEN.finditer(query):
+        if match.group() == ';':
+            end = match.start()
+        elif not match.group().startswith(('--', '/*')):
+            end = None
+    return query if end is None else query[:end] + query[end + 1:]
+
+def _paged_rows(query, params, db_name, sql_suffix, suffix_params, cancel_event=None):
+    """Run SELECT * FROM (query) with a suffix on a reader and return (columns, rows).
+
+    sql_suffix uses ? placeholders; with named parameters (a dict) they are given names
+    that cannot clash with the query's.
+    """
+    if isinstance(params, Mapping):
+        names = [f"_page_param_{i}" for i in range(len(suffix_params))]
+        parts = sql_suffix.split('?')
+        sql_suffix = parts[0] + ''.join(f":{name}{part}" for name, part in zip(names, parts[1:]))
+        params = {**params, **dict(zip(names, suffix_params))}
+    else:
+        params = list(params or ()) + suffix_params
+    # The query gets lines of its own, so a -- comment at its end cannot hide the suffix
+    query = _without_terminator(query.strip())
+    with get_connection_manager(db_name).reader() as conn, cancellable(conn, cancel_event):
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT * FROM (\n{query}\n) {sql_suffix}", params)
+        rows = cursor.fetchall()
+        return [column[0] for column in cursor.description], rows
+
+# Function to read the rows of a query one page at a time
+def iter_query_pages(query, params=None, db_name="example.db", page_size=500):
+    """Yield the rows of a query in lists of at most page_size rows, instead of fetching them all at once.
+
+    A reader connection is held until the iteration ends, so finish or close the generator.
+    """
+    with get_connection_manager(db_name).reader() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params or ())
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                return
+            yield rows
+
+# Function to fetch one page of a query by position
+def fetch_page(query, params=None, db_name="example.db", page_size=100, offset=0, cancel_event=None):
+    """Return (columns, rows) with at most page_size rows of the query, starting at row offset."""
+    return _paged_rows(query, params, db_name, "LIMIT ? OFFSET ?", [page_size, offset], cancel_event)
+
+# Function to fetch the page of a query that follows a key (keyset pagination)
+def fetch_page_after(query, key_column, after=None, params=None, db_name="example.db", page_size=100):
+    """Return (columns, rows): the first page_size rows with key_column > after, ordered by key_column.
+
+    Pass the key of the last row of a page as after to get the next page. Unlike OFFSET,
+    this stays fast deep into a large table when key_column is indexed and unique.
+    key_column must be one of the result's columns; anything else raises ValueError.
+    """
+    columns, _ = _paged_rows(query, params, db_name, "LIMIT 0", [])
+    if key_column not in columns:
+        raise ValueError(f"key_column {key_column!r} is not a column of the query's result {columns}")
+    key = quote_identifier(key_column)
+    if after is None:
+        return _paged_rows(query, params, db_name, f"ORDER BY {key} LIMIT ?", [page_size])
+    return _paged_rows(query, params, db_name, f"WHERE {key} > ? ORDER BY {key} LIMIT ?", [after, page_size])
+
 # Function to list all tables in the database
 def list_tables(db_name):
     """List all tables in the database."""
     try:
-        conn = sqlite3.connect(db_name)
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
-        conn.close()
+        tables = execute_query("SELECT name FROM sqlite_master WHERE type='table';", None, db_name)
         return [table[0] for table in tables]
     except sqlite3.Error as e:
         log_error(f"Error retrieving tables: {str(e)}")
         print(f"Error retrieving tables: {str(e)}")
         return []
 
+# Function to check whether a table exists
+def table_exists(table_name, db_name):
+    """Return True if the database has a table called table_name."""
+    return bool(execute_query("SELECT 1 FROM sqlite_master WHERE type='table' AND name=? COLLATE NOCASE;",
+                              (table_name,), db_name))
+
+# Function to pick a free name for a table whose name is taken
+def renamed_table(table_name):
+    """Return table_name with a unique suffix added."""
+    return f"{table_name}_{str(uuid.uuid4())[:8]}"  # Adding a unique identifier to the table name
+
 # Function to prompt the user for action on schema conflict
 def prompt_user_for_conflict_resolution():
-    """Prompt the user to resolve schema conflict (overwrite, rename, skip)."""
+    """Prompt the user to resolve schema conflict; returns 'overwrite', 'rename' or 'skip'."""
     while True:
         action = input("Table already exists. Choose an action: 'overwrite', 'rename', or 'skip': ").strip().lower()
-        if action == 'overwrite':
+        if action in ('overwrite', 'rename', 'skip'):
             return action
-        elif action == 'rename':
-            new_table_name = f"{table_name}_{str(uuid.uuid4())[:8]}"  # Adding a unique identifier to the table name
-            print(f"Renaming table to '{new_table_name}'.")
-            return new_table_name
-        elif action == 'skip':
-            print(f"Skipping table creation for '{table_name}'.")
-            return None
         else:
             print("Invalid choice. Please choose 'overwrite', 'rename', or 'skip'.")
 
@@ -270,7 +729,8 @@ def interactive_assistant():
             if tables:
                 # Assuming we pick the first table from the list to build the schema
                 table_name = tables[0]  # You could prompt the user for the table if necessary
-                df = pd.read_sql_query(f"SELECT * FROM {table_name} LIMIT 1", sqlite3.connect(db_name))
+                with get_connection_manager(db_name).reader() as conn:
+                    df = pd.read_sql_query(f"SELECT * FROM {quote_identifier(table_name)} LIMIT 1", conn)
                 table_schema = df.columns.tolist()
                 table_schema_str = ', '.join([f"{col} (type: {map_data_type(df[col].dtype)})" for col in table_schema])
 
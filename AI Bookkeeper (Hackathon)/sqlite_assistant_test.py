@@ -5,12 +5,21 @@ import pandas as pd
 import openai
 import os
 import logging
+import tempfile
+import threading
+import time
+import types
 
 # Assuming the above code is in a module named 'sqlite_assistant'
 import sqlite_assistant
+import sqlite_assistant_ui
 
 class TestSQLiteAssistant(unittest.TestCase):
 
+    def tearDown(self):
+        # Connections are pooled per database name, so each test starts without any
+        sqlite_assistant.close_connection_managers()
+
     @patch('sqlite3.connect')
     def test_create_table_from_csv(self, mock_connect):
         """Test the creation of a table from CSV data."""
@@ -31,9 +40,9 @@ class TestSQLiteAssistant(unittest.TestCase):
         
         # Check that the correct SQL statement is called to create the table
         mock_conn.cursor().execute.assert_called_with(
-            f"CREATE TABLE IF NOT EXISTS {table_name} (\n" +
-            "id INTEGER,\n" +
-            "name TEXT\n);"
+            f'CREATE TABLE IF NOT EXISTS "{table_name}" (\n' +
+            '"id" INTEGER,\n' +
+            '"name" TEXT\n);'
         )
         
         # Verify that the insert data method is called
@@ -105,6 +114,7 @@ class TestSQLiteAssistant(unittest.TestCase):
     def test_insert_data_into_table(self, mock_connect):
         """Test inserting data into the SQLite table."""
         mock_conn = MagicMock()
+        mock_conn.in_transaction = False
         mock_connect.return_value = mock_conn
         df = pd.DataFrame({
             'id': [1, 2],
@@ -124,6 +134,7 @@ class TestSQLiteAssistant(unittest.TestCase):
     def test_insert_large_csv_in_chunks(self, mock_connect):
         """Test inserting large CSV data in chunks."""
         mock_conn = MagicMock()
+        mock_conn.in_transaction = False
         mock_connect.return_value = mock_conn
         table_name = 'test_table'
         db_name = 'test.db'
@@ -164,7 +175,7 @@ class TestSQLiteAssistant(unittest.TestCase):
             sqlite_assistant.create_table_from_csv('test.csv', table_name, db_name)
         
         # Verify that the table was dropped and recreated
-        mock_conn.cursor().execute.assert_any_call(f"DROP TABLE IF EXISTS {table_name};")
+        mock_conn.cursor().execute.assert_any_call(f'DROP TABLE IF EXISTS "{table_name}";')
         mock_conn.commit.assert_called()
 
     @patch('sqlite3.connect')
@@ -192,6 +203,516 @@ class TestSQLiteAssistant(unittest.TestCase):
         new_table_name = f"{table_name}_{str(uuid.uuid4())[:8]}"
         self.assertIn(new_table_name, mock_conn.cursor().execute.call_args[0][0])
 
+    def test_load_csv_in_chunks_is_lazy(self):
+        """Test that chunks are read one at a time instead of collected in a list."""
+        with tempfile.TemporaryDirectory() as folder:
+            csv_file = os.path.join(folder, 'ledger.csv')
+            pd.DataFrame({'id': range(10), 'name': ['row'] * 10}).to_csv(csv_file, index=False)
+
+            chunks = sqlite_assistant.load_csv_in_chunks(csv_file, chunk_size=4)
+            self.assertIsInstance(chunks, types.GeneratorType)
+            self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 2])
+
+    def test_create_table_from_csv_streams_rows(self):
+        """Test streaming a CSV file into a new table, keeping text codes and NULLs."""
+        with tempfile.TemporaryDirectory() as folder:
+            csv_file = os.path.join(folder, 'ledger.csv')
+            db_name = os.path.join(folder, 'test.db')
+            with open(csv_file, 'w') as outfile:
+                outfile.write("id,account,amount\n1,A-01,2.5\n2,A-02,\n3,007,4.0\n")
+
+            sqlite_assistant.create_table_from_csv(csv_file, 'ledger', db_name, chunk_size=2)
+
+            conn = sqlite3.connect(db_name)
+            rows = conn.execute("SELECT id, account, amount FROM ledger ORDER BY id").fetchall()
+            conn.close()
+            self.assertEqual(rows, [(1, 'A-01', 2.5), (2, 'A-02', None), (3, '007', 4.0)])
+
+    @patch('builtins.input', side_effect=AssertionError("input() must not be called"))
+    def test_create_table_from_csv_with_on_conflict(self, mock_input):
+        """Test that on_conflict resolves an existing table without asking on the console."""
+        with tempfile.TemporaryDirectory() as folder:
+            csv_file = os.path.join(folder, 'ledger.csv')
+            db_name = os.path.join(folder, 'test.db')
+            pd.DataFrame({'id': [1, 2], 'name': ['Alice', 'Bob']}).to_csv(csv_file, index=False)
+            sqlite_assistant.create_table_from_csv(csv_file, 'ledger', db_name, on_conflict='skip')
+            self.assertTrue(sqlite_assistant.table_exists('ledger', db_name))
+
+            self.assertIsNone(sqlite_assistant.create_table_from_csv(csv_file, 'ledger', db_name, on_conflict='skip'))
+            self.assertEqual(sqlite_assistant.create_table_from_csv(csv_file, 'ledger', db_name,
+                                                                    on_conflict='overwrite'), 2)
+            self.assertEqual(sqlite_assistant.execute_query("SELECT COUNT(*) FROM ledger", None, db_name), [(2,)])
+            self.assertEqual(sqlite_assistant.create_table_from_csv(csv_file, 'ledger', db_name,
+                                                                    on_conflict='rename'), 2)
+            self.assertEqual(len([table for table in sqlite_assistant.list_tables(db_name)
+                                  if table.startswith('ledger')]), 2)
+
+    def test_create_table_from_csv_with_awkward_headers(self):
+        """Test that headers with spaces, reserved words or quotes are quoted instead of breaking the SQL."""
+        with tempfile.TemporaryDirectory() as folder:
+            csv_file = os.path.join(folder, 'orders.csv')
+            db_name = os.path.join(folder, 'test.db')
+            pd.DataFrame({'order': [1, 2], 'unit price': [2.5, 3.0], 'group': ['a', 'b'],
+                          'x"); DROP TABLE audit; --': ['p', 'q']}).to_csv(csv_file, index=False)
+            with sqlite_assistant.get_connection_manager(db_name).writer() as conn:
+                conn.execute("CREATE TABLE audit (note TEXT)")
+
+            rows = sqlite_assistant.create_table_from_csv(csv_file, 'order items', db_name, bulk=True,
+                                                          indexes=['order', ('group', 'unit price')])
+
+            self.assertEqual(rows, 2)
+            self.assertEqual(sqlite_assistant.execute_query('SELECT "order", "unit price", "group" FROM "order items"',
+                                                            None, db_name), [(1, 2.5, 'a'), (2, 3.0, 'b')])
+            self.assertTrue(sqlite_assistant.table_exists('audit', db_name))
+            indexes = sqlite_assistant.execute_query("SELECT name FROM sqlite_master WHERE type='index' ORDER BY name",
+                                                     None, db_name)
+            self.assertEqual(indexes, [('idx_order items_group_unit price',), ('idx_order items_order',)])
+
+    def test_insert_large_csv_in_chunks_rolls_back_on_error(self):
+        """Test that a failing chunk leaves none of the earlier chunks in the table."""
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE TABLE test_table (id INTEGER PRIMARY KEY, name TEXT)")
+        chunks = [pd.DataFrame({'id': [1, 2], 'name': ['Alice', 'Bob']}),
+                  pd.DataFrame({'id': [2], 'name': ['Duplicate']})]
+
+        with patch.object(sqlite_assistant, 'load_csv_in_chunks', return_value=iter(chunks)):
+            rows = sqlite_assistant.insert_large_csv_in_chunks('large_test.csv', 'test_table', conn, chunk_size=2)
+
+        self.assertIsNone(rows)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM test_table").fetchone(), (0,))
+        conn.close()
+
+    def test_bulk_insert_csv(self):
+        """Test the bulk loader: rows inserted, indexes rebuilt after the load and settings restored."""
+        with tempfile.TemporaryDirectory() as folder:
+            csv_file = os.path.join(folder, 'ledger.csv')
+            db_name = os.path.join(folder, 'test.db')
+            pd.DataFrame({'id': range(100), 'amount': [1.5] * 100}).to_csv(csv_file, index=False)
+            conn = sqlite3.connect(db_name)
+            conn.execute("CREATE TABLE ledger (id INTEGER, amount REAL)")
+            conn.execute("CREATE INDEX idx_amount ON ledger (amount)")
+
+            rows = sqlite_assistant.bulk_insert_csv(csv_file, 'ledger', conn, chunk_size=30, indexes=['id'])
+
+            self.assertEqual(rows, 100)
+            self.assertEqual(conn.execute("SELECT COUNT(*), SUM(id) FROM ledger").fetchone(), (100, 4950))
+            indexes = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index' ORDER BY name")]
+            self.assertEqual(indexes, ['idx_amount', 'idx_ledger_id'])
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone(), ('delete',))
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone(), (2,))
+            conn.close()
+
+    def test_connections_are_reused(self):
+        """Test that repeated queries reuse the pooled connections instead of reconnecting."""
+        with tempfile.TemporaryDirectory() as folder:
+            db_name = os.path.join(folder, 'test.db')
+            sqlite_assistant.run_sql_query("CREATE TABLE ledger (id INTEGER)", db_name)
+            sqlite_assistant.run_sql_query("INSERT INTO ledger VALUES (1)", db_name)
+
+            with patch('sqlite3.connect', wraps=sqlite3.connect) as mock_connect:
+                for _ in range(5):
+                    self.assertEqual(sqlite_assistant.run_sql_query("SELECT id FROM ledger", db_name), [(1,)])
+                    self.assertEqual(sqlite_assistant.list_tables(db_name), ['ledger'])
+            self.assertLessEqual(mock_connect.call_count, 1)
+            sqlite_assistant.close_connection_managers()
+
+    def test_connection_manager_readers_and_writer(self):
+        """Test that readers refuse writes, writes go to the writer and the pool works across threads."""
+        with tempfile.TemporaryDirectory() as folder:
+            manager = sqlite_assistant.ConnectionManager(os.path.join(folder, 'test.db'), max_readers=2)
+            with manager.writer() as conn:
+                conn.execute("CREATE TABLE ledger (id INTEGER)")
+                conn.executemany("INSERT INTO ledger VALUES (?)", [(i,) for i in range(100)])
+
+            with manager.reader() as conn:
+                self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone(), ('wal',))
+                with self.assertRaises(sqlite3.OperationalError):
+                    conn.execute("DELETE FROM ledger")
+
+            results = []
+            def read_sum():
+                with manager.reader() as conn:
+                    results.append(conn.execute("SELECT SUM(id) FROM ledger").fetchone()[0])
+            threads = [threading.Thread(target=read_sum) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(results, [4950] * 8)
+            self.assertLessEqual(len(manager._readers), 2)
+            manager.close()
+
+    def test_connection_manager_close_with_reader_lent_out(self):
+        """Test that a reader lent out during close() is closed on return instead of going back to the pool."""
+        with tempfile.TemporaryDirectory() as folder:
+            manager = sqlite_assistant.ConnectionManager(os.path.join(folder, 'test.db'))
+            with manager.writer() as conn:
+                conn.execute("CREATE TABLE ledger (id INTEGER)")
+
+            with manager.reader() as lent:
+                manager.close()
+                self.assertEqual(lent.execute("SELECT COUNT(*) FROM ledger").fetchone(), (0,))
+            with self.assertRaises(sqlite3.ProgrammingError):
+                lent.execute("SELECT 1")
+
+            with manager.reader() as conn:
+                self.assertIsNot(conn, lent)
+                self.assertEqual(conn.execute("SELECT COUNT(*) FROM ledger").fetchone(), (0,))
+            manager.close()
+
+    def test_paginated_results(self):
+        """Test reading a query page by page with the cursor iterator, OFFSET and keyset pagination."""
+        with tempfile.TemporaryDirectory() as folder:
+            db_name = os.path.join(folder, 'test.db')
+            with sqlite_assistant.get_connection_manager(db_name).writer() as conn:
+                conn.execute("CREATE TABLE ledger (id INTEGER PRIMARY KEY, amount REAL)")
+                conn.executemany("INSERT INTO ledger VALUES (?, ?)", [(i, i * 0.5) for i in range(1, 26)])
+
+            pages = list(sqlite_assistant.iter_query_pages("SELECT id FROM ledger", db_name=db_name, page_size=10))
+            self.assertEqual([len(page) for page in pages], [10, 10, 5])
+
+            columns, rows = sqlite_assistant.fetch_page("SELECT * FROM ledger ORDER BY id;", db_name=db_name,
+                                                        page_size=3, offset=20)
+            self.assertEqual(columns, ['id', 'amount'])
+            self.assertEqual(rows, [(21, 10.5), (22, 11.0), (23, 11.5)])
+
+            query = "SELECT id FROM ledger WHERE amount > ?"
+            _, first = sqlite_assistant.fetch_page_after(query, 'id', params=[5], db_name=db_name, page_size=4)
+            _, second = sqlite_assistant.fetch_page_after(query, 'id', after=first[-1][0], params=[5],
+                                                          db_name=db_name, page_size=4)
+            self.assertEqual(first + second, [(i,) for i in range(11, 19)])
+
+    def test_paginated_results_of_awkward_queries(self):
+        """Test paging queries with a trailing comment or named parameters, and refusing WITH ... INSERT."""
+        with tempfile.TemporaryDirectory() as folder:
+            db_name = os.path.join(folder, 'test.db')
+            with sqlite_assistant.get_connection_manager(db_name).writer() as conn:
+                conn.execute("CREATE TABLE ledger (id INTEGER PRIMARY KEY, amount REAL)")
+                conn.executemany("INSERT INTO ledger VALUES (?, ?)", [(i, i * 0.5) for i in range(1, 26)])
+
+            _, rows = sqlite_assistant.fetch_page("SELECT id FROM ledger ORDER BY id; -- first rows",
+                                                  db_name=db_name, page_size=2)
+            self.assertEqual(rows, [(1,), (2,)])
+
+            query = "SELECT id FROM ledger WHERE amount > :minimum"
+            _, rows = sqlite_assistant.fetch_page(query + " ORDER BY id", {'minimum': 5}, db_name, page_size=2,
+                                                  offset=1)
+            self.assertEqual(rows, [(12,), (13,)])
+            _, rows = sqlite_assistant.fetch_page_after(query, 'id', after=20, params={'minimum': 5},
+                                                        db_name=db_name, page_size=2)
+            self.assertEqual(rows, [(21,), (22,)])
+
+            with self.assertRaises(ValueError):
+                sqlite_assistant.fetch_page_after("SELECT id FROM ledger", "id; DROP TABLE ledger", db_name=db_name)
+            _, rows = sqlite_assistant.fetch_page_after('SELECT id AS "order" FROM ledger', 'order', after=23,
+                                                        db_name=db_name)
+            self.assertEqual(rows, [(24,), (25,)])
+
+            self.assertTrue(sqlite_assistant.is_pageable_query("-- totals\nWITH t AS (SELECT 1) SELECT * FROM t"))
+            insert = "WITH t AS (SELECT 100, 1.0) INSERT INTO ledger SELECT * FROM t"
+            self.assertFalse(sqlite_assistant.is_pageable_query(insert))
+            self.assertFalse(sqlite_assistant.is_read_query(insert))
+            sqlite_assistant.execute_query(insert, None, db_name)
+            self.assertEqual(sqlite_assistant.execute_query("SELECT COUNT(*) FROM ledger", None, db_name), [(26,)])
+
+    def test_cancel_query(self):
+        """Test that setting the cancel event stops a running query with OperationCancelled."""
+        with tempfile.TemporaryDirectory() as folder:
+            db_name = os.path.join(folder, 'test.db')
+            cancel_event = threading.Event()
+            timer = threading.Timer(0.1, cancel_event.set)
+            timer.start()
+            endless = "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) SELECT COUNT(*) FROM n"
+
+            with self.assertRaises(sqlite_assistant.OperationCancelled):
+                sqlite_assistant.execute_query(endless, None, db_name, cancel_event)
+            timer.join()
+            # The connection is usable again afterwards
+            self.assertEqual(sqlite_assistant.execute_query("SELECT 1", None, db_name), [(1,)])
+
+    def test_cancel_csv_load_reports_progress_and_rolls_back(self):
+        """Test progress reports during a load, and that cancelling it leaves neither rows nor the table behind."""
+        with tempfile.TemporaryDirectory() as folder:
+            csv_file = os.path.join(folder, 'ledger.csv')
+            db_name = os.path.join(folder, 'test.db')
+            pd.DataFrame({'id': range(100), 'name': ['row'] * 100}).to_csv(csv_file, index=False)
+            cancel_event = threading.Event()
+            progress = []
+
+            def report(rows):
+                progress.append(rows)
+                if rows >= 40:
+                    cancel_event.set()
+
+            with self.assertRaises(sqlite_assistant.OperationCancelled):
+                sqlite_assistant.create_table_from_csv(csv_file, 'ledger', db_name, chunk_size=20,
+                                                       progress=report, cancel_event=cancel_event)
+
+            self.assertEqual(progress, [20, 40])
+            self.assertFalse(sqlite_assistant.table_exists('ledger', db_name))
+
+    def test_cancel_bulk_overwrite_keeps_old_table(self):
+        """Test that cancelling a bulk load over an existing table leaves the old table and its indexes."""
+        with tempfile.TemporaryDirectory() as folder:
+            csv_file = os.path.join(folder, 'ledger.csv')
+            db_name = os.path.join(folder, 'test.db')
+            pd.DataFrame({'id': [1, 2], 'name': ['a', 'b']}).to_csv(csv_file, index=False)
+            sqlite_assistant.create_table_from_csv(csv_file, 'ledger', db_name, bulk=True, indexes=['id'])
+            pd.DataFrame({'id': range(100), 'name': ['row'] * 100}).to_csv(csv_file, index=False)
+            cancel_event = threading.Event()
+
+            with self.assertRaises(sqlite_assistant.OperationCancelled):
+                sqlite_assistant.create_table_from_csv(csv_file, 'ledger', db_name, chunk_size=20, bulk=True,
+                                                       progress=lambda rows: cancel_event.set(),
+                                                       cancel_event=cancel_event, on_conflict='overwrite')
+
+            self.assertEqual(sqlite_assistant.execute_query("SELECT id, name FROM ledger", None, db_name),
+                             [(1, 'a'), (2, 'b')])
+            self.assertEqual(sqlite_assistant.execute_query(
+                "SELECT name FROM sqlite_master WHERE type='index'", None, db_name), [('idx_ledger_id',)])
+            with sqlite_assistant.get_connection_manager(db_name).writer() as conn:
+                self.assertEqual(conn.execute("PRAGMA synchronous").fetchone(), (2,))
+
+    def test_inserts_create_a_missing_table(self):
+        """Test that both insert paths create the table from the data's columns when it does not exist."""
+        conn = sqlite3.connect(':memory:')
+        df = pd.DataFrame({'id': [1, 2], 'name': ['Alice', 'Bob'], 'amount': [1.5, None]})
+        sqlite_assistant.insert_data_into_table(df, 'people', conn)
+        self.assertEqual(conn.execute("SELECT * FROM people").fetchall(), [(1, 'Alice', 1.5), (2, 'Bob', None)])
+
+        chunks = [df.iloc[:1], df.iloc[1:]]
+        with patch.object(sqlite_assistant, 'load_csv_in_chunks', return_value=iter(chunks)):
+            self.assertEqual(sqlite_assistant.insert_large_csv_in_chunks('people.csv', 'copy', conn), 2)
+        columns = [(name, column_type) for _, name, column_type, *_ in conn.execute("PRAGMA table_info(copy)")]
+        self.assertEqual(columns, [('id', 'INTEGER'), ('name', 'TEXT'), ('amount', 'REAL')])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM copy").fetchone(), (2,))
+        conn.close()
+
+    def test_insert_large_csv_in_chunks_inside_open_transaction(self):
+        """Test that a load inside the caller's transaction uses a savepoint and keeps the caller's work."""
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE TABLE test_table (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute("CREATE TABLE audit (note TEXT)")
+        conn.commit()
+        conn.execute("INSERT INTO audit VALUES ('before load')")
+        self.assertTrue(conn.in_transaction)
+
+        good = [pd.DataFrame({'id': [1, 2], 'name': ['Alice', 'Bob']})]
+        with patch.object(sqlite_assistant, 'load_csv_in_chunks', return_value=iter(good)):
+            self.assertEqual(sqlite_assistant.insert_large_csv_in_chunks('a.csv', 'test_table', conn), 2)
+        self.assertTrue(conn.in_transaction)  # Committing is left to the caller
+
+        bad = [pd.DataFrame({'id': [3], 'name': ['Carol']}), pd.DataFrame({'id': [1], 'name': ['Duplicate']})]
+        with patch.object(sqlite_assistant, 'load_csv_in_chunks', return_value=iter(bad)):
+            self.assertIsNone(sqlite_assistant.insert_large_csv_in_chunks('b.csv', 'test_table', conn))
+
+        conn.commit()
+        self.assertEqual(conn.execute("SELECT id FROM test_table ORDER BY id").fetchall(), [(1,), (2,)])
+        self.assertEqual(conn.execute("SELECT note FROM audit").fetchall(), [('before load',)])
+        conn.close()
+
+# Stands in for tk.Tk, so the worker can be tested without a display
+class FakeRoot:
+    def __init__(self):
+        self.pending = {}
+        self.next_id = 0
+
+    def after(self, ms, callback):
+        self.next_id += 1
+        self.pending[self.next_id] = callback
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def pump(self, until, timeout=5):
+        """Run the scheduled callbacks, like the Tk main loop, until until() is true."""
+        deadline = time.monotonic() + timeout
+        while not until():
+            if time.monotonic() > deadline:
+                raise AssertionError("Timed out waiting for the background task.")
+            callbacks, self.pending = self.pending, {}
+            for callback in callbacks.values():
+                callback()
+            time.sleep(0.01)
+
+class TestBackgroundWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.root = FakeRoot()
+        self.worker = sqlite_assistant_ui.BackgroundWorker(self.root, poll_ms=10)
+        self.results = []
+
+    def tearDown(self):
+        self.worker.shutdown()
+
+    def test_result_and_progress_run_on_the_tk_thread(self):
+        """Test that progress and the result are handed to the callbacks on the thread that runs the loop."""
+        def work(task, count):
+            for i in range(count):
+                task.report(i)
+            return threading.current_thread()
+
+        progress = []
+        self.worker.submit(work, 3, on_done=self.results.append, on_progress=progress.append)
+        self.root.pump(until=lambda: self.results)
+
+        self.assertIsNot(self.results[0], threading.current_thread())  # The work ran on a worker thread
+        self.assertEqual(progress, [0, 1, 2])
+        self.assertEqual(self.worker.tasks, set())
+
+    def test_cancel_stops_the_work(self):
+        """Test that a task stopped by its cancel_event reports OperationCancelled."""
+        started = threading.Event()
+
+        def work(task):
+            started.set()
+            while True:
+                sqlite_assistant.check_cancelled(task.cancel_event)
+                time.sleep(0.01)
+
+        task = self.worker.submit(work, on_done=self.results.append, on_error=self.results.append)
+        started.wait(5)
+        task.cancel()
+        self.root.pump(until=lambda: self.results)
+        self.assertIsInstance(self.results[0], sqlite_assistant.OperationCancelled)
+
+    def test_cancel_after_the_work_finished_keeps_the_result(self):
+        """Test that work which finished despite a cancel (e.g. a committed load) still reports its result."""
+        started, finish = threading.Event(), threading.Event()
+
+        def work(task):
+            started.set()
+            finish.wait(5)
+            return 42
+
+        task = self.worker.submit(work, on_done=self.results.append, on_error=self.results.append)
+        started.wait(5)
+        task.cancel()
+        finish.set()
+        self.root.pump(until=lambda: self.results)
+        self.assertEqual(self.results, [42])
+
+    def test_tasks_that_are_not_cancellable(self):
+        """Test that a task submitted with cancellable=False is not counted as busy and survives cancel_all()."""
+        started, finish = threading.Event(), threading.Event()
+
+        def work(task):
+            started.set()
+            finish.wait(5)
+            sqlite_assistant.check_cancelled(task.cancel_event)
+            return 'page'
+
+        task = self.worker.submit(work, on_done=self.results.append, on_error=self.results.append, cancellable=False)
+        started.wait(5)
+        self.assertEqual(self.worker.tasks, set())
+        self.worker.cancel_all()
+        finish.set()
+        self.root.pump(until=lambda: self.results)
+        self.assertFalse(task.cancelled)
+        self.assertEqual(self.results, ['page'])
+
+    def test_shutdown_cancels_running_work_and_stops_polling(self):
+        """Test that shutdown() returns once the running work has stopped, and stops the callback loop."""
+        started = threading.Event()
+
+        def work(task):
+            started.set()
+            task.cancel_event.wait(5)
+            sqlite_assistant.check_cancelled(task.cancel_event)
+
+        task = self.worker.submit(work)
+        started.wait(5)
+        self.worker.shutdown()
+        self.assertTrue(task.cancelled)
+        self.assertEqual(self.root.pending, {})
+
+class TestPageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.data = [(i,) for i in range(25)]
+        self.fetched = []
+
+    def fetch_rows(self, offset, limit):
+        self.fetched.append(offset)
+        return self.data[offset:offset + limit]
+
+    def test_rows_are_fetched_page_by_page_and_cached(self):
+        """Test that rows spanning pages fetch each page once, and that the end of the result is found."""
+        cache = sqlite_assistant_ui.PageCache(self.fetch_rows, page_size=10, max_pages=2, first_page=self.data[:10])
+        self.assertEqual(cache.rows(8, 4), [(8,), (9,), (10,), (11,)])
+        self.assertEqual(cache.rows(5, 10), [(i,) for i in range(5, 15)])
+        self.assertEqual(self.fetched, [10])
+        self.assertFalse(cache.complete)
+        self.assertEqual(cache.scroll_rows(), 30)
+
+        self.assertEqual(cache.rows(20, 10), [(i,) for i in range(20, 25)])
+        self.assertTrue(cache.complete)
+        self.assertEqual((cache.known_rows, cache.scroll_rows(), cache.last_top_row(5)), (25, 25, 20))
+        self.assertEqual(list(cache.pages), [1, 2])  # Only max_pages pages are kept
+
+    def test_rows_without_fetching(self):
+        """Test that fetch=False stops at the first missing page and missing_pages names the pages to fetch."""
+        cache = sqlite_assistant_ui.PageCache(self.fetch_rows, page_size=10, first_page=self.data[:10])
+        self.assertEqual(cache.rows(8, 4, fetch=False), [(8,), (9,)])
+        self.assertEqual(cache.missing_pages(8, 4), [1])
+        self.assertEqual(self.fetched, [])
+
+        cache.store(1, self.fetch_rows(10, 10))
+        cache.store(2, self.fetch_rows(20, 10))
+        self.assertEqual(cache.missing_pages(8, 30), [])  # Nothing past the end of the result is fetched
+
+class TestResultGrid(unittest.TestCase):
+
+    def setUp(self):
+        try:
+            self.root = sqlite_assistant_ui.tk.Tk()
+        except sqlite_assistant_ui.tk.TclError:
+            self.skipTest("No display.")
+        self.root.withdraw()
+        self.worker = sqlite_assistant_ui.BackgroundWorker(self.root, poll_ms=10)
+        self.grid = sqlite_assistant_ui.ResultGrid(self.root, visible_rows=5, page_size=10)
+
+    def tearDown(self):
+        self.worker.shutdown()
+        self.root.destroy()
+
+    def pump(self, until, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not until():
+            if time.monotonic() > deadline:
+                raise AssertionError("Timed out waiting for the page.")
+            self.root.update()
+            time.sleep(0.01)
+
+    def shown(self):
+        return [tuple(map(str, self.grid.tree.item(item, 'values'))) for item in self.grid.tree.get_children()]
+
+    def test_pages_are_fetched_on_the_worker(self):
+        """Test that scrolling to rows that are not cached fetches them off the Tk thread."""
+        data = [(i,) for i in range(25)]
+        threads = []
+
+        def fetch_rows(offset, limit):
+            threads.append(threading.current_thread())
+            return data[offset:offset + limit]
+
+        self.grid.set_source(['id'], fetch_rows, data[:10], worker=self.worker)
+        self.assertEqual(self.shown(), [(str(i),) for i in range(5)])
+
+        self.grid.scroll_to(15)
+        self.assertEqual(self.shown(), [])  # Page 1 is being fetched
+        self.pump(until=lambda: 1 in self.grid.cache.pages)
+        self.assertEqual(self.shown(), [(str(i),) for i in range(15, 20)])
+
+        self.grid.scroll_by(10)  # Past the end: moved back once the last page has arrived
+        self.pump(until=lambda: self.grid.cache.complete)
+
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertEqual(self.grid.first_row, 20)
+        self.assertEqual(self.shown(), [(str(i),) for i in range(20, 25)])
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -1,9 +1,303 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
-import sqlite3
 import pandas as pd
 import sqlite_assistant  # Assuming your code is in the sqlite_assistant.py module
 from tkinter import ttk
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
+
+# Handle on one piece of work running on a worker thread
+class BackgroundTask:
+    """Work submitted to a BackgroundWorker: the work reports progress with report(), the UI stops it with cancel()."""
+
+    def __init__(self, worker, on_progress=None):
+        self.worker = worker
+        self.on_progress = on_progress
+        self.cancel_event = threading.Event()
+
+    def report(self, *args):
+        """Called by the work on its thread; on_progress(*args) then runs on the Tk thread."""
+        if self.on_progress is not None:
+            self.worker.post(self.on_progress, *args)
+
+    def cancel(self):
+        """Ask the work to stop. Loads and queries given task.cancel_event stop within moments."""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+# Runs slow work off the Tk event thread
+class BackgroundWorker:
+    """Runs functions on worker threads so the window stays responsive while they run.
+
+    Tk widgets may only be used from the Tk thread, so the worker threads queue their
+    callbacks (progress, result, error) and a loop scheduled with root.after runs them.
+    """
+
+    def __init__(self, root, max_workers=4, poll_ms=50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.tasks = set()  # Cancellable tasks still running (only used on the Tk thread)
+        self._callbacks = queue.Queue()
+        self._poll_id = self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, func, *args, on_done=None, on_error=None, on_progress=None, cancellable=True):
+        """Run func(task, *args) on a worker thread and return the task.
+
+        When it finishes, on_done(result) or on_error(exception) runs on the Tk thread. A
+        cancelled task ends with on_error(OperationCancelled) if func stopped early; a func
+        that finished anyway (a load that was already committed) still reports its result.
+        Tasks submitted with cancellable=False (short housekeeping such as fetching a page of
+        the result grid) are left out of tasks, so cancel_all() and the busy state ignore them.
+        """
+        task = BackgroundTask(self, on_progress)
+        if cancellable:
+            self.tasks.add(task)
+        self.executor.submit(self._run, task, func, args, on_done, on_error)
+        return task
+
+    def _run(self, task, func, args, on_done, on_error):
+        try:
+            result = func(task, *args)
+        except Exception as e:
+            self.post(self._finish, task, on_error, e)
+        else:
+            self.post(self._finish, task, on_done, result)
+
+    def _finish(self, task, callback, value):
+        self.tasks.discard(task)
+        if callback is not None:
+            callback(value)
+
+    def post(self, callback, *args):
+        """Run callback(*args) on the Tk thread; can be called from any thread."""
+        self._callbacks.put((callback, args))
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    callback, args = self._callbacks.get_nowait()
+                except queue.Empty:
+                    break
+                callback(*args)
+        finally:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
+
+    def cancel_all(self):
+        """Cancel every running task."""
+        for task in list(self.tasks):
+            task.cancel()
+
+    def shutdown(self):
+        """Cancel the running tasks, drop the waiting ones, wait for the threads and stop the callback loop."""
+        self.cancel_all()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.root.after_cancel(self._poll_id)
+
+# Pages of query results, fetched on demand and kept in a small LRU cache
+class PageCache:
+    """Rows of a result, fetched page_size at a time with fetch_rows(offset, limit); only max_pages pages are kept."""
+
+    def __init__(self, fetch_rows, page_size=200, max_pages=8, first_page=None):
+        self.fetch_rows = fetch_rows
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.pages = OrderedDict()
+        self.loading = set()     # Pages being fetched in the background
+        self.known_rows = 0      # Number of rows known to exist so far
+        self.complete = False    # True once the last page has been seen
+        if first_page is not None:
+            self.store(0, list(first_page))
+
+    def store(self, index, rows):
+        """Keep the rows of page index, fetched by the caller."""
+        self.loading.discard(index)
+        self.pages[index] = rows
+        self.known_rows = max(self.known_rows, index * self.page_size + len(rows))
+        if len(rows) < self.page_size:
+            self.complete = True
+        if len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+
+    def page(self, index):
+        """Return the rows of page index, fetching them if they are not cached."""
+        if index in self.pages:
+            self.pages.move_to_end(index)
+            return self.pages[index]
+        rows = list(self.fetch_rows(index * self.page_size, self.page_size))
+        self.store(index, rows)
+        return rows
+
+    def rows(self, first, count, fetch=True):
+        """Return up to count rows starting at row first.
+
+        With fetch=False only cached pages are used, and the rows stop at the first page
+        that is missing.
+        """
+        result = []
+        index = first // self.page_size
+        start = first - index * self.page_size
+        while len(result) < count:
+            if not fetch and index not in self.pages:
+                break
+            rows = self.page(index)
+            result.extend(rows[start:start + count - len(result)])
+            if len(rows) < self.page_size:
+                break
+            index += 1
+            start = 0
+        return result
+
+    def missing_pages(self, first, count):
+        """Indexes of the pages holding rows first to first + count - 1 that are not cached."""
+        missing = []
+        for index in range(first // self.page_size, (first + count - 1) // self.page_size + 1):
+            if self.complete and index * self.page_size >= self.known_rows:
+                break
+            if index not in self.pages:
+                missing.append(index)
+        return missing
+
+    def last_top_row(self, visible_rows):
+        """Largest first visible row: the end of the result, or one page past the known rows until it is found."""
+        rows = self.known_rows if self.complete else self.scroll_rows()
+        return max(rows - visible_rows, 0)
+
+    def scroll_rows(self):
+        """Rows for the scrollbar: the known rows, plus one more page while the end has not been reached."""
+        return self.known_rows if self.complete else self.known_rows + self.page_size
+
+# Result table that only creates widgets for the rows that are visible
+class ResultGrid(tk.Frame):
+    """Virtualized result grid: shows visible_rows rows of a PageCache and fetches more pages as it scrolls.
+
+    A query over millions of rows shows its first page at once, and scrolling never loads the whole result.
+    Given a BackgroundWorker, the pages are fetched on a worker thread and shown when they arrive.
+    """
+
+    def __init__(self, parent, visible_rows=15, page_size=200):
+        super().__init__(parent)
+        self.visible_rows = visible_rows
+        self.page_size = page_size
+        self.cache = None
+        self.worker = None
+        self.first_row = 0
+
+        self.tree = ttk.Treeview(self, show='headings', height=visible_rows, selectmode='browse')
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        self.scrollbar = tk.Scrollbar(self, orient='vertical', command=self.on_scroll)
+        self.scrollbar.grid(row=0, column=1, sticky='ns')
+        self.status_label = tk.Label(self, anchor='w')
+        self.status_label.grid(row=1, column=0, columnspan=2, sticky='we')
+        self.columnconfigure(0, weight=1)
+
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll_by(-3 if event.delta > 0 else 3))
+        self.tree.bind('<Button-4>', lambda event: self.scroll_by(-3))
+        self.tree.bind('<Button-5>', lambda event: self.scroll_by(3))
+
+    def set_source(self, columns, fetch_rows, first_page=None, worker=None):
+        """Show the result whose rows are returned by fetch_rows(offset, limit), on worker's threads if given."""
+        self.worker = worker
+        self.tree['columns'] = [str(i) for i in range(len(columns))]
+        for i, column in enumerate(columns):
+            self.tree.heading(str(i), text=column)
+            self.tree.column(str(i), width=120, stretch=True)
+        self.cache = PageCache(fetch_rows, self.page_size, first_page=first_page)
+        self.first_row = 0
+        self.render()
+
+    def set_rows(self, columns, rows):
+        """Show rows that are already in memory."""
+        self.set_source(columns, lambda offset, limit: rows[offset:offset + limit])
+
+    def clear(self):
+        """Remove the result."""
+        self.cache = None
+        self.tree.delete(*self.tree.get_children())
+        self.tree['columns'] = []
+        self.status_label.configure(text='')
+        self.scrollbar.set(0, 1)
+
+    def set_colors(self, bg, fg):
+        """Apply the theme colors to the grid."""
+        self.configure(bg=bg)
+        self.status_label.configure(bg=bg, fg=fg)
+        ttk.Style(self).configure('Treeview', background=bg, fieldbackground=bg, foreground=fg)
+
+    def render(self):
+        """Redraw the visible rows, the scrollbar and the status line."""
+        self.tree.delete(*self.tree.get_children())
+        if self.cache is None:
+            return
+        rows = self.cache.rows(self.first_row, self.visible_rows, fetch=self.worker is None)
+        missing = self.cache.missing_pages(self.first_row, self.visible_rows) if self.worker is not None else []
+        self.fetch_pages(missing)
+        for row in rows:
+            self.tree.insert('', tk.END, values=["NULL" if value is None else value for value in row])
+
+        total = max(self.cache.scroll_rows(), 1)
+        self.scrollbar.set(self.first_row / total, min((self.first_row + self.visible_rows) / total, 1.0))
+        if missing:
+            self.status_label.configure(text=f"Loading rows from {self.first_row + len(rows) + 1:,}...")
+        elif not rows:
+            self.status_label.configure(text="No rows.")
+        else:
+            more = '' if self.cache.complete else '+'
+            self.status_label.configure(
+                text=f"Rows {self.first_row + 1:,}-{self.first_row + len(rows):,} of {self.cache.known_rows:,}{more}")
+
+    def fetch_pages(self, indexes):
+        """Fetch the pages on the worker; the grid is drawn again as each one arrives."""
+        cache = self.cache
+        for index in indexes:
+            if index in cache.loading:
+                continue
+            cache.loading.add(index)
+            self.worker.submit(lambda task, offset: list(cache.fetch_rows(offset, cache.page_size)),
+                               index * cache.page_size,
+                               on_done=lambda rows, index=index: self.page_loaded(cache, index, rows),
+                               on_error=lambda error, index=index: self.page_failed(cache, index, error),
+                               cancellable=False)
+
+    def page_loaded(self, cache, index, rows):
+        cache.store(index, rows)
+        if cache is self.cache:  # The pages of a result that is no longer shown are dropped
+            self.scroll_to(self.first_row)  # The page may show that the result ends before first_row
+
+    def page_failed(self, cache, index, error):
+        cache.loading.discard(index)
+        if cache is self.cache:
+            self.status_label.configure(text=f"Error fetching rows: {error}")
+
+    def scroll_to(self, first_row):
+        """Make first_row the top visible row."""
+        if self.cache is None:
+            return
+        if self.worker is None:
+            # Fetching the page first tells whether the result ends before first_row
+            self.cache.rows(max(first_row, 0), self.visible_rows)
+        self.first_row = min(max(first_row, 0), self.cache.last_top_row(self.visible_rows))
+        self.render()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.first_row + rows)
+
+    def on_scroll(self, action, amount, unit=None):
+        """Scrollbar command: 'moveto' a fraction, or 'scroll' by units (rows) or pages."""
+        if self.cache is None:
+            return
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * self.cache.scroll_rows()))
+        elif unit == 'pages':
+            self.scroll_by(int(amount) * self.visible_rows)
+        else:
+            self.scroll_by(int(amount))
 
 class SQLiteAssistantUI:
     def __init__(self, root):
@@ -20,6 +314,10 @@ class SQLiteAssistantUI:
         
         self.query_history = []
 
+        # Loads, queries and SQL generation run on worker threads, so the window never hangs
+        self.worker = BackgroundWorker(self.root)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
         # Create UI components
         self.create_widgets()
 
@@ -59,18 +357,21 @@ class SQLiteAssistantUI:
         self.result_label = tk.Label(self.root, text="Query Result:")
         self.result_label.grid(row=8, column=0, padx=10, pady=5)
 
-        self.result_text = tk.Text(self.root, height=10, width=50)
-        self.result_text.grid(row=9, column=0, padx=10, pady=10)
-
-        # Scrollbar for the result text
-        self.result_scrollbar = tk.Scrollbar(self.root, orient='vertical', command=self.result_text.yview)
-        self.result_scrollbar.grid(row=9, column=1, sticky='ns')
-        self.result_text.config(yscrollcommand=self.result_scrollbar.set)
+        # Grid that only loads the visible rows of the result
+        self.result_grid = ResultGrid(self.root)
+        self.result_grid.grid(row=9, column=0, columnspan=2, padx=10, pady=10, sticky='we')
 
         # Clear button for input and result
         self.clear_button = tk.Button(self.root, text="Clear", command=self.clear_input_output)
         self.clear_button.grid(row=10, column=0, columnspan=2, padx=10, pady=10)
 
+        # Status of the background work, and a button to cancel it
+        self.status_label = tk.Label(self.root, text="Ready.", anchor='w')
+        self.status_label.grid(row=11, column=0, padx=10, pady=5, sticky='we')
+
+        self.cancel_button = tk.Button(self.root, text="Cancel", command=self.worker.cancel_all, state=tk.DISABLED)
+        self.cancel_button.grid(row=11, column=1, padx=10, pady=5)
+
     def set_color_theme(self):
         """Allow the user to set a custom color theme using up to 3 hex codes."""
         color_input = simpledialog.askstring(
@@ -106,15 +407,17 @@ class SQLiteAssistantUI:
         self.instructions_label.configure(bg=self.default_bg_color, fg=self.default_text_color)
         self.query_input_label.configure(bg=self.default_bg_color, fg=self.default_text_color)
         self.result_label.configure(bg=self.default_bg_color, fg=self.default_text_color)
+        self.status_label.configure(bg=self.default_bg_color, fg=self.default_text_color)
 
         self.load_csv_button.configure(bg=self.default_button_color, fg=self.default_text_color)
         self.run_query_button.configure(bg=self.default_button_color, fg=self.default_text_color)
         self.list_tables_button.configure(bg=self.default_button_color, fg=self.default_text_color)
         self.generate_sql_button.configure(bg=self.default_button_color, fg=self.default_text_color)
         self.set_theme_button.configure(bg=self.default_button_color, fg=self.default_text_color)
+        self.cancel_button.configure(bg=self.default_button_color, fg=self.default_text_color)
 
         self.query_input_text.configure(bg=self.default_bg_color, fg=self.default_text_color)
-        self.result_text.configure(bg=self.default_bg_color, fg=self.default_text_color)
+        self.result_grid.set_colors(self.default_bg_color, self.default_text_color)
 
     def load_csv(self):
         """Load CSV file into SQLite database."""
@@ -126,11 +429,55 @@ class SQLiteAssistantUI:
         if not table_name:
             return
 
-        try:
-            sqlite_assistant.create_table_from_csv(csv_file, table_name, self.db_name)
-            messagebox.showinfo("Success", f"CSV file {csv_file} loaded into table '{table_name}'")
-        except Exception as e:
-            messagebox.showerror("Error", f"Error loading CSV: {str(e)}")
+        def check(task):
+            return sqlite_assistant.table_exists(table_name, self.db_name)
+
+        self.run_in_background(f"Checking table '{table_name}'...", check,
+                               on_done=lambda exists: self.start_load(csv_file, table_name, exists),
+                               error_message="Error checking table")
+
+    def ask_conflict_resolution(self, table_name):
+        """Ask what to do with a table that already exists; returns 'overwrite', 'rename' or 'skip'."""
+        while True:
+            action = simpledialog.askstring(
+                "Table Exists", f"Table '{table_name}' already exists. Choose an action: 'overwrite', 'rename', or 'skip':"
+            )
+            if action is None:
+                return 'skip'
+            action = action.strip().lower()
+            if action in ('overwrite', 'rename', 'skip'):
+                return action
+            messagebox.showerror("Invalid Input", "Please choose 'overwrite', 'rename', or 'skip'.")
+
+    def start_load(self, csv_file, table_name, exists):
+        """Load the CSV file on a worker thread, once the user has said what to do if the table exists."""
+        # The question is asked here on the Tk thread: the load must not wait for the user
+        # while it holds the database's writer
+        on_conflict = 'skip'
+        if exists:
+            on_conflict = self.ask_conflict_resolution(table_name)
+            if on_conflict == 'skip':
+                self.status_label.configure(text=f"Skipped loading '{table_name}'.")
+                return
+            if on_conflict == 'rename':
+                table_name = sqlite_assistant.renamed_table(table_name)
+                on_conflict = 'skip'
+
+        def load(task):
+            return sqlite_assistant.create_table_from_csv(csv_file, table_name, self.db_name, progress=task.report,
+                                                          cancel_event=task.cancel_event, on_conflict=on_conflict)
+
+        def show_progress(rows):
+            self.status_label.configure(text=f"Loading '{table_name}': {rows:,} rows so far...")
+
+        def loaded(rows):
+            if rows is None:
+                messagebox.showwarning("Not Loaded", f"CSV file {csv_file} was not loaded (see error_log.txt).")
+            else:
+                messagebox.showinfo("Success", f"CSV file {csv_file} loaded into table '{table_name}' ({rows:,} rows)")
+
+        self.run_in_background(f"Loading '{table_name}'...", load, on_done=loaded, on_progress=show_progress,
+                               error_message="Error loading CSV")
 
     def run_sql_query(self):
         """Run SQL query and show result in the UI."""
@@ -138,22 +485,37 @@ class SQLiteAssistantUI:
         if not query:
             messagebox.showwarning("Input Error", "Please enter a SQL query.")
             return
-
-        try:
-            result = sqlite_assistant.run_sql_query(query, self.db_name)
+        page_size = self.result_grid.page_size
+
+        def fetch_rows(offset, limit):
+            return sqlite_assistant.fetch_page(query, db_name=self.db_name, page_size=limit, offset=offset)[1]
+
+        def run(task):
+            if sqlite_assistant.is_pageable_query(query):
+                # Only the first page is read now; the grid fetches the others as it scrolls
+                return sqlite_assistant.fetch_page(query, db_name=self.db_name, page_size=page_size,
+                                                   cancel_event=task.cancel_event)
+            return None, sqlite_assistant.execute_query(query, None, self.db_name, task.cancel_event)
+
+        def show(result):
+            columns, rows = result
+            if columns is None:
+                self.display_result(rows)
+            else:
+                self.result_grid.set_source(columns, fetch_rows, rows, worker=self.worker)
             self.query_history.append(query)  # Save query to history
             self.query_history_combobox['values'] = self.query_history
-            self.display_result(result)
-        except Exception as e:
-            messagebox.showerror("Error", f"Error running query: {str(e)}")
+
+        self.run_in_background("Running query...", run, on_done=show, error_message="Error running query")
 
     def list_tables(self):
         """List all tables in the database."""
-        try:
-            tables = sqlite_assistant.list_tables(self.db_name)
-            self.display_result(tables)
-        except Exception as e:
-            messagebox.showerror("Error", f"Error retrieving tables: {str(e)}")
+        def run(task):
+            return sqlite_assistant.list_tables(self.db_name)
+
+        self.run_in_background("Listing tables...", run,
+                               on_done=lambda tables: self.display_result(tables, columns=['table']),
+                               error_message="Error retrieving tables")
 
     def generate_sql(self):
         """Generate SQL query using ChatGPT."""
@@ -161,37 +523,77 @@ class SQLiteAssistantUI:
         if not request:
             return
 
-        tables = sqlite_assistant.list_tables(self.db_name)
-        if not tables:
-            messagebox.showwarning("Error", "No tables found in the database.")
+        def generate(task):
+            tables = sqlite_assistant.list_tables(self.db_name)
+            if not tables:
+                raise ValueError("No tables found in the database.")
+            table_name = tables[0]  # You can expand this to allow user to choose a table
+
+            with sqlite_assistant.get_connection_manager(self.db_name).reader() as conn:
+                df = pd.read_sql_query(f"SELECT * FROM {sqlite_assistant.quote_identifier(table_name)} LIMIT 1", conn)
+            table_schema = df.columns.tolist()
+            table_schema_str = ', '.join([f"{col} (type: {sqlite_assistant.map_data_type(df[col].dtype)})" for col in table_schema])
+            generated_sql = sqlite_assistant.generate_sql_with_llm(request, table_schema_str)
+            # The LLM call cannot be interrupted, so a cancel only takes effect once it returns
+            sqlite_assistant.check_cancelled(task.cancel_event)
+            return generated_sql
+
+        def generated(generated_sql):
+            if generated_sql:
+                self.query_input_text.delete("1.0", tk.END)
+                self.query_input_text.insert(tk.END, generated_sql)
+                self.run_sql_query()  # Automatically run the generated query
+            else:
+                messagebox.showerror("Error", "Failed to generate SQL query.")
+
+        self.run_in_background("Generating SQL...", generate, on_done=generated, error_message="Error generating SQL")
+
+    def run_in_background(self, status, func, on_done=None, on_progress=None, error_message="Error"):
+        """Run func(task) on a worker thread, showing status and enabling Cancel until it finishes."""
+        def done(result):
+            self.task_finished("Done.")
+            if on_done is not None:
+                on_done(result)
+
+        def failed(error):
+            if isinstance(error, sqlite_assistant.OperationCancelled):
+                self.task_finished("Cancelled.")
+            else:
+                self.task_finished(f"{error_message}.")
+                messagebox.showerror("Error", f"{error_message}: {str(error)}")
+
+        self.status_label.configure(text=status)
+        self.cancel_button.configure(state=tk.NORMAL)
+        return self.worker.submit(func, on_done=done, on_error=failed, on_progress=on_progress)
+
+    def task_finished(self, status):
+        """Show the status of the task that just finished; Cancel stays enabled while others run."""
+        self.status_label.configure(text=status)
+        if not self.worker.tasks:
+            self.cancel_button.configure(state=tk.DISABLED)
+
+    def display_result(self, result, columns=None):
+        """Display a list of rows (or of single values) in the result grid."""
+        if not isinstance(result, list):
+            self.result_grid.clear()
+            self.result_grid.status_label.configure(text="No result or query failed.")
             return
-
-        table_name = tables[0]  # You can expand this to allow user to choose a table
-        df = pd.read_sql_query(f"SELECT * FROM {table_name} LIMIT 1", sqlite3.connect(self.db_name))
-        table_schema = df.columns.tolist()
-        table_schema_str = ', '.join([f"{col} (type: {sqlite_assistant.map_data_type(df[col].dtype)})" for col in table_schema])
-
-        generated_sql = sqlite_assistant.generate_sql_with_llm(request, table_schema_str)
-        if generated_sql:
-            self.query_input_text.delete("1.0", tk.END)
-            self.query_input_text.insert(tk.END, generated_sql)
-            self.run_sql_query()  # Automatically run the generated query
-        else:
-            messagebox.showerror("Error", "Failed to generate SQL query.")
-
-    def display_result(self, result):
-        """Display query result in the result textbox."""
-        self.result_text.delete("1.0", tk.END)
-        if isinstance(result, list):
-            for row in result:
-                self.result_text.insert(tk.END, str(row) + "\n")
-        else:
-            self.result_text.insert(tk.END, "No result or query failed.")
+        rows = [row if isinstance(row, tuple) else (row,) for row in result]
+        if columns is None:
+            width = max((len(row) for row in rows), default=1)
+            columns = [f"column {i + 1}" for i in range(width)]
+        self.result_grid.set_rows(columns, rows)
 
     def clear_input_output(self):
-        """Clear the input and result text fields."""
+        """Clear the input and result fields."""
         self.query_input_text.delete("1.0", tk.END)
-        self.result_text.delete("1.0", tk.END)
+        self.result_grid.clear()
+
+    def on_close(self):
+        """Cancel the background work and close the database connections before closing the window."""
+        self.worker.shutdown()
+        sqlite_assistant.close_connection_managers()
+        self.root.destroy()
 
 # Animation of a walking goose or cat
 def animate_goose(canvas):
@@ -0,0 +1,42 @@
+# Lets the tests import geo_distance and benchmarks from any working directory, without installing the package,
+# and holds the random-data fixtures the test files share
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+# Tests that start a new Python process need the folder as well
+os.environ['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')]))
+
+@pytest.fixture
+def rng():
+    """A new generator with a fixed seed for every test, so no test depends on which ones ran before it"""
+    return np.random.default_rng(530)
+
+@pytest.fixture
+def random_points(rng):
+    """random_points(n, lat=(-89, 89), lon=(-180, 180)) generates n random [latitude, longitude] points"""
+    def generate(n, lat=(-89, 89), lon=(-180, 180)):
+        return np.column_stack((rng.uniform(*lat, n), rng.uniform(*lon, n)))
+    return generate
+
+@pytest.fixture
+def boston_points(random_points):
+    """boston_points(n) generates n random [latitude, longitude] points around Boston"""
+    return lambda n: random_points(n, lat=(41, 43), lon=(-72, -70))
+
+@pytest.fixture
+def brute_force_distances():
+    """brute_force_distances(point, locations, kernel='cosine') is the distance to every location, one gps_distance call each"""
+    from geo_distance import gps_distance
+
+    def distances(point, locations, kernel='cosine'):
+        point = np.asarray(point, dtype=float).tolist()
+        return np.array([gps_distance(point, loc, kernel=kernel) for loc in np.asarray(locations, dtype=float).tolist()])
+    return distances
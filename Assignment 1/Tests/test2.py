@@ -4,9 +4,9 @@
 # Future Bonus:  Make your output and input configurables…. Pass a CSV or JSON and get the output as a JSON for the user.
 # Why is that?
 
-import pandas as pd
 import json
 from your_main_code_file import gps_distance, decide_min_geodistance, clean_and_filter_data
+from geo_distance import load_datasets
 
 # Load the World Cities dataset (CSV format from GitHub)
 city_dataset_url = "https://raw.githubusercontent.com/joelacus/world-cities/refs/heads/main/world_cities.csv"
@@ -15,11 +15,11 @@ airport_dataset_url = "https://raw.githubusercontent.com/ip2location/ip2location
 def load_data(city_url, airport_url):
     """
     Load the city and airport datasets from the provided URLs.
+    Both are downloaded at the same time and cached on disk, so later runs do not download them again.
     """
     try:
-        cities_df = pd.read_csv(city_url)
-        airports_df = pd.read_csv(airport_url)
-        return cities_df, airports_df
+        data = load_datasets({"cities": city_url, "airports": airport_url})
+        return data["cities"], data["airports"]
     except Exception as e:
         print(f"Error loading data: {e}")
         return None, None
@@ -3,10 +3,10 @@
 # Second Vector:  List of major world airports: 
 # https://github.com/ip2location/ip2location-iata-icao/blob/master/iata-icao.csv
 
-import pandas as pd
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 from your_main_code_file import gps_distance, decide_min_geodistance, clean_and_filter_data
+from geo_distance import load_dataset
 import json
 
 # Google Sheets API authentication
@@ -31,10 +31,10 @@ def load_google_sheet_data(sheet_url, client):
 
 def load_airports_data(airport_url):
     """
-    Load the airports dataset from a CSV URL.
+    Load the airports dataset from a CSV URL (cached on disk after the first download).
     """
     try:
-        airports_df = pd.read_csv(airport_url)
+        airports_df = load_dataset(airport_url)
         return airports_df
     except Exception as e:
         print(f"Error loading airports data: {e}")
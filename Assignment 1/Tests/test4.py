@@ -10,14 +10,15 @@
 import pandas as pd
 import json
 from your_main_code_file import gps_distance, decide_min_geodistance, clean_and_filter_data
+from geo_distance import load_dataset
 
 # Load the airports dataset
 def load_airports_data(airport_url):
     """
-    Load the airports dataset from a CSV URL.
+    Load the airports dataset from a CSV URL (cached on disk after the first download).
     """
     try:
-        airports_df = pd.read_csv(airport_url)
+        airports_df = load_dataset(airport_url)
         return airports_df
     except Exception as e:
         print(f"Error loading airports data: {e}")
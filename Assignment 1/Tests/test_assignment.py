@@ -0,0 +1,100 @@
+# Tests for the capacity-aware assignment (assign_nearest)
+# Small cases are checked against a dense optimal assignment from scipy's linear_sum_assignment
+
+import time
+
+import numpy as np
+import pytest
+from geo_distance import GeoIndex, assign_nearest, gps_distance, match_nearest
+
+pytest.importorskip("scipy")
+from scipy.optimize import linear_sum_assignment
+
+def optimal_assignment(points_a, points_b, capacity, k=None):
+    """(points placed, total distance) of the best assignment, from a dense matrix with every B repeated capacity times
+
+    With k, only each point's k nearest B are allowed, like the candidate edges of assign_nearest.
+    """
+    cost = np.array([[gps_distance(a, b, kernel='haversine') for b in points_b.tolist()] for a in points_a.tolist()])
+    if k is not None:
+        allowed = np.zeros(cost.shape, dtype=bool)
+        np.put_along_axis(allowed, GeoIndex(points_b).query(points_a, k=k)[0], True, axis=1)
+        cost = np.where(allowed, cost, 1e9)
+    rows, cols = linear_sum_assignment(np.repeat(cost, capacity, axis=1))
+    chosen = cost[rows, cols // capacity]
+    return (chosen < 1e9).sum(), chosen[chosen < 1e9].sum()
+
+@pytest.mark.parametrize("n_a, n_b, capacity", [(30, 30, 1), (60, 30, 3)])
+def test_assign_nearest_is_optimal(boston_points, n_a, n_b, capacity):
+    points_a = boston_points(n_a)
+    points_b = boston_points(n_b)
+
+    # With every B offered to every point the result is the true optimum
+    indices, distances = assign_nearest(points_a, points_b, capacity=capacity, k=n_b)
+
+    assert np.all(indices >= 0)
+    assert np.bincount(indices).max() <= capacity
+    assert distances.sum() == pytest.approx(optimal_assignment(points_a, points_b, capacity)[1], rel=1e-6)
+
+def test_assign_nearest_is_optimal_on_candidate_edges(boston_points):
+    points_a = boston_points(60)
+    points_b = boston_points(20)
+
+    # Tight capacity and only 4 candidates per point: the best assignment that uses those edges,
+    # which cannot place every point
+    indices, distances = assign_nearest(points_a, points_b, capacity=3, k=4)
+    placed, total = optimal_assignment(points_a, points_b, 3, k=4)
+
+    assert np.bincount(indices[indices >= 0]).max() <= 3
+    assert (indices >= 0).sum() == placed
+    assert distances[indices >= 0].sum() == pytest.approx(total, rel=1e-6)
+
+def test_assign_nearest_more_points_than_places(boston_points):
+    points_a = boston_points(50)
+    points_b = boston_points(10)
+
+    indices, distances = assign_nearest(points_a, points_b, capacity=2, k=10)
+
+    # Every place is used, and by the points that make the total smallest
+    assert (indices >= 0).sum() == 20
+    assert distances[indices >= 0].sum() == pytest.approx(optimal_assignment(points_a, points_b, 2)[1], rel=1e-6)
+
+def test_assign_nearest_tight_capacity_is_fast(boston_points):
+    points_a = boston_points(5000)
+    points_b = boston_points(1250)
+
+    start = time.process_time()
+    indices, distances = assign_nearest(points_a, points_b, capacity=4)
+    elapsed = time.process_time() - start
+
+    # Exactly as many places as points; this took minutes before the auction
+    assert np.all(indices >= 0)
+    assert np.bincount(indices).max() == 4
+    assert elapsed < 30
+
+def test_assign_nearest_spreads_crowded_points():
+    depots = [[42.36, -71.06], [42.0, -71.5]]
+    requests = [[42.361, -71.061], [42.362, -71.062], [42.363, -71.063]]
+
+    indices, distances = assign_nearest(requests, depots, capacity=2)
+
+    assert sorted(indices.tolist()) == [0, 0, 1]
+    assert (match_nearest(requests, depots)[0] == 0).all()
+
+def test_assign_nearest_leaves_points_unassigned(boston_points):
+    points_a = boston_points(10)
+    points_b = boston_points(3)
+
+    indices, distances = assign_nearest(points_a, points_b, capacity=[2, 0, 3])
+    assert (indices >= 0).sum() == 5
+    assert 1 not in indices
+    assert np.isinf(distances[indices < 0]).all()
+
+    far = assign_nearest([[0.0, 0.0]], points_b, max_radius_km=100)
+    assert far[0].tolist() == [-1]
+
+def test_assign_nearest_rejects_bad_input():
+    with pytest.raises(ValueError):
+        assign_nearest([[0, 0]], [[1, 1]], capacity=-1)
+    with pytest.raises(ValueError):
+        assign_nearest([[0, 0]], np.empty((0, 2)))
@@ -0,0 +1,27 @@
+# Smoke tests for the benchmark suite (tiny sizes, so they run quickly)
+
+import json
+
+import numpy as np
+from benchmarks.compare import compare
+from benchmarks.generators import GENERATORS
+from benchmarks.run_benchmarks import run_suite
+
+def test_generators_make_valid_points(rng):
+    for generate in GENERATORS.values():
+        points = generate(1000, rng)
+        assert points.shape == (1000, 2)
+        assert np.all(np.abs(points[:, 0]) <= 90) and np.all(np.abs(points[:, 1]) <= 180)
+
+def test_run_suite_writes_json_and_compares():
+    report = run_suite(sizes=[50], strategies=["kernel_haversine", "match_nearest", "geo_index"],
+                       candidates=20, repeat=1, log=lambda line: None)
+    report = json.loads(json.dumps(report))
+
+    assert len(report["results"]) == 6  # 3 strategies x 2 distributions
+    row = report["results"][0]
+    assert {"throughput_per_s", "p50_ms", "p95_ms", "p99_ms", "peak_memory_mb"} <= row.keys()
+
+    old = {(r["strategy"], r["distribution"], r["size"]): r for r in report["results"]}
+    new = {key: dict(r, throughput_per_s=r["throughput_per_s"] / 2) for key, r in old.items()}
+    assert all(regression for *_, regression in compare(old, new))
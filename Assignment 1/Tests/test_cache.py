@@ -0,0 +1,85 @@
+# Tests for the LRU lookup cache (NearestCache)
+
+import pytest
+from geo_distance import GeoIndex, GridIndex, NearestCache, PreparedLocations, decide_min_geodistance
+
+@pytest.fixture
+def depots(boston_points):
+    return boston_points(200)
+
+@pytest.mark.parametrize("make_index", [GeoIndex, PreparedLocations, GridIndex, lambda d: d.tolist()])
+def test_cached_answers_match_index(boston_points, depots, make_index):
+    index = make_index(depots)
+    cache = NearestCache(index)
+    uncached = cache.index
+    queries = boston_points(50).round(5)
+
+    for point in list(queries) * 3:
+        assert cache.nearest(point) == uncached.nearest(point)
+
+    assert cache.stats()['misses'] == 50
+    assert cache.stats()['hits'] == 100
+
+@pytest.mark.parametrize("make_index", [GeoIndex, PreparedLocations, GridIndex])
+def test_closest_and_radius_through_cache(depots, make_index):
+    cache = NearestCache(make_index(depots))
+    point = [42.1, -71.3]
+    location, distance = cache.closest(point)
+    assert location == pytest.approx(depots[cache.nearest(point)[0]].tolist())
+    assert cache.closest(point) == (location, distance)
+
+    assert cache.nearest(point, max_radius_km=distance + 1) == cache.index.nearest([42.1, -71.3])
+    assert cache.nearest(point, max_radius_km=distance / 2) == (None, float('inf'))
+    assert decide_min_geodistance(point, cache, max_radius_km=distance / 2) == (None, float('inf'))
+    closest_loc, dist = decide_min_geodistance(point, cache)
+    assert list(closest_loc) == list(location) and dist == pytest.approx(distance)
+
+def test_changing_a_result_does_not_change_the_cache(depots):
+    cache = NearestCache(PreparedLocations(depots.tolist()))
+    location, distance = cache.closest([42.1, -71.3])
+    expected = list(location)
+    location[0] = 0.0
+    assert cache.closest([42.1, -71.3]) == (expected, distance)
+    cache.closest([42.1, -71.3])[0].append(1.0)
+    assert cache.closest([42.1, -71.3]) == (expected, distance)
+
+def test_rounding_shares_entries(depots):
+    cache = NearestCache(PreparedLocations(depots.tolist()), precision=3)
+    cache.nearest([42.10001, -71.20002])
+    cache.nearest([42.09999, -71.19998])
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Different radii are different lookups
+    cache.nearest([42.1, -71.2], max_radius_km=1)
+    assert cache.misses == 2
+
+def test_lru_eviction(depots):
+    cache = NearestCache(GeoIndex(depots), maxsize=2)
+    cache.nearest([42, -71])
+    cache.nearest([42.5, -71])
+    cache.nearest([42, -71])          # Refreshes the first entry
+    cache.nearest([41.5, -71])        # Evicts [42.5, -71], the least recently used
+    cache.nearest([42, -71])
+
+    stats = cache.stats()
+    assert stats['size'] == 2 and stats['evictions'] == 1
+    assert (stats['hits'], stats['misses']) == (2, 3)
+
+def test_invalidated_when_grid_changes():
+    fleet = GridIndex(cell_size_deg=0.5)
+    fleet.insert("truck-1", [42.0, -71.0])
+    cache = NearestCache(fleet)
+
+    assert cache.nearest([42.1, -71.1])[0] == "truck-1"
+    fleet.insert("truck-2", [42.1, -71.1])
+    assert cache.nearest([42.1, -71.1]) == ("truck-2", 0.0)
+    assert cache.closest([42.1, -71.1], max_radius_km=5)[0] == [42.1, -71.1]
+    assert decide_min_geodistance([42.1, -71.1], cache)[0] == [42.1, -71.1]
+
+    fleet.remove("truck-2")
+    assert cache.nearest([42.1, -71.1])[0] == "truck-1"
+    assert cache.invalidations == 2
+
+def test_rejects_bad_size(depots):
+    with pytest.raises(ValueError):
+        NearestCache(depots.tolist(), maxsize=0)
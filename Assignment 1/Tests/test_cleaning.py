@@ -0,0 +1,49 @@
+# Tests for the columnar cleaning stage (clean_coordinates_frame)
+# Covers the input problems listed in test5.py: missing cells, extra characters, mixed units, non-number input
+
+import numpy as np
+import pandas as pd
+import pytest
+from geo_distance import clean_coordinates_frame
+from geo_distance.geo_calculations import clean_and_filter_data
+
+def test_numeric_frame_range_and_nan_checks():
+    df = pd.DataFrame({
+        "latitude": [42.35, 91.0, np.nan, -33.86],
+        "longitude": [-71.1, 0.0, 10.0, 181.0],
+    })
+    clean, report = clean_coordinates_frame(df)
+
+    assert clean["latitude"].tolist() == [42.35]
+    assert report["rows"] == 4 and report["valid"] == 1
+    assert report["rejected"] == {"missing": 1, "unparseable": 0, "out_of_range": 2}
+    assert report["rejected_index"].tolist() == [1, 2, 3]
+
+def test_text_with_hemisphere_letters_and_dms():
+    df = pd.DataFrame({
+        "Latitude": ["42.3492 N", "33°52'4\"S", "S 33 52 4", " 40.7128", "-12.5 N"],
+        "Longitude": ["71.1058W", "151°12'26\"E", "151 12 26 E", "-74.0060", "W 12.5"],
+    })
+    clean, report = clean_coordinates_frame(df, "Latitude", "Longitude")
+
+    assert report["valid"] == 4
+    assert report["rejected"]["unparseable"] == 1  # minus sign together with a hemisphere letter
+    assert clean["Latitude"].tolist() == pytest.approx([42.3492, -33.867778, -33.867778, 40.7128], rel=1e-6)
+    assert clean["Longitude"].tolist() == pytest.approx([-71.1058, 151.207222, 151.207222, -74.006], rel=1e-6)
+
+def test_rejects_non_numbers_and_wrong_axis_letters():
+    data = [["abc", "10"], ["10 E", "10"], ["10", "20 N"], ["", "5"], ["10 61 0", "5"], ["10", "5"]]
+    clean, report = clean_coordinates_frame(data)
+
+    assert clean[["latitude", "longitude"]].to_numpy().tolist() == [[10.0, 5.0]]
+    assert report["rejected"] == {"missing": 1, "unparseable": 4, "out_of_range": 0}
+
+def test_rejects_bad_shape():
+    with pytest.raises(ValueError):
+        clean_coordinates_frame([[1, 2, 3]])
+
+def test_clean_and_filter_data_summarises_skipped_rows(capsys):
+    data = [[42.35, -71.1], [91.0, 0.0], [float("nan"), 1.0]]
+
+    assert clean_and_filter_data(data) == [[42.35, -71.1]]
+    assert capsys.readouterr().out == "Skipped 2 invalid coordinates out of 3\n"
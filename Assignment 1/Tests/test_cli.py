@@ -0,0 +1,40 @@
+# Tests for the geo-distance command-line tool
+
+import pandas as pd
+from geo_distance.cli import main
+
+def write_files(tmp_path):
+    pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "latitude": [42.3736, 40.6782, 34.1478, 95.0],
+        "longitude": [-71.1097, -73.9442, -118.1445, 0.0],
+    }).to_csv(tmp_path / "requests.csv", index=False)
+    pd.DataFrame({
+        "name": ["Boston", "New York", "Los Angeles"],
+        "lat": [42.3601, 40.7128, 34.0522],
+        "lon": [-71.0589, -74.0060, -118.2437],
+    }).to_csv(tmp_path / "depots.csv", index=False)
+
+def test_cli_matches_and_reports(tmp_path, capsys):
+    write_files(tmp_path)
+    output = tmp_path / "out.csv"
+
+    code = main([str(tmp_path / "requests.csv"), str(tmp_path / "depots.csv"), "-o", str(output),
+                 "--candidate-lat-col", "lat", "--candidate-lon-col", "lon", "--candidate-id-col", "name",
+                 "--kernel", "vincenty", "--max-radius-km", "50"])
+
+    assert code == 0
+    result = pd.read_csv(output)
+    assert result["id"].tolist() == [1, 2, 3]
+    assert result["nearest_id"].tolist() == ["Boston", "New York", "Los Angeles"]
+    out = capsys.readouterr().out
+    assert "Rows read: 4, matched: 3, unmatched: 0, rejected: 1" in out
+    assert "rows/sec" in out and "Peak memory" in out
+
+def test_cli_missing_column(tmp_path, capsys):
+    write_files(tmp_path)
+
+    code = main([str(tmp_path / "requests.csv"), str(tmp_path / "depots.csv"), "-o", str(tmp_path / "out.csv")])
+
+    assert code == 1
+    assert "Error" in capsys.readouterr().out
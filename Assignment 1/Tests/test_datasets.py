@@ -0,0 +1,99 @@
+# Tests for the cached dataset loader, against a local HTTP server and file:// URLs (no network needed)
+
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from geo_distance import datasets, load_dataset, load_datasets
+
+FILES = {
+    "/airports.csv": b"iata,latitude,longitude\nBOS,42.3656,-71.0096\nJFK,40.6413,-73.7781\n",
+    "/cities.csv": b"city,latitude,longitude\nBoston,42.3601,-71.0589\n",
+}
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves FILES with an ETag and answers 304 when If-None-Match matches"""
+    requests = []
+
+    def do_GET(self):
+        body = FILES.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        not_modified = self.headers.get("If-None-Match") == etag
+        Handler.requests.append((self.path, 304 if not_modified else 200))
+        self.send_response(304 if not_modified else 200)
+        self.send_header("ETag", etag)
+        self.end_headers()
+        if not not_modified:
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    Handler.requests = []
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_cache_and_etag_revalidation(server, tmp_path, monkeypatch):
+    url = server + "/airports.csv"
+
+    df = load_dataset(url, cache=tmp_path)
+    assert df["iata"].tolist() == ["BOS", "JFK"]
+    assert Handler.requests == [("/airports.csv", 200)]
+
+    # A fresh cache entry is served without any request
+    assert load_dataset(url, cache=tmp_path).equals(df)
+    assert len(Handler.requests) == 1
+
+    # A stale entry is revalidated and the server answers 304
+    assert load_dataset(url, cache=tmp_path, max_age=0).equals(df)
+    assert Handler.requests[-1] == ("/airports.csv", 304)
+
+    # Changed content is downloaded and parsed again
+    monkeypatch.setitem(FILES, "/airports.csv", FILES["/airports.csv"] + b"LAX,33.9416,-118.4085\n")
+    assert len(load_dataset(url, cache=tmp_path, refresh=True)) == 3
+    assert Handler.requests[-1] == ("/airports.csv", 200)
+
+def test_load_datasets_in_parallel(server, tmp_path):
+    pytest.importorskip("pyarrow")
+    urls = {"airports": server + "/airports.csv", "cities": server + "/cities.csv"}
+
+    data = load_datasets(urls, cache=tmp_path)
+
+    assert set(data) == {"airports", "cities"}
+    assert data["cities"]["city"].tolist() == ["Boston"]
+    assert sorted(path for path, _ in Handler.requests) == ["/airports.csv", "/cities.csv"]
+    assert len(list(tmp_path.glob("*.parquet"))) == 2
+
+def test_file_url_and_read_csv_options(tmp_path):
+    csv_path = tmp_path / "cities.csv"
+    csv_path.write_bytes(FILES["/cities.csv"])
+    cache = tmp_path / "cache"
+
+    df = load_dataset(Path(csv_path).as_uri(), cache=cache, usecols=["latitude", "longitude"])
+    assert list(df.columns) == ["latitude", "longitude"]
+    assert list(load_dataset(Path(csv_path).as_uri(), cache=False).columns) == ["city", "latitude", "longitude"]
+
+def test_csv_cache_without_pyarrow(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(datasets, "_cache_suffix", lambda: ".csv")
+    url = server + "/airports.csv"
+
+    df = load_dataset(url, cache=tmp_path)
+    assert load_dataset(url, cache=tmp_path, max_age=0).equals(df)
+    assert Handler.requests == [("/airports.csv", 200), ("/airports.csv", 304)]
+    assert [p.read_bytes() for p in tmp_path.glob("*.csv")] == [FILES["/airports.csv"]]
+    assert list(tmp_path.glob("*.parquet")) == []
+
+def test_missing_file_raises(server, tmp_path):
+    with pytest.raises(OSError):
+        load_dataset(server + "/missing.csv", cache=tmp_path)
@@ -0,0 +1,47 @@
+# Tests for the tiled distance matrix builder
+
+import numpy as np
+import pytest
+from geo_distance import distance_matrix, gps_distance
+
+@pytest.mark.parametrize("kernel", ["haversine", "cosine", "vincenty"])
+def test_matrix_matches_gps_distance(random_points, kernel):
+    points_a = random_points(23)
+    points_b = random_points(17)
+
+    matrix = distance_matrix(points_a, points_b, kernel=kernel, block_size=5, workers=2)
+
+    expected = [[gps_distance(a, b, kernel=kernel) for b in points_b.tolist()] for a in points_a.tolist()]
+    assert matrix.shape == (23, 17)
+    assert np.allclose(matrix, expected, rtol=1e-6, atol=1e-4)
+
+def test_matrix_exact_at_short_range():
+    # Points a few metres apart, where 2 - 2 a.b would lose most of its digits
+    points_a = np.array([[42.35, -71.06], [-33.86, 151.21]])
+    points_b = points_a + [[1e-5, 2e-5], [3e-5, -1e-5]]
+
+    matrix = distance_matrix(points_a, points_b)
+
+    expected = [gps_distance(a, b, kernel="haversine") for a, b in zip(points_a.tolist(), points_b.tolist())]
+    assert np.diag(matrix) == pytest.approx(expected, rel=1e-9)
+
+def test_matrix_written_to_npy_file(random_points, tmp_path):
+    points_a = random_points(40)
+    points_b = random_points(30)
+    path = tmp_path / "matrix.npy"
+    calls = []
+
+    matrix = distance_matrix(points_a, points_b, dtype=np.float32, path=path, block_size=16,
+                             progress=lambda done, total: calls.append((done, total)))
+
+    assert isinstance(matrix, np.memmap)
+    assert calls == [(16, 40), (32, 40), (40, 40)]
+    stored = np.load(path, mmap_mode='r')
+    assert stored.dtype == np.float32 and stored.shape == (40, 30)
+    assert np.allclose(stored, distance_matrix(points_a, points_b), rtol=1e-6)
+
+def test_matrix_rejects_bad_input():
+    with pytest.raises(ValueError):
+        distance_matrix([[0, 0]], [[1, 1]], kernel="manhattan")
+    with pytest.raises(ValueError):
+        distance_matrix([[0, 0]], [[1, 1]], workers=0)
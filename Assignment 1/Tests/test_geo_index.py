@@ -0,0 +1,83 @@
+# Tests for the GeoIndex spatial index
+# Results are checked against a brute-force search with match_nearest / gps_distance
+
+import numpy as np
+import pytest
+from geo_distance import GeoIndex, GridIndex, PreparedLocations, decide_min_geodistance, gps_distance, match_nearest
+
+@pytest.fixture
+def airports(random_points):
+    return random_points(2000, lat=(-90, 90))
+
+@pytest.fixture
+def index(airports):
+    return GeoIndex(airports, leaf_size=8)
+
+def test_nearest_matches_brute_force(random_points, airports, index):
+    queries = random_points(100)
+    indices, distances = index.query(queries)
+    expected_idx, expected_dist = match_nearest(queries, airports)
+
+    assert indices.tolist() == expected_idx.tolist()
+    assert np.allclose(distances, expected_dist)
+
+def test_k_nearest_is_sorted_and_correct(brute_force_distances, airports, index):
+    point = [42.349220, -71.105751]
+    indices, distances = index.k_nearest(point, 5)
+
+    expected = np.argsort(brute_force_distances(point, airports))[:5]
+    assert indices.tolist() == expected.tolist()
+    assert np.all(np.diff(distances) >= 0)
+
+def test_query_k_matches_k_nearest(random_points, index):
+    queries = random_points(200)
+    indices, distances = index.query(queries, k=7)
+
+    assert indices.shape == distances.shape == (200, 7)
+    for point, row_idx, row_dist in zip(queries, indices, distances):
+        expected_idx, expected_dist = index.k_nearest(point, 7)
+        assert row_idx.tolist() == expected_idx.tolist()
+        assert np.allclose(row_dist, expected_dist)
+
+def test_within_radius_matches_brute_force(brute_force_distances, airports, index):
+    point = [10.0, 20.0]
+    indices, distances = index.within_radius(point, 1500)
+
+    all_distances = brute_force_distances(point, airports)
+    assert sorted(indices.tolist()) == np.nonzero(all_distances <= 1500)[0].tolist()
+    assert np.all(distances <= 1500 + 1e-6)
+
+def test_within_radius_empty_result():
+    small = GeoIndex([[0, 0], [0, 1]])
+    indices, distances = small.within_radius([45, 45], 10)
+
+    assert len(indices) == 0 and len(distances) == 0
+
+def test_decide_min_geodistance_with_index(random_points):
+    locations = random_points(300)
+    index = GeoIndex(locations)
+    point = [42.35, -71.1]
+    closest_loc, dist = decide_min_geodistance(point, index)
+    assert closest_loc == locations[index.nearest(point)[0]].tolist()
+    assert dist == pytest.approx(gps_distance(point, closest_loc, kernel="haversine"))
+    assert decide_min_geodistance(point, index, max_radius_km=dist / 2) == (None, float('inf'))
+
+def test_decide_min_geodistance_same_distance_for_every_form(random_points):
+    locations = random_points(300)
+    point = [42.35, -71.1]
+    expected = decide_min_geodistance(point, locations.tolist())
+
+    for prepared in (GeoIndex(locations), PreparedLocations(locations.tolist()), GridIndex(locations.tolist())):
+        closest_loc, dist = decide_min_geodistance(point, prepared)
+        assert list(closest_loc) == pytest.approx(expected[0])
+        assert dist == expected[1]
+
+def test_k_larger_than_index():
+    small = GeoIndex([[0, 0], [0, 1], [0, 2]])
+    indices, _ = small.k_nearest([0, 0.9], 10)
+
+    assert indices.tolist() == [1, 0, 2]
+
+def test_empty_index_rejected():
+    with pytest.raises(ValueError):
+        GeoIndex(np.empty((0, 2)))
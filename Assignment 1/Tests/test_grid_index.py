@@ -0,0 +1,67 @@
+# Tests for the mutable GridIndex
+
+import pytest
+from geo_distance import GridIndex, decide_min_geodistance, gps_distance
+
+def test_nearest_matches_brute_force_everywhere(random_points, brute_force_distances):
+    points = random_points(3000, lat=(-90, 90)).tolist()
+    grid = GridIndex(points, cell_size_deg=2.0)
+
+    # Include queries near the poles and the 180th meridian
+    queries = random_points(200, lat=(-90, 90)).tolist() + [[89.9, 0], [-89.9, 45], [0, 179.99], [10, -180]]
+    for q in queries:
+        key, dist = grid.nearest(q)
+        expected = brute_force_distances(q, points, kernel="haversine")
+        assert dist == pytest.approx(expected.min())
+        assert key == expected.argmin()
+
+def test_cell_size_that_does_not_divide_360(random_points, brute_force_distances):
+    # With 7 degree cells the columns are 360 / 52 degrees wide, so no column is narrower than the others
+    grid = GridIndex({"west": [0, 176.8], "east": [0, -173.0]}, cell_size_deg=7)
+    key, dist = grid.nearest([0, -179.9])
+    assert key == "west"
+    assert dist == pytest.approx(gps_distance([0, -179.9], [0, 176.8], kernel="haversine"))
+
+    points = random_points(500, lat=(-90, 90)).tolist()
+    queries = [[lat, lon] for lat in (-60, 0, 45) for lon in (-179.99, -178, 177.5, 179.99)]
+    for cell_size in (7, 11, 13.5, 25):
+        grid = GridIndex(points, cell_size_deg=cell_size)
+        for q in queries:
+            expected = brute_force_distances(q, points, kernel="haversine")
+            assert grid.nearest(q) == pytest.approx((expected.argmin(), expected.min()))
+
+def test_insert_move_remove():
+    grid = GridIndex(cell_size_deg=0.5)
+    grid.insert("truck-1", [42.35, -71.06])
+    grid.insert("truck-2", [40.71, -74.00])
+    assert len(grid) == 2 and grid.version == 2
+
+    assert grid.nearest([42.0, -71.0])[0] == "truck-1"
+    grid.insert("truck-1", [34.05, -118.24])  # moved
+    assert grid.nearest([42.0, -71.0])[0] == "truck-2"
+    assert grid["truck-1"] == [34.05, -118.24]
+
+    grid.remove("truck-2")
+    assert "truck-2" not in grid
+    assert grid.nearest([42.0, -71.0])[0] == "truck-1"
+    with pytest.raises(KeyError):
+        grid.remove("truck-2")
+
+def test_sparse_and_empty_grid():
+    assert GridIndex().nearest([0, 0]) == (None, float("inf"))
+
+    grid = GridIndex({"a": [-45.0, 170.0]}, cell_size_deg=0.1)
+    key, dist = grid.nearest([45.0, -10.0])
+    assert key == "a"
+    assert dist == pytest.approx(gps_distance([45.0, -10.0], [-45.0, 170.0], kernel="haversine"))
+
+def test_radius_and_decide_min_geodistance():
+    grid = GridIndex([[42.35, -71.06], [40.71, -74.00]])
+
+    assert grid.nearest([10.0, 10.0], max_radius_km=500) == (None, float("inf"))
+    closest, dist = decide_min_geodistance([42.0, -71.0], grid)
+    assert closest == [42.35, -71.06]
+
+def test_invalid_coordinate():
+    with pytest.raises(ValueError):
+        GridIndex().insert(1, [95, 0])
@@ -0,0 +1,51 @@
+# Tests for the distance kernels (cosine, haversine, vincenty)
+
+import numpy as np
+import pytest
+from geo_distance import gps_distance, match_nearest
+from geo_distance.kernels import KERNELS, get_kernel
+
+# Classic Vincenty test case: Flinders Peak to Buninyong, 54972.271 m
+flinders_peak = [-(37 + 57 / 60 + 3.72030 / 3600), 144 + 25 / 60 + 29.52440 / 3600]
+buninyong = [-(37 + 39 / 60 + 10.15610 / 3600), 143 + 55 / 60 + 35.38390 / 3600]
+
+
+def test_vincenty_reference_distance():
+    assert gps_distance(flinders_peak, buninyong, kernel="vincenty") == pytest.approx(54.972271, abs=1e-6)
+
+def test_spherical_kernels_agree():
+    boston, new_york = [42.3601, -71.0589], [40.7128, -74.0060]
+    assert gps_distance(boston, new_york, kernel="haversine") == pytest.approx(gps_distance(boston, new_york), rel=1e-9)
+
+def test_same_point_is_zero_not_inf():
+    point = [42.349220, -71.105751]
+    for name in KERNELS:
+        assert gps_distance(point, point, kernel=name) == pytest.approx(0.0, abs=1e-6)
+
+def test_haversine_precise_for_close_points():
+    # Two points 1 m apart along a meridian
+    a = [42.0, -71.0]
+    b = [42.0 + 0.001 / 6378 * 180 / np.pi, -71.0]
+    assert gps_distance(a, b, kernel="haversine") == pytest.approx(0.001, rel=1e-6)
+
+@pytest.mark.parametrize("name", list(KERNELS))
+def test_vectorized_matches_scalar(random_points, name):
+    points_a, points_b = random_points(200), random_points(200)
+    scalar, vector = get_kernel(name), get_kernel(name, vectorized=True)
+    result = vector(points_a[:, 0], points_a[:, 1], points_b[:, 0], points_b[:, 1])
+    expected = [scalar(a, b) for a, b in zip(points_a.tolist(), points_b.tolist())]
+    assert np.allclose(result, expected, rtol=1e-9, atol=1e-9)
+
+def test_vincenty_antipodal_falls_back():
+    assert np.isfinite(gps_distance([0, 0], [0.5, 179.7], kernel="vincenty"))
+    assert np.isfinite(get_kernel("vincenty", vectorized=True)(0.0, 0.0, 0.5, 179.7))
+
+def test_match_nearest_kernel_distances(random_points):
+    points_a, points_b = random_points(200), random_points(200)
+    indices, distances = match_nearest(points_a, points_b, kernel="vincenty")
+    vincenty = get_kernel("vincenty")
+    assert distances[0] == pytest.approx(vincenty(points_a[0], points_b[indices[0]]))
+
+def test_unknown_kernel():
+    with pytest.raises(ValueError):
+        gps_distance([0, 0], [1, 1], kernel="flat")
@@ -0,0 +1,17 @@
+# Checks that `import geo_distance` stays light: no pandas until a pandas-based helper is used
+
+import subprocess
+import sys
+
+from benchmarks.bench_import import measure_import
+
+def test_import_does_not_load_pandas():
+    _, loaded = measure_import("geo_distance", runs=1)
+    assert loaded == []
+
+def test_lazy_helpers_still_importable():
+    code = ("import sys, geo_distance; "
+            "from geo_distance import stream_match_csv, clean_coordinates_frame, parallel_match_nearest; "
+            "assert 'pandas' in sys.modules; "
+            "assert 'stream_match_csv' in dir(geo_distance)")
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,96 @@
+# Tests for the bulk matcher (match_nearest)
+# Compares the vectorized results against the scalar gps_distance / decide_min_geodistance functions
+
+import numpy as np
+import pytest
+from geo_distance import (gps_distance, decide_min_geodistance, match_nearest, match_k_nearest,
+                          match_all_within_radius, parallel_match_nearest)
+
+def test_match_nearest_agrees_with_scalar_search(random_points):
+    points_a = random_points(50)
+    points_b = random_points(300)
+
+    indices, distances = match_nearest(points_a, points_b, block_size=16)
+
+    for i, point in enumerate(points_a):
+        closest_loc, dist = decide_min_geodistance(point.tolist(), points_b.tolist())
+        assert points_b[indices[i]].tolist() == closest_loc
+        assert distances[i] == pytest.approx(dist, rel=1e-6)
+
+def test_match_nearest_exact_match_has_zero_distance(random_points):
+    points_b = random_points(20)
+    indices, distances = match_nearest(points_b[[3, 7]], points_b)
+
+    assert indices.tolist() == [3, 7]
+    assert np.allclose(distances, 0.0)
+
+def test_match_nearest_accepts_lists():
+    boston = [42.349220, -71.105751]
+    cities = [[40.7128, -74.0060], [34.0522, -118.2437], [41.8240, -71.4128]]
+
+    indices, distances = match_nearest([boston], cities)
+
+    assert indices.tolist() == [2]
+    assert distances[0] == pytest.approx(gps_distance(boston, cities[2]), rel=1e-6)
+
+def test_match_nearest_rejects_bad_input():
+    with pytest.raises(ValueError):
+        match_nearest([[1, 2, 3]], [[0, 0]])
+    with pytest.raises(ValueError):
+        match_nearest([[1, 2]], np.empty((0, 2)))
+
+def test_parallel_match_nearest_agrees_with_match_nearest(random_points):
+    points_a = random_points(1000)
+    points_b = random_points(200)
+
+    indices, distances = parallel_match_nearest(points_a, points_b, workers=2, chunk_size=150)
+    expected_idx, expected_dist = match_nearest(points_a, points_b)
+
+    assert indices.tolist() == expected_idx.tolist()
+    assert np.allclose(distances, expected_dist)
+
+def test_match_k_nearest_agrees_with_full_sort(random_points, brute_force_distances):
+    points_a = random_points(40)
+    points_b = random_points(500)
+
+    indices, distances = match_k_nearest(points_a, points_b, k=5, block_size=64)
+
+    assert indices.shape == distances.shape == (40, 5)
+    for i, point in enumerate(points_a):
+        all_dist = brute_force_distances(point, points_b)
+        assert indices[i].tolist() == np.argsort(all_dist)[:5].tolist()
+        assert np.allclose(distances[i], np.sort(all_dist)[:5], rtol=1e-5)
+    assert np.array_equal(indices[:, 0], match_nearest(points_a, points_b)[0])
+
+def test_match_k_nearest_with_fewer_candidates_than_k(random_points):
+    indices, distances = match_k_nearest(random_points(3), random_points(4), k=10, kernel='vincenty')
+    assert indices.shape == (3, 4)
+    assert np.all(np.diff(distances, axis=1) >= -1e-6)
+
+def test_match_all_within_radius_agrees_with_brute_force(random_points, brute_force_distances):
+    points_a = random_points(60)
+    points_b = random_points(2000)
+    radius = 1500
+
+    offsets, indices, distances = match_all_within_radius(points_a, points_b, radius, block_size=32)
+
+    assert offsets[0] == 0 and offsets[-1] == len(indices) == len(distances)
+    for i, point in enumerate(points_a):
+        all_dist = brute_force_distances(point, points_b)
+        found = indices[offsets[i]:offsets[i + 1]]
+        expected = np.flatnonzero(all_dist <= radius)
+        assert sorted(found.tolist()) == sorted(expected.tolist())
+        assert np.all(np.diff(distances[offsets[i]:offsets[i + 1]]) >= 0)
+
+def test_match_all_within_radius_with_no_hits():
+    offsets, indices, distances = match_all_within_radius([[0, 0], [10, 10]], [[50, 50]], 100)
+    assert offsets.tolist() == [0, 0, 0]
+    assert len(indices) == len(distances) == 0
+
+def test_empty_input_gives_empty_results():
+    indices, distances = match_nearest([], [[50, 50]])
+    assert indices.shape == distances.shape == (0,)
+    offsets, indices, _ = match_all_within_radius([], [[50, 50]], 100)
+    assert offsets.tolist() == [0] and len(indices) == 0
+    with pytest.raises(ValueError):
+        match_nearest([[0, 0]], [])
@@ -0,0 +1,51 @@
+# Tests for the columnar PointSet and its memory-mapped file format
+
+import numpy as np
+import pytest
+from geo_distance import GeoIndex, PointSet, match_nearest
+
+@pytest.fixture
+def points(random_points):
+    return random_points(1000, lat=(-90, 90))
+
+@pytest.mark.parametrize("ids", [None, np.arange(1000, 2000), np.array([f"depot-{i}" for i in range(1000)])])
+def test_save_and_memory_map(points, tmp_path, ids):
+    path = tmp_path / "depots.pts"
+    PointSet.from_points(points, ids=ids).save(path)
+
+    loaded = PointSet.load(path)
+    assert isinstance(loaded.lat, np.memmap)
+    assert np.array_equal(loaded.points, points)
+    if ids is None:
+        assert loaded.ids is None
+    else:
+        assert np.array_equal(loaded.ids, ids)
+
+    copy = PointSet.load(path, mmap=False)
+    assert not isinstance(copy.lat, np.memmap)
+    assert np.array_equal(copy.points, points)
+
+def test_float32_is_compact(points):
+    compact = PointSet.from_points(points, dtype=np.float32)
+    assert compact.nbytes == 8 * len(points)
+    assert np.allclose(compact.points, points, atol=1e-4)
+
+def test_pointset_works_as_candidates(rng, points, tmp_path):
+    path = tmp_path / "depots.pts"
+    PointSet.from_points(points).save(path)
+    depots = PointSet.load(path)
+    queries = rng.uniform(-60, 60, (50, 2))
+
+    expected = match_nearest(queries, points)
+    assert np.array_equal(match_nearest(queries, depots)[0], expected[0])
+    assert np.array_equal(GeoIndex(depots).query(queries)[0], expected[0])
+
+def test_rejects_bad_input(tmp_path):
+    with pytest.raises(ValueError):
+        PointSet([1, 2], [1])
+    with pytest.raises(ValueError):
+        PointSet([1], [1], ids=[object()])
+    bad = tmp_path / "bad.pts"
+    bad.write_bytes(b"not a point set")
+    with pytest.raises(ValueError):
+        PointSet.load(bad)
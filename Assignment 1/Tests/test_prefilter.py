@@ -0,0 +1,44 @@
+# Tests for the max-radius mode and the bounding-box prefilter
+
+import numpy as np
+import pytest
+from geo_distance import PreparedLocations, decide_min_geodistance, match_nearest
+from geo_distance.prefilter import bounding_box, in_bounding_box
+
+@pytest.fixture
+def depots(boston_points):
+    """Dense regional candidates around Boston, plus a few far away"""
+    return np.vstack((boston_points(500), [[51.5, -0.12], [-33.9, 151.2], [0.0, 179.9]]))
+
+def test_bounding_box_contains_circle(random_points, brute_force_distances):
+    for center in ([42.35, -71.1], [0.0, 179.9], [-60.0, -179.5], [88.0, 10.0]):
+        box = bounding_box(center, 500)
+        points = random_points(20000, lat=(-90, 90))
+        near = brute_force_distances(center, points, kernel="haversine") <= 500
+        assert in_bounding_box(points[:, 0], points[:, 1], box)[near].all()
+
+def test_bounding_box_wraps_antimeridian():
+    box = bounding_box([0.0, 179.9], 100)
+    assert box[2] > box[3]
+    assert in_bounding_box(0.0, -179.9, box)
+    assert not in_bounding_box(0.0, 0.0, box)
+
+def test_decide_min_geodistance_with_radius(depots):
+    point = [42.35, -71.1]
+    candidates = depots.tolist()
+
+    assert decide_min_geodistance(point, candidates, max_radius_km=50) == decide_min_geodistance(point, candidates)
+    assert decide_min_geodistance([10.0, 10.0], candidates, max_radius_km=50) == (None, float("inf"))
+    assert decide_min_geodistance([10.0, 10.0], PreparedLocations(candidates), max_radius_km=50) == (None, float("inf"))
+
+def test_match_nearest_with_radius(rng, depots):
+    points = np.vstack((rng.uniform([41.5, -71.5], [42.5, -70.5], (300, 2)), [[10.0, 10.0], [0.0, -179.95]]))
+    indices, distances = match_nearest(points, depots, block_size=64, max_radius_km=30)
+    expected_idx, expected_dist = match_nearest(points, depots)
+
+    assert indices[:300].tolist() == expected_idx[:300].tolist()
+    assert np.allclose(distances[:300], expected_dist[:300])
+    assert indices[300] == -1 and distances[300] == np.inf
+    # Across the 180th meridian from the [0, 179.9] depot
+    assert indices[301] == len(depots) - 1
+    assert distances[301] == pytest.approx(expected_dist[301])
@@ -0,0 +1,29 @@
+# Tests for PreparedLocations (candidate set with precomputed unit vectors)
+
+import pytest
+from geo_distance import PreparedLocations, decide_min_geodistance
+
+@pytest.fixture
+def airports(random_points):
+    return random_points(500, lat=(-90, 90)).tolist()
+
+@pytest.fixture
+def prepared(airports):
+    return PreparedLocations(airports)
+
+def test_prepared_matches_plain_list(rng, airports, prepared):
+    for point in rng.uniform(-60, 60, (20, 2)).tolist():
+        expected_loc, expected_dist = decide_min_geodistance(point, airports)
+        closest_loc, dist = decide_min_geodistance(point, prepared)
+
+        assert closest_loc == expected_loc
+        assert dist == pytest.approx(expected_dist, rel=1e-6)
+
+def test_prepared_nearest_returns_index(airports, prepared):
+    idx, dist = prepared.nearest(airports[42])
+
+    assert idx == 42
+    assert dist == pytest.approx(0.0, abs=1e-6)
+
+def test_prepared_empty_list():
+    assert PreparedLocations([]).closest([0, 0]) == (None, float("inf"))
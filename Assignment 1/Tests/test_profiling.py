@@ -0,0 +1,61 @@
+# Tests for the opt-in profiling hooks
+
+import pandas as pd
+import pytest
+from geo_distance import GeoIndex, Profiler, decide_min_geodistance, match_nearest, profile, stream_match_csv
+from geo_distance.geo_calculations import test_with_csv as run_csv_lookup
+
+@pytest.fixture
+def depots(boston_points):
+    return boston_points(50)
+
+def test_nothing_is_recorded_without_profile(depots):
+    profiler = Profiler()
+    match_nearest(depots[:5], depots)
+    assert profiler.summary() == {'stages': {}, 'counters': {}}
+
+def test_stream_stages_and_counters(depots, tmp_path):
+    input_path = tmp_path / "requests.csv"
+    pd.DataFrame({'latitude': [42.1, 'bad', 42.3, 95.0], 'longitude': [-71.1, -71.2, -71.3, -71.4]}).to_csv(input_path, index=False)
+
+    with profile() as prof:
+        stream_match_csv(input_path, depots, tmp_path / "out.csv", chunk_size=2)
+
+    summary = prof.summary()
+    assert {'read', 'clean', 'match', 'write'} <= set(summary['stages'])
+    assert summary['stages']['clean']['calls'] == 2
+    assert summary['counters']['rows_read'] == 4
+    assert summary['counters']['rows_rejected'] == 2
+    assert summary['counters']['distance_evaluations'] == 2 * len(depots)
+
+def test_index_and_scalar_counters(depots, tmp_path):
+    with profile() as prof:
+        index = GeoIndex(depots, leaf_size=4)
+        index.nearest([42, -71])
+        decide_min_geodistance([42, -71], depots.tolist())
+
+    counters = prof.summary()['counters']
+    assert prof.summary()['stages']['index_build']['calls'] == 1
+    assert counters['index_nodes_visited'] > 0
+    assert counters['distance_evaluations'] >= len(depots)
+
+    csv_path = tmp_path / "places.csv"
+    pd.DataFrame({'latitude': [42.0, 200.0], 'longitude': [-71.0, -71.0]}).to_csv(csv_path, index=False)
+    with profile() as prof:
+        run_csv_lookup(csv_path, [42.1, -71.1])
+    assert prof.summary()['counters'] == {'rows_read': 2, 'rows_rejected': 1, 'distance_evaluations': 1}
+
+def test_prometheus_export_and_nesting(depots):
+    outer = Profiler()
+    with profile(outer):
+        with profile() as inner:
+            match_nearest(depots[:3], depots)
+        match_nearest(depots[:2], depots)
+
+    assert inner.counters['distance_evaluations'] == 3 * len(depots)
+    assert outer.counters['distance_evaluations'] == 2 * len(depots)
+
+    text = outer.to_prometheus()
+    assert '# TYPE geo_distance_stage_seconds_total counter' in text
+    assert 'geo_distance_stage_calls_total{stage="match"} 1' in text
+    assert f'geo_distance_distance_evaluations_total {2 * len(depots)}' in text
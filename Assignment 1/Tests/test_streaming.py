@@ -0,0 +1,63 @@
+# Tests for the streaming CSV matcher (stream_match_csv)
+# Uses small CSV files written to a temporary folder
+
+import numpy as np
+import pandas as pd
+import pytest
+from geo_distance import GeoIndex, match_nearest, stream_match_csv
+
+depots = [[42.3601, -71.0589], [40.7128, -74.0060], [34.0522, -118.2437]]
+
+def write_input(path):
+    df = pd.DataFrame({
+        "name": ["Cambridge", "Brooklyn", "bad lat", "Pasadena", "missing", "text"],
+        "latitude": [42.3736, 40.6782, 123.0, 34.1478, None, "north"],
+        "longitude": [-71.1097, -73.9442, -71.0, -118.1445, -70.0, -70.0],
+    })
+    df.to_csv(path, index=False)
+
+def test_stream_match_csv_writes_matches(tmp_path):
+    input_csv = tmp_path / "requests.csv"
+    output_csv = tmp_path / "matched.csv"
+    write_input(input_csv)
+
+    stats = stream_match_csv(input_csv, depots, output_csv, chunk_size=2)
+
+    assert stats == {"rows_read": 6, "rows_matched": 3, "rows_unmatched": 0, "rows_rejected": 3}
+    result = pd.read_csv(output_csv)
+    assert result["name"].tolist() == ["Cambridge", "Brooklyn", "Pasadena"]
+    assert result["nearest_index"].tolist() == [0, 1, 2]
+
+    expected_idx, expected_dist = match_nearest(result[["latitude", "longitude"]].to_numpy(), depots)
+    assert np.allclose(result["distance_km"], expected_dist)
+
+def test_stream_match_csv_with_index_and_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    input_csv = tmp_path / "requests.csv"
+    output = tmp_path / "matched.parquet"
+    write_input(input_csv)
+
+    stream_match_csv(input_csv, GeoIndex(depots), output, chunk_size=4, usecols=["name"])
+
+    result = pd.read_parquet(output)
+    assert result["nearest_index"].tolist() == [0, 1, 2]
+    assert result["nearest_latitude"].tolist() == [42.3601, 40.7128, 34.0522]
+
+def test_parquet_output_when_the_first_chunk_has_no_matches(tmp_path):
+    # nearest_id is all missing in the first chunk, so its type must not be taken from that chunk alone
+    pytest.importorskip("pyarrow")
+    input_csv = tmp_path / "requests.csv"
+    output = tmp_path / "matched.parquet"
+    pd.DataFrame({
+        "name": ["London", "Paris", "Cambridge", "Pasadena"],
+        "latitude": [51.5074, 48.8566, 42.3736, 34.1478],
+        "longitude": [-0.1278, 2.3522, -71.1097, -118.1445],
+    }).to_csv(input_csv, index=False)
+
+    stats = stream_match_csv(input_csv, depots, output, chunk_size=2, max_radius_km=100,
+                             candidate_ids=["BOS", "NYC", "LAX"])
+
+    assert stats["rows_matched"] == 2 and stats["rows_unmatched"] == 2
+    result = pd.read_parquet(output)
+    assert result["nearest_id"].tolist()[2:] == ["BOS", "LAX"]
+    assert result["nearest_id"].isna().tolist() == [True, True, False, False]
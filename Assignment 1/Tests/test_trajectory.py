@@ -0,0 +1,80 @@
+# Tests for the trajectory functions (path length, speeds, distance to a polyline, simplification)
+
+import numpy as np
+import pytest
+from geo_distance import cumulative_distance, distance_to_polyline, gps_distance, segment_speeds, simplify
+from geo_distance.kernels import EARTH_RADIUS_KM
+
+@pytest.fixture
+def random_walk(rng):
+    """random_walk(n) is a track of n fixes moving a few hundred meters at a time"""
+    def walk(n):
+        steps = rng.normal(0, 0.003, (n, 2))
+        return np.array([42.35, -71.06]) + np.cumsum(steps, axis=0)
+    return walk
+
+def test_cumulative_distance_matches_loop(random_walk):
+    track = random_walk(200)
+
+    total = 0.0
+    expected = [0.0]
+    for a, b in zip(track[:-1].tolist(), track[1:].tolist()):
+        total += gps_distance(a, b, kernel='haversine')
+        expected.append(total)
+
+    assert np.allclose(cumulative_distance(track), expected, rtol=1e-9)
+
+def test_segment_speeds():
+    # One degree of latitude every hour, then no time passes
+    track = [[0, 0], [1, 0], [2, 0], [3, 0]]
+    times = np.array(['2025-01-01T00:00', '2025-01-01T01:00', '2025-01-01T02:00', '2025-01-01T02:00'],
+                     dtype='datetime64[s]')
+
+    speeds = segment_speeds(track, times)
+
+    one_degree = np.radians(1) * EARTH_RADIUS_KM
+    assert np.allclose(speeds[:2], one_degree)
+    assert np.isnan(speeds[2])
+    assert np.allclose(segment_speeds(track[:3], [0, 3600, 7200]), one_degree)
+    with pytest.raises(ValueError):
+        segment_speeds(track, [0, 1])
+
+def test_distance_to_polyline_known_cases():
+    # Polyline along the equator from 0 to 10 degrees east, then north
+    polyline = [[0, 0], [0, 10], [5, 10]]
+    points = [[1, 5], [-2, 3], [0, -1], [3, 11]]
+
+    distances, segments = distance_to_polyline(points, polyline)
+
+    one_degree = np.radians(1) * EARTH_RADIUS_KM
+    assert distances[0] == pytest.approx(one_degree, rel=1e-9)
+    assert distances[1] == pytest.approx(2 * one_degree, rel=1e-9)
+    assert distances[2] == pytest.approx(one_degree, rel=1e-9)  # beyond the start: distance to the first vertex
+    assert segments.tolist() == [0, 0, 0, 1]
+    assert distances[3] < one_degree
+
+def test_distance_to_polyline_agrees_with_dense_sampling(random_walk):
+    polyline = random_walk(20)
+    points = random_walk(100)
+
+    distances, _ = distance_to_polyline(points, polyline, tile=50)
+
+    # Sample each segment densely and take the closest sample
+    t = np.linspace(0, 1, 2001)[:, None]
+    samples = np.vstack([a + t * (b - a) for a, b in zip(polyline[:-1], polyline[1:])])
+    brute, _ = distance_to_polyline(points, samples)
+    assert np.allclose(distances, brute, atol=1e-3)
+
+def test_simplify(random_walk):
+    line = np.column_stack((np.zeros(50), np.linspace(0, 10, 50)))
+    assert simplify(line, 0.001).tolist() == [0, 49]
+
+    track = random_walk(2000)
+    tolerance = 0.05
+    kept = simplify(track, tolerance)
+
+    assert kept[0] == 0 and kept[-1] == len(track) - 1
+    assert len(kept) < len(track)
+    distances, _ = distance_to_polyline(track, track[kept])
+    assert distances.max() <= tolerance * (1 + 1e-9)
+    assert len(simplify(track, 0)) == len(track)
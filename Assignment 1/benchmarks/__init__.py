@@ -0,0 +1 @@
+# Benchmarks for the geo_distance package (run from the "Assignment 1" folder, e.g. python -m benchmarks.run_benchmarks)
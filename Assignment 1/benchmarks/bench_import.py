@@ -0,0 +1,63 @@
+# Import-time benchmark for the geo_distance package
+# Imports geo_distance in fresh interpreters, reports the median import time and checks that
+# pandas is not pulled in. Exits with code 1 if pandas was imported or the median is over --budget-ms,
+# so it can guard against slow imports creeping back in.
+#
+# Run from the "Assignment 1" folder:  python -m benchmarks.bench_import
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+# Heavy modules that `import geo_distance` should not load
+UNWANTED_MODULES = ['pandas', 'pyarrow', 'concurrent.futures.process']
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {unwanted!r} if m in sys.modules]}}))
+"""
+
+def measure_import(module='geo_distance', runs=10):
+    """Imports module in `runs` fresh interpreters; returns (list of seconds, unwanted modules that were loaded)"""
+    code = PROBE.format(module=module, unwanted=UNWANTED_MODULES)
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_dir, os.environ.get('PYTHONPATH')])))
+
+    times, loaded = [], set()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, env=env)
+        result = json.loads(out.stdout)
+        times.append(result['seconds'])
+        loaded.update(result['loaded'])
+    return times, sorted(loaded)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure how long `import geo_distance` takes")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=500, help="fail if the median is above this")
+    args = parser.parse_args(argv)
+
+    numpy_times, _ = measure_import('numpy', args.runs)
+    times, loaded = measure_import('geo_distance', args.runs)
+    median_ms = float(np.median(times)) * 1000
+    print(f"import numpy:        median {np.median(numpy_times) * 1000:.1f} ms")
+    print(f"import geo_distance: median {median_ms:.1f} ms, max {max(times) * 1000:.1f} ms ({args.runs} runs)")
+
+    ok = True
+    if loaded:
+        print(f"FAIL: import geo_distance loaded {', '.join(loaded)}")
+        ok = False
+    if median_ms > args.budget_ms:
+        print(f"FAIL: median import time is over the {args.budget_ms:.0f} ms budget")
+        ok = False
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
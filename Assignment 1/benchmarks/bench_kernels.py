@@ -0,0 +1,79 @@
+# Benchmark of the distance kernels in geo_distance.kernels
+# For every kernel, measures scalar and vectorized speed, and the error at several point separations:
+#  - numerical error: against a haversine computed in extended precision (np.longdouble)
+#  - model error: against vincenty (WGS-84 ellipsoid), which is what a "true" distance looks like
+#
+# Run from the "Assignment 1" folder:  python -m benchmarks.bench_kernels
+
+import argparse
+import time
+
+import numpy as np
+
+from geo_distance.kernels import EARTH_RADIUS_KM, KERNELS, vincenty_distance_np
+
+SEPARATIONS_KM = [0.001, 0.1, 10, 1000, 10000]
+
+def make_pairs(n, separation_km, rng):
+    """Random point pairs that are separation_km apart on the sphere"""
+    lat = rng.uniform(-80, 80, n)
+    lon = rng.uniform(-180, 180, n)
+    bearing = rng.uniform(0, 2 * np.pi, n)
+    angle = separation_km / EARTH_RADIUS_KM
+
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2 = np.arcsin(np.sin(lat1) * np.cos(angle) + np.cos(lat1) * np.sin(angle) * np.cos(bearing))
+    lon2 = lon1 + np.arctan2(np.sin(bearing) * np.sin(angle) * np.cos(lat1),
+                             np.cos(angle) - np.sin(lat1) * np.sin(lat2))
+    lon2 = (np.degrees(lon2) + 540) % 360 - 180
+    return lat, lon, np.degrees(lat2), lon2
+
+def reference_haversine(lat1, lon1, lat2, lon2):
+    """Haversine in extended precision, used to measure numerical error"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=np.longdouble)) for x in (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(h))).astype(np.float64)
+
+def time_call(func, repeat):
+    """Best wall time of func over repeat runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare speed and error of the geo_distance kernels")
+    parser.add_argument("--pairs", type=int, default=200_000, help="point pairs for the vectorized timing")
+    parser.add_argument("--scalar-pairs", type=int, default=20_000, help="point pairs for the scalar timing")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    rng = np.random.default_rng(530)
+
+    print("Speed (million distances per second)")
+    print(f"{'kernel':<10} {'scalar':>10} {'vectorized':>12}")
+    lat1, lon1, lat2, lon2 = make_pairs(args.pairs, 1000, rng)
+    pairs = list(zip(np.column_stack((lat1, lon1)).tolist(), np.column_stack((lat2, lon2)).tolist()))[:args.scalar_pairs]
+    for name, (scalar, vector) in KERNELS.items():
+        t_scalar = time_call(lambda: [scalar(a, b) for a, b in pairs], args.repeat)
+        t_vector = time_call(lambda: vector(lat1, lon1, lat2, lon2), args.repeat)
+        print(f"{name:<10} {len(pairs) / t_scalar / 1e6:>10.2f} {args.pairs / t_vector / 1e6:>12.2f}")
+
+    print()
+    print("Max error in meters (numerical / against vincenty)")
+    print(f"{'kernel':<10}" + "".join(f"{f'{s:g} km':>22}" for s in SEPARATIONS_KM))
+    samples = {s: make_pairs(10_000, s, rng) for s in SEPARATIONS_KM}
+    for name, (_, vector) in KERNELS.items():
+        row = f"{name:<10}"
+        for s in SEPARATIONS_KM:
+            pts = samples[s]
+            dist = vector(*pts)
+            numerical = np.max(np.abs(dist - reference_haversine(*pts))) * 1000
+            model = np.max(np.abs(dist - vincenty_distance_np(*pts))) * 1000
+            cell = "-" if name == 'vincenty' else f"{numerical:.2e}"
+            row += f"{cell + ' / ' + f'{model:.2e}':>22}"
+        print(row)
+
+if __name__ == "__main__":
+    main()
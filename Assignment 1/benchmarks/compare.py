@@ -0,0 +1,44 @@
+# Compare two benchmark result files written by run_benchmarks.py
+# Prints the throughput change for every benchmark found in both files and exits with code 1
+# when any of them got slower by more than --threshold (10% by default).
+#
+# Run from the "Assignment 1" folder:  python -m benchmarks.compare old.json new.json
+
+import argparse
+import json
+import sys
+
+def load_results(path):
+    """Results of one run keyed by (strategy, distribution, size)"""
+    with open(path) as infile:
+        report = json.load(infile)
+    return {(r['strategy'], r['distribution'], r['size']): r for r in report['results']}
+
+def compare(old, new, threshold=0.10):
+    """Returns a list of (key, old throughput, new throughput, change, is_regression) for benchmarks in both runs"""
+    rows = []
+    for key in sorted(old.keys() & new.keys()):
+        before = old[key]['throughput_per_s']
+        after = new[key]['throughput_per_s']
+        change = after / before - 1
+        rows.append((key, before, after, change, change < -threshold))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diff two geo_distance benchmark result files")
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=0.10, help="allowed slowdown as a fraction (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    rows = compare(load_results(args.old), load_results(args.new), args.threshold)
+    for (strategy, distribution, size), before, after, change, regression in rows:
+        flag = "  REGRESSION" if regression else ""
+        print(f"{strategy:<24} {distribution:<10} {size:>10,} {before:>14,.0f}/s -> {after:>14,.0f}/s {change:+7.1%}{flag}")
+
+    regressions = sum(row[4] for row in rows)
+    print(f"{len(rows)} benchmarks compared, {regressions} regressions")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+# Synthetic point generators for the benchmarks
+# All generators take a numpy Generator so runs are reproducible from a seed.
+
+import numpy as np
+
+from geo_distance.kernels import EARTH_RADIUS_KM
+
+def uniform_points(n, rng):
+    """n points spread uniformly over the globe (uniform by area, not by degree)"""
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+    lon = rng.uniform(-180, 180, n)
+    return np.column_stack((lat, lon))
+
+def clustered_points(n, rng, n_clusters=50, spread_km=25):
+    """n points in n_clusters city-like clusters; each point is a normal offset of spread_km around its center"""
+    centers = uniform_points(n_clusters, rng)
+    # Keep clusters away from the poles, where a km offset is many degrees of longitude
+    centers[:, 0] = np.clip(centers[:, 0], -70, 70)
+    which = rng.integers(0, n_clusters, n)
+
+    spread_deg = np.degrees(spread_km / EARTH_RADIUS_KM)
+    lat = centers[which, 0] + rng.normal(0, spread_deg, n)
+    lon = centers[which, 1] + rng.normal(0, spread_deg, n) / np.cos(np.radians(centers[which, 0]))
+    lat = np.clip(lat, -90, 90)
+    lon = (lon + 180) % 360 - 180
+    return np.column_stack((lat, lon))
+
+GENERATORS = {
+    'uniform': uniform_points,
+    'clustered': clustered_points,
+}
@@ -0,0 +1,196 @@
+# Benchmark suite for the geo_distance kernels and matchers
+# Runs every strategy on synthetic uniform and clustered points at several sizes and records
+# throughput, latency percentiles and peak memory. Results are stored as JSON so two runs
+# (e.g. two releases) can be diffed with benchmarks/compare.py.
+#
+# Run from the "Assignment 1" folder:
+#   python -m benchmarks.run_benchmarks --output results.json
+#   python -m benchmarks.run_benchmarks --sizes 1000 10000 --strategies match_nearest geo_index
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+import geo_distance
+from geo_distance import (GeoIndex, GridIndex, PreparedLocations, decide_min_geodistance, gps_distance,
+                          match_all_within_radius, match_k_nearest, match_nearest, parallel_match_nearest)
+from geo_distance.kernels import KERNELS
+
+from .generators import GENERATORS
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+ALL_SIZES = DEFAULT_SIZES + [10_000_000]
+DEFAULT_CANDIDATES = 10_000
+RADIUS_KM = 100
+K_NEAREST = 5
+# Per-query strategies only time this many queries for the memory pass
+MEMORY_SAMPLE = 1_000
+
+# Each strategy: (kind, largest size it runs at, setup)
+# setup(queries, candidates) returns the function to time:
+#  - 'batch' functions take all queries at once
+#  - 'per_query' functions take one query point and are timed call by call
+def _kernel_setup(name):
+    vector = KERNELS[name][1]
+
+    def setup(queries, candidates):
+        # Pair every query with a candidate, cycling through the candidates
+        other = candidates[np.arange(len(queries)) % len(candidates)]
+        return lambda q: vector(q[:, 0], q[:, 1], other[:len(q), 0], other[:len(q), 1])
+    return setup
+
+def _gps_distance_setup(queries, candidates):
+    other = candidates[0].tolist()
+    return lambda q: gps_distance(q, other)
+
+def _decide_min_setup(queries, candidates):
+    locations = candidates.tolist()
+    return lambda q: decide_min_geodistance(q, locations)
+
+def _geo_index_setup(queries, candidates):
+    return GeoIndex(candidates).nearest
+
+def _grid_index_setup(queries, candidates):
+    return GridIndex(candidates, cell_size_deg=1.0).nearest
+
+def _prepared_setup(queries, candidates):
+    return PreparedLocations(candidates.tolist()).nearest
+
+STRATEGIES = {
+    **{f'kernel_{name}': ('batch', 10_000_000, _kernel_setup(name)) for name in KERNELS},
+    'gps_distance': ('per_query', 100_000, _gps_distance_setup),
+    'decide_min_geodistance': ('per_query', 1_000, _decide_min_setup),
+    'match_nearest': ('batch', 1_000_000, lambda q, c: lambda points: match_nearest(points, c)),
+    'match_nearest_radius': ('batch', 10_000_000,
+                             lambda q, c: lambda points: match_nearest(points, c, max_radius_km=RADIUS_KM)),
+    'match_k_nearest': ('batch', 1_000_000,
+                        lambda q, c: lambda points: match_k_nearest(points, c, K_NEAREST)),
+    'match_all_within_radius': ('batch', 1_000_000,
+                                lambda q, c: lambda points: match_all_within_radius(points, c, RADIUS_KM)),
+    'parallel_match_nearest': ('batch', 1_000_000,
+                               lambda q, c: lambda points: parallel_match_nearest(points, c, chunk_size=50_000)),
+    'prepared_locations': ('per_query', 100_000, _prepared_setup),
+    'geo_index': ('per_query', 100_000, _geo_index_setup),
+    'grid_index': ('per_query', 100_000, _grid_index_setup),
+}
+
+def percentiles_ms(times):
+    """p50/p95/p99 of a list of durations in seconds, in milliseconds"""
+    p50, p95, p99 = np.percentile(np.asarray(times) * 1000, [50, 95, 99])
+    return {'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
+
+def measure(kind, func, queries, repeat):
+    """Times func on the queries and returns throughput and latency numbers"""
+    if kind == 'batch':
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(queries)
+            times.append(time.perf_counter() - start)
+        result = {'throughput_per_s': len(queries) / float(np.median(times))}
+    else:
+        points = queries.tolist()
+        times = []
+        for point in points:
+            start = time.perf_counter()
+            func(point)
+            times.append(time.perf_counter() - start)
+        result = {'throughput_per_s': len(points) / sum(times)}
+    result.update(percentiles_ms(times))
+    return result
+
+def measure_memory(kind, func, queries):
+    """Peak memory (MB) allocated while running func once, as seen by tracemalloc"""
+    tracemalloc.start()
+    try:
+        if kind == 'batch':
+            func(queries)
+        else:
+            for point in queries[:MEMORY_SAMPLE].tolist():
+                func(point)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024 / 1024
+
+def git_commit():
+    """Current git commit, or None outside a git checkout"""
+    try:
+        out = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(sizes=DEFAULT_SIZES, strategies=None, distributions=None, candidates=DEFAULT_CANDIDATES,
+              repeat=3, seed=530, log=print):
+    """Runs the benchmarks and returns the results as a JSON-ready dict"""
+    strategies = strategies or list(STRATEGIES)
+    distributions = distributions or list(GENERATORS)
+    results = []
+
+    for distribution in distributions:
+        for size in sizes:
+            # Queries and candidates come from one draw so clustered sets share their clusters
+            rng = np.random.default_rng(seed)
+            points = GENERATORS[distribution](size + candidates, rng)
+            cands, queries = points[:candidates], points[candidates:]
+
+            for name in strategies:
+                kind, max_size, setup = STRATEGIES[name]
+                if size > max_size:
+                    continue
+
+                start = time.perf_counter()
+                func = setup(queries, cands)
+                setup_s = time.perf_counter() - start
+
+                row = {'strategy': name, 'distribution': distribution, 'size': size,
+                       'candidates': candidates, 'setup_s': setup_s}
+                row.update(measure(kind, func, queries, repeat))
+                row['peak_memory_mb'] = measure_memory(kind, func, queries)
+                results.append(row)
+                log(f"{distribution:<10} {size:>10,} {name:<24} {row['throughput_per_s']:>14,.0f}/s "
+                    f"p50 {row['p50_ms']:.3f} ms  p99 {row['p99_ms']:.3f} ms  peak {row['peak_memory_mb']:.1f} MB")
+
+    return {
+        'metadata': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_commit': git_commit(),
+            'geo_distance_file': geo_distance.__file__,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': seed,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the geo_distance kernels and matchers")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help=f"query counts (default: {DEFAULT_SIZES}; add {ALL_SIZES[-1]} for the full suite)")
+    parser.add_argument('--strategies', nargs='+', choices=list(STRATEGIES), help="strategies to run (default: all)")
+    parser.add_argument('--distributions', nargs='+', choices=list(GENERATORS), help="point sets (default: all)")
+    parser.add_argument('--candidates', type=int, default=DEFAULT_CANDIDATES, help="candidate set size")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per batch benchmark")
+    parser.add_argument('--seed', type=int, default=530)
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON file to write")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.sizes, args.strategies, args.distributions, args.candidates, args.repeat, args.seed)
+    with open(args.output, 'w') as outfile:
+        json.dump(report, outfile, indent=4)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
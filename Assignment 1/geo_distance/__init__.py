@@ -4,7 +4,64 @@
 geo_distance - A Python package to calculate geographic distances and find the closest locations.
 """
 
+import importlib
+
+# The core distance and matching functions only need the standard library and NumPy
 from .geo_calculations import gps_distance, decide_min_geodistance
+from .matching import match_nearest, match_k_nearest, match_all_within_radius
+from .geo_index import GeoIndex
+from .prepared import PreparedLocations
+from .grid_index import GridIndex
+from .cache import NearestCache
+from .pointset import PointSet
+from .assignment import assign_nearest
+from .distance_matrix import distance_matrix
+from .profiling import Profiler, profile
+from .trajectory import cumulative_distance, segment_speeds, distance_to_polyline, simplify
+
+# The pandas-based helpers are loaded on first use, so `import geo_distance` does not import pandas.
+# The multiprocessing machinery behind parallel_match_nearest is also only loaded when it is used.
+_LAZY_ATTRIBUTES = {
+    'parallel_match_nearest': '.parallel',
+    'stream_match_csv': '.streaming',
+    'clean_coordinates_frame': '.cleaning',
+    'load_dataset': '.datasets',
+    'load_datasets': '.datasets',
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value  # Later lookups skip __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
 
-__all__ = ['gps_distance', 'decide_min_geodistance']
+__all__ = [
+    'gps_distance',
+    'decide_min_geodistance',
+    'match_nearest',
+    'match_k_nearest',
+    'match_all_within_radius',
+    'GeoIndex',
+    'parallel_match_nearest',
+    'stream_match_csv',
+    'clean_coordinates_frame',
+    'PreparedLocations',
+    'GridIndex',
+    'NearestCache',
+    'PointSet',
+    'assign_nearest',
+    'distance_matrix',
+    'cumulative_distance',
+    'segment_speeds',
+    'distance_to_polyline',
+    'simplify',
+    'Profiler',
+    'profile',
+    'load_dataset',
+    'load_datasets',
+]
 
@@ -0,0 +1,7 @@
+# Allows running the command-line tool as: python -m geo_distance
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,323 @@
+import heapq
+
+import numpy as np
+
+from . import profiling
+from .geo_index import GeoIndex
+from .kernels import get_kernel
+from .matching import as_points
+
+# Capacity-aware assignment: instead of sending every point to its nearest B (so popular depots
+# get swamped), give every B at most `capacity` points and keep the total distance low.
+#
+# Every A is offered its k nearest B (that have room) from one GeoIndex query; those edges are the
+# whole graph, and the assignment returned is the best one on that graph. A maximum flow over the
+# edges (scipy) first counts how many points can be placed at all. When some cannot, one extra
+# "unplaced" B is added that every point reaches at no distance but that takes exactly the points
+# left over, so as many points as possible are placed and only then is the distance minimised.
+# The assignment itself is an auction: each B has a price, every waiting point bids for the B with
+# the lowest distance + price, raising that price by how much better it is than its second choice,
+# and a B keeps its `capacity` highest bids. Prices are first settled coarsely and then refined
+# (epsilon scaling), which keeps the number of bids low even when capacity is tight. Rounds with
+# many bidders run on whole NumPy arrays; the last few bidders of a step are handled one at a time.
+# After every step, B that still have room lower their prices and win points back (a reverse
+# auction), since a B with room left cannot be worth more than the cheapest B.
+
+DEFAULT_K = 32
+# Every point ends within this many km of its best choice at the final prices, so the total is
+# within len(points_a) * FINAL_EPSILON_KM of the best one on the candidate graph
+FINAL_EPSILON_KM = 1e-6
+# How much epsilon shrinks between steps
+EPSILON_STEP = 5
+# Below this many waiting points, bids are handled one at a time instead of as a NumPy round
+SERIAL_BIDDERS = 16
+
+# Function to assign points to candidates with a limit on how many points each candidate takes
+@profiling.timed('assign')
+def assign_nearest(points_a, points_b, capacity=1, k=DEFAULT_K, kernel='haversine', max_radius_km=None):
+    """Takes two arrays of [latitude, longitude] and returns (indices, distances) of the B assigned to every A
+
+    capacity is the most points any B can take (a number, or one number per B). Every point is offered its k
+    nearest B that have room, and among those pairs the assignment places as many points as possible with the
+    smallest total great-circle distance (to within FINAL_EPSILON_KM per point). When capacity is tight, a point
+    may belong further away than its k nearest B; a larger k then finds a slightly lower total, at the cost of
+    time. kernel is used for the returned distances.
+    Points left without a B (not enough capacity, or nothing within max_radius_km) get index -1 and
+    distance inf.
+    """
+    points_a = as_points(points_a)
+    points_b = as_points(points_b)
+    if len(points_b) == 0:
+        raise ValueError("points_b must contain at least one location")
+    capacity = np.broadcast_to(np.asarray(capacity), (len(points_b),)).astype(np.int64)
+    if np.any(capacity < 0):
+        raise ValueError("capacity must not be negative")
+    if k < 1:
+        raise ValueError("k must be at least 1")
+
+    n_a = len(points_a)
+    indices = np.full(n_a, -1, dtype=np.int64)
+    distances = np.full(n_a, np.inf)
+    open_b = np.flatnonzero(capacity > 0)
+    if n_a == 0 or len(open_b) == 0:
+        return indices, distances
+
+    # Candidate edges: the k nearest B with room for every A, closer than max_radius_km
+    cand_idx, cand_dist = GeoIndex(points_b[open_b]).query(points_a, k=min(k, len(open_b)))
+    rows = np.repeat(np.arange(n_a), cand_idx.shape[1])
+    cols, costs = cand_idx.ravel(), cand_dist.ravel()
+    if max_radius_km is not None:
+        keep = costs <= max_radius_km
+        rows, cols, costs = rows[keep], cols[keep], costs[keep]
+    room = capacity[open_b]
+
+    # Points that cannot be placed go to an extra B at index len(open_b) that takes exactly that many
+    unplaced = n_a - _most_placed(n_a, rows, cols, room)
+    if unplaced:
+        rows = np.concatenate((rows, np.arange(n_a)))
+        cols = np.concatenate((cols, np.full(n_a, len(open_b))))
+        costs = np.concatenate((costs, np.zeros(n_a)))
+        room = np.append(room, unplaced)
+        order = np.argsort(rows, kind='stable')
+        rows, cols, costs = rows[order], cols[order], costs[order]
+
+    chosen = cols[_Auction(n_a, rows, cols, costs, room).solve()]
+    found = chosen < len(open_b)
+    indices[found] = open_b[chosen[found]]
+
+    distance_function = get_kernel(kernel, vectorized=True)
+    nearest = points_b[indices[found]]
+    distances[found] = distance_function(points_a[found, 0], points_a[found, 1], nearest[:, 0], nearest[:, 1])
+    return indices, distances
+
+# Function to count how many points the candidate edges can place at once
+def _most_placed(n_a, rows, cols, capacity):
+    """Size of the largest assignment that uses only the given edges, as a maximum flow source -> A -> B -> sink"""
+    try:
+        from scipy.sparse import csr_array
+        from scipy.sparse.csgraph import maximum_flow
+    except ImportError:
+        raise ImportError("assign_nearest needs scipy (pip install scipy)") from None
+
+    n_b = len(capacity)
+    source, sink = n_a + n_b, n_a + n_b + 1
+    tails = np.concatenate((np.full(n_a, source), rows, n_a + np.arange(n_b)))
+    heads = np.concatenate((np.arange(n_a), n_a + cols, np.full(n_b, sink)))
+    # No B can take more than all points, which also keeps the capacities within int32
+    caps = np.concatenate((np.ones(n_a + len(rows), dtype=np.int64), np.minimum(capacity, n_a)))
+    graph = csr_array((caps.astype(np.int32), (tails, heads)), shape=(sink + 1, sink + 1))
+    return maximum_flow(graph, source, sink).flow_value
+
+class _Auction:
+    """Epsilon-scaling auction that assigns persons (A) to objects (B) with capacities along the given edges
+
+    Edges are parallel arrays sorted by person. Every person needs at least one edge, and the edges must
+    allow an assignment that places every person.
+    """
+
+    def __init__(self, n_persons, persons, objects, costs, capacity):
+        self.objects = objects
+        self.costs = costs
+        self.edge_start = np.searchsorted(persons, np.arange(n_persons + 1))
+        # An object never needs more places than the edges that reach it
+        self.capacity = np.minimum(capacity, np.bincount(objects, minlength=len(capacity)))
+        # Places of object j are slot_start[j]:slot_start[j + 1], the first load[j] of them taken
+        self.slot_start = np.concatenate(([0], np.cumsum(self.capacity)))
+        self.price = np.zeros(len(capacity))
+        self.assigned = np.full(n_persons, -1)   # edge each person holds, -1 while waiting
+        # Stands in for the second choice of a person with only one edge
+        self.largest_cost = float(costs.max(initial=0.0))
+
+        # Plain lists for the bids handled one at a time and for the reverse auction
+        self._edge_start = self.edge_start.tolist()
+        self._objects = objects.tolist()
+        self._costs = costs.tolist()
+        self._persons = persons.tolist()
+        self._capacity = self.capacity.tolist()
+        self._slot_start = self.slot_start.tolist()
+        by_object = np.argsort(objects, kind='stable')
+        self._object_start = np.searchsorted(objects[by_object], np.arange(len(capacity) + 1)).tolist()
+        self._object_edges = by_object.tolist()
+
+    def solve(self):
+        """Runs the auction and returns the edge every person ends up with"""
+        eps = max(self.largest_cost / 2, FINAL_EPSILON_KM)
+        while True:
+            self._forward(eps)
+            self._reverse(eps)
+            if eps <= FINAL_EPSILON_KM:
+                return self.assigned
+            eps = max(eps / EPSILON_STEP, FINAL_EPSILON_KM)
+
+    def _forward(self, eps):
+        """One step: persons that are not within eps of their best choice bid until every person is placed"""
+        objects, costs = self.objects, self.costs
+        assigned = self.assigned
+
+        # Persons still within eps of their cheapest object keep it and pay its price
+        value = costs + self.price[objects]
+        best = np.minimum.reduceat(value, self.edge_start[:-1])
+        held = np.flatnonzero(assigned >= 0)
+        held = held[value[assigned[held]] <= best[held] + eps]
+        waiting = np.setdiff1d(np.arange(len(assigned)), held)
+        assigned[waiting] = -1
+
+        self.bid = np.zeros(len(assigned))
+        held_objects = objects[assigned[held]]
+        self.bid[held] = self.price[held_objects]
+        order = np.argsort(held_objects, kind='stable')
+        held, held_objects = held[order], held_objects[order]
+        self.load = np.bincount(held_objects, minlength=len(self.capacity))
+        rank = np.arange(len(held)) - (np.cumsum(self.load) - self.load)[held_objects]
+        self.slot_person = np.full(self.slot_start[-1], -1)
+        self.slot_person[self.slot_start[held_objects] + rank] = held
+
+        bids = 0
+        while len(waiting) > SERIAL_BIDDERS:
+            bids += len(waiting)
+            waiting = self._bid_round(waiting, eps)
+        bids += self._bid_serial(waiting, eps)
+        profiling.count('auction_bids', bids)
+
+    def _bid_round(self, waiting, eps):
+        """All waiting persons bid at once; returns the persons left waiting afterwards"""
+        objects, costs, price = self.objects, self.costs, self.price
+        assigned, bid_of, load, slot_person = self.assigned, self.bid, self.load, self.slot_person
+
+        # Best and second best distance + price over the edges of every waiting person
+        starts = self.edge_start[waiting]
+        lengths = self.edge_start[waiting + 1] - starts
+        seg = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        edges = np.repeat(starts - seg, lengths) + np.arange(lengths.sum())
+        value = costs[edges] + price[objects[edges]]
+        first = np.minimum.reduceat(value, seg)
+        at = np.minimum.reduceat(np.where(value == np.repeat(first, lengths), np.arange(len(value)), len(value)), seg)
+        value[at] = np.inf
+        second = np.minimum(np.minimum.reduceat(value, seg), first + self.largest_cost)
+        edges = edges[at]
+        targets = objects[edges]
+        bids = price[targets] + (second - first) + eps
+
+        # Every object that got bids keeps its highest bids among its holders and the new bidders
+        touched = np.unique(targets)
+        taken = load[touched]
+        held_seg = np.concatenate(([0], np.cumsum(taken)[:-1]))
+        holders = slot_person[np.repeat(self.slot_start[touched] - held_seg, taken) + np.arange(taken.sum())]
+        persons = np.concatenate((holders, waiting))
+        edges = np.concatenate((assigned[holders], edges))
+        targets = np.concatenate((objects[assigned[holders]], targets))
+        bids = np.concatenate((bid_of[holders], bids))
+        order = np.lexsort((-bids, targets))
+        persons, edges, targets, bids = persons[order], edges[order], targets[order], bids[order]
+
+        group = np.concatenate(([0], np.flatnonzero(np.diff(targets)) + 1))
+        counts = np.diff(np.append(group, len(targets)))
+        rank = np.arange(len(targets)) - np.repeat(group, counts)
+        keep = rank < self.capacity[targets]
+        assigned[persons[~keep]] = -1
+        assigned[persons[keep]] = edges[keep]
+        bid_of[persons[keep]] = bids[keep]
+        slot_person[self.slot_start[targets[keep]] + rank[keep]] = persons[keep]
+
+        # A full object costs its lowest kept bid
+        group_objects = targets[group]
+        load[group_objects] = np.minimum(counts, self.capacity[group_objects])
+        full = load[group_objects] == self.capacity[group_objects]
+        price[group_objects[full]] = bids[group[full] + load[group_objects[full]] - 1]
+        return persons[~keep]
+
+    def _bid_serial(self, waiting, eps):
+        """Waiting persons bid one at a time, each object keeping a heap of its bids; returns the number of bids"""
+        edge_start, objects, costs = self._edge_start, self._objects, self._costs
+        capacity, slot_start = self._capacity, self._slot_start
+        price = self.price.tolist()
+        heaps = {}
+        moved = {}
+        stack = waiting.tolist()
+        bids = len(stack)
+        while stack:
+            person = stack.pop()
+            lo, hi = edge_start[person], edge_start[person + 1]
+            targets = objects[lo:hi]
+            value = [cost + price[obj] for obj, cost in zip(targets, costs[lo:hi])]
+            first = min(value)
+            at = value.index(first)
+            value[at] = np.inf
+            second = min(min(value), first + self.largest_cost)
+            obj = targets[at]
+            bid = price[obj] + (second - first) + eps
+
+            heap = heaps.get(obj)
+            if heap is None:
+                holders = self.slot_person[slot_start[obj]:slot_start[obj] + self.load[obj]].tolist()
+                heap = heaps[obj] = [(self.bid[holder], holder) for holder in holders]
+                heapq.heapify(heap)
+            moved[person] = lo + at
+            if len(heap) < capacity[obj]:
+                heapq.heappush(heap, (bid, person))
+            else:
+                _, loser = heapq.heapreplace(heap, (bid, person))
+                moved[loser] = -1
+                stack.append(loser)
+                bids += 1
+            if len(heap) == capacity[obj]:
+                price[obj] = heap[0][0]
+
+        for person, edge in moved.items():
+            self.assigned[person] = edge
+        self.price[:] = price
+        for obj, heap in heaps.items():
+            self.load[obj] = len(heap)
+            for slot, (bid, holder) in enumerate(heap):
+                self.slot_person[slot_start[obj] + slot] = holder
+                self.bid[holder] = bid
+        return bids
+
+    def _reverse(self, eps):
+        """Objects with room left and a price above the cheapest object lower it until they are full or that cheap"""
+        price = self.price.tolist()
+        floor = min(price)
+        load = self.load.tolist()
+        capacity = self._capacity
+        queue = [obj for obj in range(len(price)) if load[obj] < capacity[obj] and price[obj] > floor]
+        if not queue:
+            return
+
+        objects, costs, persons = self._objects, self._costs, self._persons
+        object_start, object_edges = self._object_start, self._object_edges
+        assigned = self.assigned.tolist()
+        while queue:
+            obj = queue.pop()
+            if load[obj] >= capacity[obj] or price[obj] <= floor:
+                continue
+            # How much each person reaching this object would gain by moving to it at no price
+            best = second = -np.inf
+            best_edge = None
+            for edge in object_edges[object_start[obj]:object_start[obj + 1]]:
+                held = assigned[persons[edge]]
+                if objects[held] == obj:
+                    continue
+                gain = costs[held] + price[objects[held]] - costs[edge]
+                if gain > best:
+                    best, second, best_edge = gain, best, edge
+                elif gain > second:
+                    second = gain
+            if best_edge is None or best - eps <= floor:
+                price[obj] = floor
+                continue
+
+            # Win the best person over at the price its runner-up would pay
+            price[obj] = max(floor, second - eps)
+            person = persons[best_edge]
+            left = objects[assigned[person]]
+            assigned[person] = best_edge
+            load[left] -= 1
+            load[obj] += 1
+            if price[left] > floor:
+                queue.append(left)
+            if load[obj] < capacity[obj]:
+                queue.append(obj)
+
+        self.assigned[:] = assigned
+        self.price[:] = price
+        self.load[:] = load
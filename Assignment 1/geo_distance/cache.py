@@ -0,0 +1,92 @@
+from collections import OrderedDict
+
+from .prepared import PreparedLocations
+
+# Bounded LRU cache in front of a nearest-location lookup.
+# Request streams often repeat the same points (the same store address many times an hour);
+# the cache answers those from memory instead of searching the candidates again.
+# Points are rounded to `precision` decimal places before the lookup, so fixes that differ only
+# by GPS noise share one entry (5 places is about 1 m). The lookup itself is done on the rounded
+# point, so a cached answer is always exactly what a new lookup would return.
+#
+# Candidate sets that can change (GridIndex) carry a version number; the cache is emptied
+# whenever the version differs from the one its entries were computed with.
+
+DEFAULT_MAXSIZE = 10_000
+DEFAULT_PRECISION = 5
+
+def _copy(result):
+    """Copies the lists in a lookup result, so callers never share the cached ones"""
+    return tuple(list(value) if isinstance(value, list) else value for value in result)
+
+class NearestCache:
+    """LRU cache of nearest/closest lookups on a GridIndex, PreparedLocations or GeoIndex
+
+    A plain list of [latitude, longitude] is wrapped in PreparedLocations. Not thread-safe.
+    """
+
+    def __init__(self, index, maxsize=DEFAULT_MAXSIZE, precision=DEFAULT_PRECISION):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.index = index if hasattr(index, 'nearest') else PreparedLocations(index)
+        self.maxsize = maxsize
+        self.precision = precision
+        self._entries = OrderedDict()
+        self._version = getattr(self.index, 'version', None)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Drops all cached entries (the counters are kept)"""
+        self._entries.clear()
+
+    def _lookup(self, method, point, max_radius_km):
+        version = getattr(self.index, 'version', None)
+        if version != self._version:
+            # The candidate set changed, so every cached answer may be wrong
+            self._version = version
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+
+        rounded = (round(float(point[0]), self.precision), round(float(point[1]), self.precision))
+        key = (method, rounded, max_radius_km)
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return _copy(self._entries[key])
+
+        self.misses += 1
+        lookup = getattr(self.index, method)
+        result = lookup(rounded) if max_radius_km is None else lookup(rounded, max_radius_km)
+        self._entries[key] = _copy(result)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def nearest(self, point, max_radius_km=None):
+        """Cached index.nearest(point, max_radius_km)"""
+        return self._lookup('nearest', point, max_radius_km)
+
+    def closest(self, point, max_radius_km=None):
+        """Cached index.closest(point, max_radius_km): the closest location and its distance"""
+        return self._lookup('closest', point, max_radius_km)
+
+    def stats(self):
+        """Counters for sizing the cache: hits, misses, evictions, invalidations, size, maxsize and hit_rate"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+from . import profiling
+
+# Columnar cleaning of coordinate data.
+# Whole columns are parsed and checked at once with pandas/NumPy masks instead of row by row.
+# Text values may carry a hemisphere letter (N/S/E/W) and may be written in degrees, minutes and
+# seconds, e.g. "42.35 N", "71°6'20.7\"W" or "-71 6 20.7".
+
+# Optional hemisphere letter, degrees, optional minutes and seconds, optional hemisphere letter
+_COORDINATE_PATTERN = (
+    r"^(?P<pre>[NSEW])?\s*"
+    r"(?P<deg>[+-]?\d+(?:\.\d+)?)\s*(?:°|º|DEG)?\s*"
+    r"(?:(?P<min>\d+(?:\.\d+)?)\s*(?:'|′|MIN)?\s*)?"
+    r"(?:(?P<sec>\d+(?:\.\d+)?)\s*(?:\"|″|''|SEC)?\s*)?"
+    r"(?P<post>[NSEW])?$"
+)
+
+# Function to parse a column of coordinates into floats (degrees)
+def parse_coordinates(values, hemispheres='NS'):
+    """Takes a column of numbers or strings and returns (float degrees, missing mask, unparseable mask)
+
+    hemispheres is 'NS' for latitude or 'EW' for longitude; S and W make the value negative.
+    """
+    series = pd.Series(values)
+    missing = series.isna().to_numpy()
+
+    if pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(dtype=np.float64), missing, np.zeros(len(series), dtype=bool)
+
+    text = series.astype('string').str.strip().str.upper()
+    missing = missing | (text == '').fillna(True).to_numpy(dtype=bool)
+
+    parts = text.str.extract(_COORDINATE_PATTERN)
+    deg = pd.to_numeric(parts['deg'], errors='coerce').to_numpy(dtype=np.float64)
+    minutes = pd.to_numeric(parts['min'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    seconds = pd.to_numeric(parts['sec'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    letter = parts['pre'].fillna(parts['post'])
+
+    # Letters on both sides, a letter for the wrong axis, or minutes/seconds out of range
+    bad = np.isnan(deg) | (minutes >= 60) | (seconds >= 60)
+    bad |= (parts['pre'].notna() & parts['post'].notna()).to_numpy(dtype=bool)
+    bad |= (letter.notna() & ~letter.isin(list(hemispheres))).to_numpy(dtype=bool)
+    # A hemisphere letter and a minus sign together is ambiguous
+    bad |= (letter.notna() & parts['deg'].str.startswith('-')).fillna(False).to_numpy(dtype=bool)
+
+    sign = np.where(np.signbit(deg), -1.0, 1.0)
+    sign[(letter == hemispheres[1]).fillna(False).to_numpy(dtype=bool)] = -1.0
+    parsed = sign * (np.abs(deg) + minutes / 60 + seconds / 3600)
+
+    unparseable = bad & ~missing
+    parsed[missing | unparseable] = np.nan
+    return parsed, missing, unparseable
+
+# Function to clean a whole table of coordinates at once
+@profiling.timed('clean')
+def clean_coordinates_frame(data, lat_col='latitude', lon_col='longitude'):
+    """Takes a DataFrame (or an (N, 2) array of [latitude, longitude]) and returns (clean DataFrame, report)
+
+    The clean DataFrame keeps the valid rows with lat_col/lon_col as floats in degrees.
+    The report holds the number of rows checked and kept, the number rejected for each
+    reason ('missing', 'unparseable', 'out_of_range') and the index labels of the rejected rows.
+    """
+    if isinstance(data, pd.DataFrame):
+        df = data
+    else:
+        arr = np.asarray(data, dtype=object)
+        if arr.ndim != 2 or arr.shape[1] != 2:
+            raise ValueError(f"Expected an array of [latitude, longitude] pairs, got shape {arr.shape}")
+        df = pd.DataFrame({lat_col: arr[:, 0], lon_col: arr[:, 1]})
+        df = df.infer_objects()
+
+    lat, lat_missing, lat_bad = parse_coordinates(df[lat_col], 'NS')
+    lon, lon_missing, lon_bad = parse_coordinates(df[lon_col], 'EW')
+
+    # Each rejected row is counted once, under the first reason that applies
+    missing = lat_missing | lon_missing
+    unparseable = (lat_bad | lon_bad) & ~missing
+    with np.errstate(invalid='ignore'):
+        in_range = (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+    out_of_range = ~in_range & ~missing & ~unparseable
+    valid = ~(missing | unparseable | out_of_range)
+
+    clean = df[valid].copy()
+    clean[lat_col] = lat[valid]
+    clean[lon_col] = lon[valid]
+
+    profiling.count('rows_rejected', len(df) - int(valid.sum()))
+    report = {
+        'rows': len(df),
+        'valid': int(valid.sum()),
+        'rejected': {
+            'missing': int(missing.sum()),
+            'unparseable': int(unparseable.sum()),
+            'out_of_range': int(out_of_range.sum()),
+        },
+        'rejected_index': df.index[~valid].to_numpy(),
+    }
+    return clean, report
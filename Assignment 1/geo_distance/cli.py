@@ -0,0 +1,91 @@
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from .cleaning import clean_coordinates_frame
+from .kernels import KERNELS
+from .streaming import DEFAULT_CHUNK_SIZE, stream_match_csv
+
+# Command-line batch matcher: geo-distance INPUT CANDIDATES -o OUTPUT
+# Matches every row of INPUT to the closest row of CANDIDATES, writes the results and prints
+# throughput (rows/sec) and peak memory at the end, so it can run from cron without any Python glue.
+
+def peak_memory_mb():
+    """Peak resident memory of this process and its finished child processes in MB (None if unknown)"""
+    try:
+        import resource
+    except ImportError:
+        return None  # Not available on Windows
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 / 1024 / 1024 if sys.platform == 'darwin' else 1 / 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return max(own, children)
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='geo-distance',
+        description='Match every location in INPUT to the closest location in CANDIDATES.')
+    parser.add_argument('input', help='CSV file with the locations to match')
+    parser.add_argument('candidates', help='CSV file with the candidate locations')
+    parser.add_argument('-o', '--output', required=True, help='output file (.csv, or .parquet with pyarrow installed)')
+    parser.add_argument('--lat-col', default='latitude', help='latitude column in INPUT (default: latitude)')
+    parser.add_argument('--lon-col', default='longitude', help='longitude column in INPUT (default: longitude)')
+    parser.add_argument('--candidate-lat-col', help='latitude column in CANDIDATES (default: same as --lat-col)')
+    parser.add_argument('--candidate-lon-col', help='longitude column in CANDIDATES (default: same as --lon-col)')
+    parser.add_argument('--candidate-id-col', help='column in CANDIDATES to copy to the output as nearest_id')
+    parser.add_argument('--columns', nargs='+', help='INPUT columns to keep in the output (default: all)')
+    parser.add_argument('--kernel', choices=list(KERNELS), default='haversine', help='distance kernel (default: haversine)')
+    parser.add_argument('--max-radius-km', type=float, help='leave rows unmatched when nothing is this close')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes (default: 1)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'INPUT rows read at a time (default: {DEFAULT_CHUNK_SIZE})')
+    return parser
+
+def load_candidates(path, lat_col, lon_col, id_col=None):
+    """Reads and cleans the candidate file; returns (points array, ids)
+
+    ids are the values of id_col, or the row numbers in the file when id_col is not given.
+    """
+    usecols = [lat_col, lon_col] + ([id_col] if id_col else [])
+    df = pd.read_csv(path, usecols=usecols)
+    clean, report = clean_coordinates_frame(df, lat_col, lon_col)
+    if report['valid'] < report['rows']:
+        print(f"Skipped {report['rows'] - report['valid']} invalid candidate rows: {report['rejected']}")
+    ids = clean[id_col].to_numpy() if id_col else clean.index.to_numpy()
+    return clean[[lat_col, lon_col]].to_numpy(), ids
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.workers < 1 or args.chunk_size < 1:
+        print("Error: --workers and --chunk-size must be at least 1")
+        return 2
+
+    start = time.perf_counter()
+    try:
+        points, ids = load_candidates(args.candidates, args.candidate_lat_col or args.lat_col,
+                                      args.candidate_lon_col or args.lon_col, args.candidate_id_col)
+        if len(points) == 0:
+            print("Error: no valid candidate locations")
+            return 1
+
+        stats = stream_match_csv(args.input, points, args.output, lat_col=args.lat_col, lon_col=args.lon_col,
+                                 chunk_size=args.chunk_size, usecols=args.columns, kernel=args.kernel,
+                                 max_radius_km=args.max_radius_km, workers=args.workers, candidate_ids=ids)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+
+    peak = peak_memory_mb()
+    print(f"Rows read: {stats['rows_read']}, matched: {stats['rows_matched']}, "
+          f"unmatched: {stats['rows_unmatched']}, rejected: {stats['rows_rejected']}")
+    print(f"Time: {elapsed:.2f} s ({stats['rows_read'] / elapsed if elapsed else 0:,.0f} rows/sec)")
+    print(f"Peak memory: {f'{peak:.1f} MB' if peak is not None else 'n/a'}")
+    print(f"Results written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
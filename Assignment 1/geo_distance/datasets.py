@@ -0,0 +1,139 @@
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from . import profiling
+
+# Loading of remote CSV datasets (airports, cities, ...) with a local disk cache.
+# Every URL gets two cache files named after a hash of the URL: <key>.json with the ETag and the
+# SHA-256 of the downloaded bytes, and <key>.parquet with the parsed table (zstd-compressed).
+# A fresh cache entry is used without touching the network; an older one is revalidated with
+# If-None-Match, and a "304 Not Modified" or an unchanged content hash reuses the Parquet file
+# instead of parsing the CSV again. Several datasets can be fetched at once with load_datasets.
+# file:// URLs work the same way (without ETags), so tests can run without network access.
+# The Parquet cache needs pyarrow; without it the downloaded CSV is kept as <key>.csv and parsed
+# again when it is read. Nothing is unpickled, so a shared cache folder cannot run code.
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'geo_distance')
+DEFAULT_MAX_AGE = 24 * 60 * 60  # Seconds a cache entry is used before it is revalidated
+DEFAULT_TIMEOUT = 30
+
+def cache_dir():
+    """Cache folder: $GEO_DISTANCE_CACHE if set, otherwise ~/.cache/geo_distance"""
+    return os.environ.get('GEO_DISTANCE_CACHE', DEFAULT_CACHE_DIR)
+
+def cache_key(url):
+    """File name stem of the cache entry for url"""
+    return hashlib.sha256(url.encode()).hexdigest()[:32]
+
+def _read_meta(path):
+    try:
+        with open(path) as infile:
+            return json.load(infile)
+    except (OSError, ValueError):
+        return None
+
+def _write_atomic(path, write):
+    """Writes through a temporary file and renames it, so readers never see a half-written cache file"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _dump_json(data, path):
+    with open(path, 'w') as outfile:
+        json.dump(data, outfile, indent=4)
+
+def _write_bytes(body, path):
+    with open(path, 'wb') as outfile:
+        outfile.write(body)
+
+def _download(url, etag, timeout):
+    """Returns (body, etag), or (None, etag) when the server answers 304 Not Modified"""
+    request = urllib.request.Request(url, headers={'If-None-Match': etag} if etag else {})
+    try:
+        with profiling.stage('download'), urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.read(), response.headers.get('ETag')
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, etag
+        raise
+
+@profiling.timed('read')
+def _parse_csv(body, read_csv_kwargs):
+    return pd.read_csv(io.BytesIO(body), **read_csv_kwargs)
+
+def _cache_suffix():
+    """'.parquet' when pyarrow is installed, otherwise '.csv'"""
+    return '.parquet' if importlib.util.find_spec('pyarrow') is not None else '.csv'
+
+@profiling.timed('read')
+def _read_cache(path, read_csv_kwargs):
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    with open(path, 'rb') as f:
+        return _parse_csv(f.read(), read_csv_kwargs)
+
+def _write_cache(df, body, path):
+    if path.endswith('.parquet'):
+        _write_atomic(path, lambda tmp_path: df.to_parquet(tmp_path, compression='zstd', index=False))
+    else:
+        _write_atomic(path, lambda tmp_path: _write_bytes(body, tmp_path))
+
+# Function to load one CSV dataset from a URL, going through the disk cache
+def load_dataset(url, cache=None, max_age=DEFAULT_MAX_AGE, refresh=False, timeout=DEFAULT_TIMEOUT, **read_csv_kwargs):
+    """Takes the URL of a CSV file and returns it as a DataFrame
+
+    cache is the cache folder (default: cache_dir()); pass cache=False to skip the cache.
+    Cache entries younger than max_age seconds are used without any network request;
+    refresh=True always revalidates. Extra keyword arguments go to pandas.read_csv.
+    """
+    if cache is False:
+        body, _ = _download(url, None, timeout)
+        return _parse_csv(body, read_csv_kwargs)
+
+    folder = cache or cache_dir()
+    os.makedirs(folder, exist_ok=True)
+    # Different read_csv options give different tables, so they are part of the key
+    key = cache_key(url + json.dumps(read_csv_kwargs, sort_keys=True, default=str))
+    meta_path = os.path.join(folder, key + '.json')
+    data_path = os.path.join(folder, key + _cache_suffix())
+
+    meta = _read_meta(meta_path) if os.path.exists(data_path) else None
+    if meta and not refresh and time.time() - meta['checked_at'] < max_age:
+        return _read_cache(data_path, read_csv_kwargs)
+
+    body, etag = _download(url, meta and meta.get('etag'), timeout)
+    digest = hashlib.sha256(body).hexdigest() if body is not None else meta['sha256']
+
+    if meta and digest == meta['sha256']:
+        df = _read_cache(data_path, read_csv_kwargs)
+    else:
+        df = _parse_csv(body, read_csv_kwargs)
+        _write_cache(df, body, data_path)
+
+    meta = {'url': url, 'etag': etag, 'sha256': digest, 'checked_at': time.time()}
+    _write_atomic(meta_path, lambda path: _dump_json(meta, path))
+    return df
+
+# Function to load several datasets at the same time
+def load_datasets(urls, max_workers=8, **kwargs):
+    """Takes a dict of {name: url} and returns {name: DataFrame}, downloading in parallel threads
+
+    Keyword arguments are passed to load_dataset for every URL.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls)))) as pool:
+        futures = {name: pool.submit(load_dataset, url, **kwargs) for name, url in urls.items()}
+        return {name: future.result() for name, future in futures.items()}
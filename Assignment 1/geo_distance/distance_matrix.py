@@ -0,0 +1,73 @@
+import numpy as np
+
+from . import profiling
+from .kernels import get_kernel
+from .matching import DEFAULT_BLOCK_SIZE, as_points, chord_to_km, to_unit_vectors
+
+# Full pairwise distance matrix between two sets of points.
+# The N x M matrix is filled tile by tile (block_size x block_size), so temporary memory stays
+# bounded however large the matrix is. The output can be an ordinary array or a memory-mapped .npy
+# file for matrices larger than RAM (50,000 x 50,000 in float32 is 10 GB). NumPy releases the GIL
+# while it computes, so tiles can be filled by several threads at once.
+
+# Function to compute one row of tiles of the matrix
+def _fill_rows(out, points_a, points_b, vec_a, vec_b, kernel, row_start, row_end, block_size):
+    """Fills out[row_start:row_end] one tile of block_size columns at a time"""
+    distance_function = get_kernel(kernel, vectorized=True)
+    rows = slice(row_start, row_end)
+    for col_start in range(0, len(points_b), block_size):
+        cols = slice(col_start, col_start + block_size)
+        if kernel == 'haversine':
+            # The chord is taken from the difference vectors: 2 - 2 a.b cancels to nothing at short range
+            # One coordinate at a time, so no block_size x block_size x 3 temporary is needed
+            chord_sq = sum((vec_a[rows, i, None] - vec_b[None, cols, i]) ** 2 for i in range(3))
+            tile = chord_to_km(np.sqrt(chord_sq))
+        else:
+            a, b = points_a[rows], points_b[cols]
+            tile = distance_function(a[:, 0, None], a[:, 1, None], b[None, :, 0], b[None, :, 1])
+        out[rows, cols] = tile
+
+# Function to build the matrix of distances between every point of two sets
+@profiling.timed('distance_matrix')
+def distance_matrix(points_a, points_b, kernel='haversine', dtype=np.float64, path=None, block_size=DEFAULT_BLOCK_SIZE,
+                    workers=1, progress=None):
+    """Takes two arrays of [latitude, longitude] and returns the len(A) x len(B) matrix of distances in km
+
+    dtype can be float32 to halve the memory. With path, the matrix is written into a memory-mapped
+    .npy file (readable later with np.load(path, mmap_mode='r')) and the memmap is returned.
+    workers threads fill separate rows of tiles. progress, if given, is called as progress(rows_done, rows_total)
+    after every row of tiles. The haversine kernel is computed from chord lengths between unit vectors, which stays exact at short range.
+    """
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1")
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    get_kernel(kernel)  # Unknown kernel names fail before any work is done
+    # concurrent.futures pulls in logging and friends, so it is only imported when a matrix is built
+    from concurrent.futures import ThreadPoolExecutor
+    points_a = as_points(points_a)
+    points_b = as_points(points_b)
+    shape = (len(points_a), len(points_b))
+
+    if path is not None:
+        out = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+    else:
+        out = np.empty(shape, dtype=dtype)
+    vec_a, vec_b = to_unit_vectors(points_a), to_unit_vectors(points_b)
+    profiling.count('distance_evaluations', shape[0] * shape[1])
+
+    starts = range(0, len(points_a), block_size)
+    tasks = [(start, min(start + block_size, len(points_a))) for start in starts]
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_fill_rows, out, points_a, points_b, vec_a, vec_b, kernel, start, end, block_size)
+                   for start, end in tasks]
+        for future, (start, end) in zip(futures, tasks):
+            future.result()
+            done += end - start
+            if progress is not None:
+                progress(done, len(points_a))
+
+    if path is not None:
+        out.flush()
+    return out
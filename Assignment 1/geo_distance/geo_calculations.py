@@ -1,7 +1,14 @@
 
 
-import math
-import pandas as pd
+import numpy as np
+
+from . import profiling
+from .cache import NearestCache
+from .geo_index import GeoIndex
+from .grid_index import GridIndex
+from .kernels import get_kernel
+from .prefilter import bounding_box, in_bounding_box
+from .prepared import PreparedLocations
 
 # Mission of the module: If the user gives two arrays of geo location, match each point in the first array to the closest one in the second array
 
@@ -10,37 +17,60 @@ import pandas as pd
 # Haversine formula (for distance in km)
 # D = 6378 * arccos[sin(latA)*sin(latB) + cos(latA)*cos(latB)*cos(longA-longB)]
 
-# Earth's radius is 6378 km
+# Earth's radius is 6378 km (EARTH_RADIUS_KM)
+# The formula above is the 'cosine' kernel; 'haversine' and 'vincenty' are also available (see kernels.py)
 
 # Function to calculate the distance between two GPS coordinates
-def gps_distance(placeA, placeB):
+def gps_distance(placeA, placeB, kernel='cosine'):
     """Takes two arrays with gps coordinates in degrees and returns the distance in km"""
+    distance_function = get_kernel(kernel)
     try:
-        # Convert degrees to radians
-        latA = math.radians(placeA[0])
-        latB = math.radians(placeB[0])
-        longA = math.radians(placeA[1])
-        longB = math.radians(placeB[1])
-
-        # Calculation for distance
-        dist = 6378 * math.acos(math.sin(latA) * math.sin(latB) + math.cos(latA) * math.cos(latB) * math.cos(longA - longB))
-        return dist
+        return distance_function(placeA, placeB)
     except Exception as e:
         print(f"Error calculating distance: {e}")
         return float('inf')  # Return an infinite distance if there's an error
 
 # Function to find the closest location
-def decide_min_geodistance(point, list_of_loc):
-    """Takes a point and a list of locations, returns the closest point and distance"""
+def decide_min_geodistance(point, list_of_loc, max_radius_km=None):
+    """Takes a point and a list of locations, returns the closest point and distance
+
+    With max_radius_km, only locations within that distance count; (None, inf) means nothing is in range.
+    The distance is always measured with gps_distance, also when list_of_loc is a prepared or indexed
+    set, so the same query gives the same distance whatever form the locations are passed in.
+    """
+    if isinstance(list_of_loc, (PreparedLocations, GeoIndex, GridIndex, NearestCache)):
+        # Candidates were prepared/indexed up front, so the object finds the closest one itself.
+        # It measures with the haversine, so the distance is measured again like the list path does.
+        closest_location, _ = list_of_loc.closest(point, max_radius_km)
+        if closest_location is None:
+            return None, float('inf')
+        distance = gps_distance(closest_location, point)
+        if max_radius_km is not None and distance > max_radius_km:
+            return None, float('inf')
+        return closest_location, distance
+
+    # Locations outside this box cannot be within max_radius_km, so their distance is never computed
+    box = bounding_box(point, max_radius_km) if max_radius_km is not None else None
     min_distance = float('inf')
     closest_location = None
+    evaluated = 0
     
     for loc in list_of_loc:
+        if box is not None:
+            try:
+                if not in_bounding_box(loc[0], loc[1], box):
+                    continue
+            except (TypeError, IndexError):
+                continue
         distance = gps_distance(loc, point)
+        evaluated += 1
         if distance < min_distance:
             min_distance = distance
             closest_location = loc
-            
+
+    profiling.count('distance_evaluations', evaluated)
+    if max_radius_km is not None and min_distance > max_radius_km:
+        return None, float('inf')
     return closest_location, min_distance
 
 # Function to filter out invalid GPS data
@@ -54,24 +84,42 @@ def is_valid_coordinate(coord):
 # Function to clean and filter the data
 def clean_and_filter_data(data):
     """Removes rows with invalid coordinates and empty cells"""
-    valid_data = []
-    for coord in data:
-        if is_valid_coordinate(coord):
-            valid_data.append(coord)
-        else:
-            print(f"Invalid coordinate skipped: {coord}")
+    try:
+        coords = np.asarray(data, dtype=float)
+    except (TypeError, ValueError):
+        coords = None
+
+    if coords is not None and coords.ndim == 2 and coords.shape[1] == 2:
+        # Check all rows at once; NaN fails both range checks
+        valid = (np.abs(coords[:, 0]) <= 90) & (np.abs(coords[:, 1]) <= 180)
+        valid_data = coords[valid].tolist()
+    else:
+        valid_data = [coord for coord in data if is_valid_coordinate(coord)]
+
+    skipped = len(data) - len(valid_data)
+    if skipped:
+        print(f"Skipped {skipped} invalid coordinates out of {len(data)}")
     return valid_data
 
 # Test 1: Using a CSV of GPS coordinates
 def test_with_csv(csv_file, current_loc):
-    df = pd.read_csv(csv_file)
-    geo_loc_list = df[["latitude", "longitude"]].values.tolist()
+    # pandas is only needed here, so it is imported on first use instead of with the package
+    import pandas as pd
+
+    # Only load the two columns that are used
+    with profiling.stage('read'):
+        df = pd.read_csv(csv_file, usecols=["latitude", "longitude"])
+        geo_loc_list = df[["latitude", "longitude"]].values.tolist()
+    profiling.count('rows_read', len(geo_loc_list))
     
     # Clean the data
-    geo_loc_list = clean_and_filter_data(geo_loc_list)
+    with profiling.stage('clean'):
+        geo_loc_list = clean_and_filter_data(geo_loc_list)
+    profiling.count('rows_rejected', len(df) - len(geo_loc_list))
     
     # Find the closest location
-    closest_loc, dist = decide_min_geodistance(current_loc, geo_loc_list)
+    with profiling.stage('match'):
+        closest_loc, dist = decide_min_geodistance(current_loc, geo_loc_list)
     print(f"The closest location to {current_loc} is {closest_loc} with a distance of {dist:.2f} km")
 
 # Example usage:
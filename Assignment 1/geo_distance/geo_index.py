@@ -0,0 +1,298 @@
+import heapq
+import math
+
+import numpy as np
+
+from . import profiling
+from .kernels import EARTH_RADIUS_KM
+from .matching import as_points, to_unit_vectors, chord_to_km
+
+# Spatial index for repeated lookups against a fixed set of locations.
+# Locations are stored as 3D unit vectors in a k-d tree. The straight-line (chord) distance between
+# two unit vectors grows with the great-circle distance, so the closest point in 3D is also the
+# closest point on the globe, and each query only has to visit a few leaves of the tree.
+
+DEFAULT_LEAF_SIZE = 32
+# Most queries handled together by one k-nearest batch; bounds the size of the distance blocks
+_QUERY_GROUP_SIZE = 256
+
+# Function to turn a great-circle radius in km into a squared chord length on the unit sphere
+def km_to_chord_sq(radius_km):
+    """Converts a great-circle distance in km to the squared chord length between unit vectors"""
+    angle = min(radius_km / EARTH_RADIUS_KM, math.pi)
+    return (2 * math.sin(angle / 2)) ** 2
+
+class GeoIndex:
+    """k-d tree over a fixed set of [latitude, longitude] locations answering nearest, k-nearest and radius queries"""
+
+    @profiling.timed('index_build')
+    def __init__(self, locations, leaf_size=DEFAULT_LEAF_SIZE):
+        if leaf_size < 1:
+            raise ValueError("leaf_size must be at least 1")
+
+        self.locations = as_points(locations)
+        if len(self.locations) == 0:
+            raise ValueError("GeoIndex needs at least one location")
+        self.leaf_size = leaf_size
+
+        vectors = to_unit_vectors(self.locations)
+        self._order = np.arange(len(vectors))
+        self._build(vectors)
+        # Leaves hold contiguous slices of the reordered vectors
+        self._vectors = vectors[self._order]
+
+    def __len__(self):
+        return len(self.locations)
+
+    def _build(self, vectors):
+        """Builds the tree; each node stores its slice of points, its bounding box and its children"""
+        self._start = []
+        self._end = []
+        self._lo = []
+        self._hi = []
+        self._children = []
+
+        root = self._add_node(vectors, 0, len(vectors))
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            start, end = self._start[node], self._end[node]
+            if end - start <= self.leaf_size:
+                continue
+
+            # Split on the widest dimension at the median
+            spread = np.subtract(self._hi[node], self._lo[node])
+            dim = int(np.argmax(spread))
+            mid = (start + end) // 2
+            part = np.argpartition(vectors[self._order[start:end], dim], mid - start)
+            self._order[start:end] = self._order[start:end][part]
+
+            left = self._add_node(vectors, start, mid)
+            right = self._add_node(vectors, mid, end)
+            self._children[node] = (left, right)
+            stack.extend((left, right))
+
+    def _add_node(self, vectors, start, end):
+        """Adds a node covering order[start:end] and returns its id"""
+        points = vectors[self._order[start:end]]
+        self._start.append(start)
+        self._end.append(end)
+        self._lo.append(tuple(points.min(axis=0)))
+        self._hi.append(tuple(points.max(axis=0)))
+        self._children.append(None)
+        return len(self._start) - 1
+
+    def _box_dist_sq(self, node, q):
+        """Smallest squared distance from q to the bounding box of a node"""
+        total = 0.0
+        for lo, hi, x in zip(self._lo[node], self._hi[node], q):
+            if x < lo:
+                total += (lo - x) ** 2
+            elif x > hi:
+                total += (x - hi) ** 2
+        return total
+
+    def _leaf_dist_sq(self, node, q):
+        """Squared chord distances from q to every point in a leaf"""
+        diff = self._vectors[self._start[node]:self._end[node]] - q
+        return np.einsum('ij,ij->i', diff, diff)
+
+    def _ordered_children(self, node, q):
+        """Children of a node, the one closer to q first, with their box distances"""
+        left, right = self._children[node]
+        d_left = self._box_dist_sq(left, q)
+        d_right = self._box_dist_sq(right, q)
+        if d_left <= d_right:
+            return (left, d_left), (right, d_right)
+        return (right, d_right), (left, d_left)
+
+    def _query_vector(self, point):
+        return tuple(to_unit_vectors(point)[0])
+
+    def k_nearest(self, point, k):
+        """Takes a [latitude, longitude] point and returns (indices, distances) of the k closest locations, closest first"""
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        k = min(k, len(self))
+        q = self._query_vector(point)
+        q_arr = np.array(q)
+
+        # Max-heap of the k best (negated squared distance, position in tree order)
+        best = []
+        stack = [(0, 0.0)]
+        visited = evaluated = 0
+        while stack:
+            node, box_dist = stack.pop()
+            if len(best) == k and box_dist > -best[0][0]:
+                continue
+            visited += 1
+
+            if self._children[node] is None:
+                dist_sq = self._leaf_dist_sq(node, q_arr)
+                evaluated += len(dist_sq)
+                start = self._start[node]
+                for offset, d in enumerate(dist_sq.tolist()):
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, start + offset))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, start + offset))
+                continue
+
+            near, far = self._ordered_children(node, q)
+            # Push the far child first so the near child is searched first
+            stack.append(far)
+            stack.append(near)
+
+        profiling.count('index_nodes_visited', visited)
+        profiling.count('distance_evaluations', evaluated)
+        best.sort(reverse=True)
+        positions = np.array([pos for _, pos in best], dtype=np.int64)
+        chord = np.sqrt(np.maximum([-d for d, _ in best], 0.0))
+        return self._order[positions], chord_to_km(chord)
+
+    def nearest(self, point, max_radius_km=None):
+        """Takes a [latitude, longitude] point and returns (index, distance) of the closest location
+
+        With max_radius_km, returns (None, inf) when no location is within that distance.
+        """
+        indices, distances = self.k_nearest(point, 1)
+        if max_radius_km is not None and distances[0] > max_radius_km:
+            return None, float('inf')
+        return int(indices[0]), float(distances[0])
+
+    def closest(self, point, max_radius_km=None):
+        """Takes a [latitude, longitude] point and returns the closest location and distance, like decide_min_geodistance"""
+        idx, distance = self.nearest(point, max_radius_km)
+        if idx is None:
+            return None, distance
+        return self.locations[idx].tolist(), distance
+
+    def within_radius(self, point, radius_km):
+        """Takes a [latitude, longitude] point and returns (indices, distances) of all locations within radius_km, closest first"""
+        if radius_km < 0:
+            raise ValueError("radius_km must not be negative")
+        q = self._query_vector(point)
+        q_arr = np.array(q)
+        limit = km_to_chord_sq(radius_km)
+
+        found_pos = []
+        found_dist = []
+        stack = [0]
+        visited = evaluated = 0
+        while stack:
+            node = stack.pop()
+            visited += 1
+            if self._box_dist_sq(node, q) > limit:
+                continue
+
+            if self._children[node] is None:
+                dist_sq = self._leaf_dist_sq(node, q_arr)
+                evaluated += len(dist_sq)
+                hits = np.nonzero(dist_sq <= limit)[0]
+                found_pos.append(hits + self._start[node])
+                found_dist.append(dist_sq[hits])
+                continue
+
+            stack.extend(self._children[node])
+
+        profiling.count('index_nodes_visited', visited)
+        profiling.count('distance_evaluations', evaluated)
+        if not found_pos:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        positions = np.concatenate(found_pos)
+        dist_sq = np.concatenate(found_dist)
+        sort = np.argsort(dist_sq, kind='stable')
+        return self._order[positions[sort]], chord_to_km(np.sqrt(dist_sq[sort]))
+
+    def query(self, points, k=None):
+        """Takes an array of [latitude, longitude] points and returns (indices, distances) of the closest location for each
+
+        With k, both arrays have shape (len(points), k) and row i holds the k closest locations to points[i], closest first.
+        """
+        points = as_points(points)
+        if k is not None:
+            if k < 1:
+                raise ValueError("k must be at least 1")
+            return self._query_k(to_unit_vectors(points), min(k, len(self)))
+
+        indices = np.empty(len(points), dtype=np.int64)
+        distances = np.empty(len(points))
+        for i, point in enumerate(points):
+            indices[i], distances[i] = self.nearest(point)
+        return indices, distances
+
+    def _query_k(self, vectors, k):
+        """k nearest locations for many unit vectors at once, handled in groups of queries that share a leaf
+
+        Each group first takes the k closest points of the smallest subtree around its leaf that holds k points,
+        which bounds how far the true k nearest can be, and then compares the group with every leaf in that reach.
+        """
+        lo, hi = np.array(self._lo), np.array(self._hi)
+        children = np.array([c if c is not None else (-1, -1) for c in self._children], dtype=np.int64)
+        parent = np.full(len(children), -1, dtype=np.int64)
+        internal = np.flatnonzero(children[:, 0] >= 0)
+        parent[children[internal, 0]] = internal
+        parent[children[internal, 1]] = internal
+        size = np.subtract(self._end, self._start)
+
+        # Walk every query down to a leaf, always towards the closer child box
+        leaf = np.zeros(len(vectors), dtype=np.int64)
+        while True:
+            going = np.flatnonzero(children[leaf, 0] >= 0)
+            if len(going) == 0:
+                break
+            left, right = children[leaf[going], 0], children[leaf[going], 1]
+            q = vectors[going]
+            d_left = (np.maximum(np.maximum(lo[left] - q, q - hi[left]), 0) ** 2).sum(axis=1)
+            d_right = (np.maximum(np.maximum(lo[right] - q, q - hi[right]), 0) ** 2).sum(axis=1)
+            leaf[going] = np.where(d_left <= d_right, left, right)
+
+        indices = np.empty((len(vectors), k), dtype=np.int64)
+        dist_sq = np.empty((len(vectors), k))
+        if len(vectors) == 0:
+            return indices, dist_sq
+        order = np.argsort(leaf, kind='stable')
+        bounds = np.flatnonzero(np.diff(leaf[order])) + 1
+        visited = evaluated = 0
+        for group in np.split(order, bounds):
+            for rows in np.array_split(group, -(-len(group) // _QUERY_GROUP_SIZE)):
+                q = vectors[rows]
+                node = leaf[rows[0]]
+                while size[node] < k:
+                    node = parent[node]
+                near = _squared_distances(q, self._vectors[self._start[node]:self._end[node]])
+                reach = np.partition(near, k - 1, axis=1)[:, k - 1].max()
+
+                # Every leaf whose box is within reach of the box around the group's queries
+                q_lo, q_hi = q.min(axis=0), q.max(axis=0)
+                slices = []
+                stack = [0]
+                while stack:
+                    node = stack.pop()
+                    visited += 1
+                    gap = np.maximum(np.maximum(lo[node] - q_hi, q_lo - hi[node]), 0)
+                    if gap @ gap > reach:
+                        continue
+                    if children[node, 0] < 0:
+                        slices.append(np.arange(self._start[node], self._end[node]))
+                    else:
+                        stack.extend(children[node])
+                positions = np.concatenate(slices)
+                found = _squared_distances(q, self._vectors[positions])
+                evaluated += found.size
+
+                best = np.argpartition(found, k - 1, axis=1)[:, :k] if k < len(positions) else \
+                    np.broadcast_to(np.arange(len(positions)), found.shape)
+                best_sq = np.take_along_axis(found, best, axis=1)
+                sort = np.argsort(best_sq, axis=1, kind='stable')
+                indices[rows] = positions[np.take_along_axis(best, sort, axis=1)]
+                dist_sq[rows] = np.take_along_axis(best_sq, sort, axis=1)
+
+        profiling.count('index_nodes_visited', visited)
+        profiling.count('distance_evaluations', evaluated)
+        return self._order[indices], chord_to_km(np.sqrt(dist_sq))
+
+# Function to compare a block of unit vectors with another
+def _squared_distances(vec_a, vec_b):
+    """Squared chord distances between every vector in vec_a and every vector in vec_b"""
+    return sum((vec_a[:, None, i] - vec_b[None, :, i]) ** 2 for i in range(3))
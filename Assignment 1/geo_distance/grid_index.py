@@ -0,0 +1,157 @@
+import math
+
+from . import profiling
+from .kernels import EARTH_RADIUS_KM, haversine_distance
+from .matching import as_points
+
+# Grid-bucketed index for candidate sets that change all the time (vehicles, service sites).
+# The globe is split into cells of about cell_size_deg x cell_size_deg degrees and every location is kept
+# in the dict of its cell, so inserting, moving or removing a location is a couple of dict operations.
+# A nearest query checks the query's cell, then rings of neighbouring cells further and further out,
+# and stops as soon as no unchecked cell can hold anything closer than the best match found so far.
+
+DEFAULT_CELL_SIZE_DEG = 1.0
+
+class GridIndex:
+    """Mutable lat/lon grid of keyed locations answering nearest queries"""
+
+    def __init__(self, locations=None, cell_size_deg=DEFAULT_CELL_SIZE_DEG):
+        if not 0 < cell_size_deg <= 180:
+            raise ValueError("cell_size_deg must be in (0, 180]")
+        self.cell_size_deg = cell_size_deg
+        self.n_rows = math.ceil(180 / cell_size_deg)
+        self.n_cols = math.ceil(360 / cell_size_deg)
+        # All rows and all columns have the same size (at most cell_size_deg), also when cell_size_deg
+        # does not divide 180 or 360; the search bound relies on every column being this wide
+        self.row_height = 180 / self.n_rows
+        self.col_width = 360 / self.n_cols
+
+        self._cells = {}   # (row, col) -> {key: (lat, lon)}
+        self._points = {}  # key -> (lat, lon, (row, col))
+        # Incremented on every change, so callers can tell when cached answers are stale
+        self.version = 0
+
+        if locations is not None:
+            items = locations.items() if isinstance(locations, dict) else enumerate(as_points(locations).tolist())
+            for key, point in items:
+                self.insert(key, point)
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, key):
+        return key in self._points
+
+    def __getitem__(self, key):
+        lat, lon, _ = self._points[key]
+        return [lat, lon]
+
+    def _cell(self, lat, lon):
+        """Grid cell (row, col) of a location"""
+        row = min(int((lat + 90) // self.row_height), self.n_rows - 1)
+        col = int(((lon + 180) % 360) // self.col_width) % self.n_cols
+        return row, col
+
+    def insert(self, key, point):
+        """Adds a location under key, or moves it if key is already in the index"""
+        lat, lon = float(point[0]), float(point[1])
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError(f"Invalid coordinate: {point}")
+        if key in self._points:
+            self.remove(key)
+
+        cell = self._cell(lat, lon)
+        self._cells.setdefault(cell, {})[key] = (lat, lon)
+        self._points[key] = (lat, lon, cell)
+        self.version += 1
+
+    def remove(self, key):
+        """Removes the location stored under key (KeyError if it is not there)"""
+        _, _, cell = self._points.pop(key)
+        bucket = self._cells[cell]
+        del bucket[key]
+        if not bucket:
+            del self._cells[cell]
+        self.version += 1
+
+    def _ring(self, row, col, r):
+        """Cells at Chebyshev distance r from (row, col), wrapping around in longitude"""
+        if r == 0:
+            yield row, col
+            return
+        # Columns further than half the grid away wrap around to cells already visited
+        col_offsets = range(-r, r + 1) if 2 * r + 1 <= self.n_cols else range(-(self.n_cols // 2), self.n_cols - self.n_cols // 2)
+        seen = set()
+        for dr in range(-r, r + 1):
+            rr = row + dr
+            if not 0 <= rr < self.n_rows:
+                continue
+            edge_row = abs(dr) == r
+            for dc in col_offsets:
+                if edge_row or abs(dc) == r:
+                    cell = (rr, (col + dc) % self.n_cols)
+                    if cell not in seen:
+                        seen.add(cell)
+                        yield cell
+
+    def _unvisited_bound_km(self, lat, row, r):
+        """Lower bound on the distance from the query to any cell outside rings 0..r"""
+        bounds = []
+        # Cells more than r rows away differ by at least r row heights in latitude
+        if row - r > 0 or row + r < self.n_rows - 1:
+            bounds.append(EARTH_RADIUS_KM * math.radians(r * self.row_height))
+        # Cells more than r columns away are at least r column widths of longitude away; the closest such
+        # point is on that meridian, at cross-track distance asin(cos(lat) * sin(dlon))
+        if 2 * r + 1 < self.n_cols:
+            dlon = math.radians(min(r * self.col_width, 90))
+            bounds.append(EARTH_RADIUS_KM * math.asin(min(1.0, math.cos(math.radians(lat)) * math.sin(dlon))))
+        return min(bounds) if bounds else float('inf')
+
+    def nearest(self, point, max_radius_km=None):
+        """Takes a [latitude, longitude] point and returns (key, distance) of the closest location
+
+        Returns (None, inf) if the index is empty or nothing is within max_radius_km.
+        """
+        lat, lon = float(point[0]), float(point[1])
+        limit = float('inf') if max_radius_km is None else max_radius_km
+        best_key, best_dist = None, float('inf')
+        row, col = self._cell(lat, lon)
+
+        r = 0
+        cells_visited = evaluated = 0
+        while self._points:
+            # A sparse grid would make the rings very wide; checking every occupied cell is cheaper then
+            if cells_visited > len(self._cells):
+                evaluated += len(self._points)
+                for key, (p_lat, p_lon, _) in self._points.items():
+                    dist = haversine_distance((lat, lon), (p_lat, p_lon))
+                    if dist < best_dist:
+                        best_key, best_dist = key, dist
+                break
+
+            for cell in self._ring(row, col, r):
+                cells_visited += 1
+                cell_points = self._cells.get(cell, {})
+                evaluated += len(cell_points)
+                for key, loc in cell_points.items():
+                    dist = haversine_distance((lat, lon), loc)
+                    if dist < best_dist:
+                        best_key, best_dist = key, dist
+
+            bound = self._unvisited_bound_km(lat, row, r)
+            if best_dist <= bound or bound > limit:
+                break
+            r += 1
+
+        profiling.count('index_nodes_visited', cells_visited)
+        profiling.count('distance_evaluations', evaluated)
+        if best_dist > limit:
+            return None, float('inf')
+        return best_key, best_dist
+
+    def closest(self, point, max_radius_km=None):
+        """Takes a [latitude, longitude] point and returns the closest location and distance, like decide_min_geodistance"""
+        key, distance = self.nearest(point, max_radius_km)
+        if key is None:
+            return None, distance
+        return self[key], distance
@@ -0,0 +1,164 @@
+import math
+
+import numpy as np
+
+# Distance kernels.
+# Each kernel has a scalar version, taking two [latitude, longitude] points like gps_distance, and a
+# vectorized version, taking latitude/longitude arrays in degrees that NumPy can broadcast together.
+#
+# cosine    - spherical law of cosines (the original gps_distance formula); cheap, but loses
+#             precision for points less than about 1 km apart
+# haversine - spherical, numerically stable at all distances
+# vincenty  - WGS-84 ellipsoid; most accurate (~0.5 mm) but iterative and slowest
+
+# Earth's radius is 6378 km (used by the spherical kernels)
+EARTH_RADIUS_KM = 6378
+
+# WGS-84 ellipsoid used by the vincenty kernel
+WGS84_A_KM = 6378.137
+WGS84_F = 1 / 298.257223563
+WGS84_B_KM = (1 - WGS84_F) * WGS84_A_KM
+# Mean earth radius, used when vincenty does not converge (nearly antipodal points)
+MEAN_RADIUS_KM = 6371.0088
+
+VINCENTY_TOLERANCE = 1e-12
+VINCENTY_MAX_ITERATIONS = 200
+
+# Spherical law of cosines
+def cosine_distance(placeA, placeB):
+    """Takes two [latitude, longitude] points in degrees and returns the law of cosines distance in km"""
+    latA, lonA = math.radians(placeA[0]), math.radians(placeA[1])
+    latB, lonB = math.radians(placeB[0]), math.radians(placeB[1])
+    cos_angle = math.sin(latA) * math.sin(latB) + math.cos(latA) * math.cos(latB) * math.cos(lonA - lonB)
+    # Rounding can push the value just past +-1, which acos rejects
+    return EARTH_RADIUS_KM * math.acos(min(1.0, max(-1.0, cos_angle)))
+
+def cosine_distance_np(latA, lonA, latB, lonB):
+    """Vectorized law of cosines distance in km for arrays of latitudes and longitudes in degrees"""
+    latA, lonA, latB, lonB = (np.radians(x) for x in (latA, lonA, latB, lonB))
+    cos_angle = np.sin(latA) * np.sin(latB) + np.cos(latA) * np.cos(latB) * np.cos(lonA - lonB)
+    return EARTH_RADIUS_KM * np.arccos(np.clip(cos_angle, -1.0, 1.0))
+
+# Haversine formula
+def haversine_distance(placeA, placeB):
+    """Takes two [latitude, longitude] points in degrees and returns the haversine distance in km"""
+    latA, lonA = math.radians(placeA[0]), math.radians(placeA[1])
+    latB, lonB = math.radians(placeB[0]), math.radians(placeB[1])
+    h = math.sin((latB - latA) / 2) ** 2 + math.cos(latA) * math.cos(latB) * math.sin((lonB - lonA) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+def haversine_distance_np(latA, lonA, latB, lonB):
+    """Vectorized haversine distance in km for arrays of latitudes and longitudes in degrees"""
+    latA, lonA, latB, lonB = (np.radians(x) for x in (latA, lonA, latB, lonB))
+    h = np.sin((latB - latA) / 2) ** 2 + np.cos(latA) * np.cos(latB) * np.sin((lonB - lonA) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(h)))
+
+# Vincenty's inverse formula on the WGS-84 ellipsoid
+def vincenty_distance(placeA, placeB):
+    """Takes two [latitude, longitude] points in degrees and returns the WGS-84 ellipsoidal distance in km"""
+    f = WGS84_F
+    L = math.radians(placeB[1] - placeA[1])
+    U1 = math.atan((1 - f) * math.tan(math.radians(placeA[0])))
+    U2 = math.atan((1 - f) * math.tan(math.radians(placeB[0])))
+    sinU1, cosU1 = math.sin(U1), math.cos(U1)
+    sinU2, cosU2 = math.sin(U2), math.cos(U2)
+
+    lam = L
+    for _ in range(VINCENTY_MAX_ITERATIONS):
+        sin_lam, cos_lam = math.sin(lam), math.cos(lam)
+        sin_sigma = math.hypot(cosU2 * sin_lam, cosU1 * sinU2 - sinU1 * cosU2 * cos_lam)
+        if sin_sigma == 0:
+            return 0.0  # Same point
+        cos_sigma = sinU1 * sinU2 + cosU1 * cosU2 * cos_lam
+        sigma = math.atan2(sin_sigma, cos_sigma)
+        sin_alpha = cosU1 * cosU2 * sin_lam / sin_sigma
+        cos2_alpha = 1 - sin_alpha ** 2
+        # cos2_alpha is 0 for points on the equator
+        cos_2sigma_m = cos_sigma - 2 * sinU1 * sinU2 / cos2_alpha if cos2_alpha != 0 else 0.0
+        C = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+        lam_prev = lam
+        lam = L + (1 - C) * f * sin_alpha * (
+            sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+        if abs(lam - lam_prev) < VINCENTY_TOLERANCE:
+            break
+    else:
+        # No convergence for nearly antipodal points; fall back to the sphere
+        return haversine_distance(placeA, placeB) * MEAN_RADIUS_KM / EARTH_RADIUS_KM
+
+    u2 = cos2_alpha * (WGS84_A_KM ** 2 - WGS84_B_KM ** 2) / WGS84_B_KM ** 2
+    A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+    delta_sigma = B * sin_sigma * (cos_2sigma_m + B / 4 * (
+        cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+        - B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+    return WGS84_B_KM * A * (sigma - delta_sigma)
+
+def vincenty_distance_np(latA, lonA, latB, lonB):
+    """Vectorized WGS-84 ellipsoidal distance in km for arrays of latitudes and longitudes in degrees"""
+    latA, lonA, latB, lonB = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (latA, lonA, latB, lonB)))
+    f = WGS84_F
+    L = np.radians(lonB - lonA)
+    U1 = np.arctan((1 - f) * np.tan(np.radians(latA)))
+    U2 = np.arctan((1 - f) * np.tan(np.radians(latB)))
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+
+    lam = L.copy()
+    # Only points that have not converged yet are updated in each iteration
+    active = np.ones(L.shape, dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for _ in range(VINCENTY_MAX_ITERATIONS):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(cosU2 * sin_lam, cosU1 * sinU2 - sinU1 * cosU2 * cos_lam)
+            cos_sigma = sinU1 * sinU2 + cosU1 * cosU2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cosU1 * cosU2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha ** 2
+            cos_2sigma_m = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sinU1 * sinU2 / cos2_alpha)
+            C = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+            lam_new = L + (1 - C) * f * sin_alpha * (
+                sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+            active &= np.abs(lam_new - lam) >= VINCENTY_TOLERANCE
+            lam = np.where(active, lam_new, lam)
+            if not active.any():
+                break
+
+    # Recompute the terms from the final lambda of every point
+    sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+    sin_sigma = np.hypot(cosU2 * sin_lam, cosU1 * sinU2 - sinU1 * cosU2 * cos_lam)
+    cos_sigma = sinU1 * sinU2 + cosU1 * cosU2 * cos_lam
+    sigma = np.arctan2(sin_sigma, cos_sigma)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sin_alpha = np.where(sin_sigma == 0, 0.0, cosU1 * cosU2 * sin_lam / sin_sigma)
+        cos2_alpha = 1 - sin_alpha ** 2
+        cos_2sigma_m = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sinU1 * sinU2 / cos2_alpha)
+
+    u2 = cos2_alpha * (WGS84_A_KM ** 2 - WGS84_B_KM ** 2) / WGS84_B_KM ** 2
+    A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+    delta_sigma = B * sin_sigma * (cos_2sigma_m + B / 4 * (
+        cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+        - B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+    dist = WGS84_B_KM * A * (sigma - delta_sigma)
+
+    # No convergence for nearly antipodal points; fall back to the sphere
+    if active.any():
+        fallback = haversine_distance_np(latA, lonA, latB, lonB) * MEAN_RADIUS_KM / EARTH_RADIUS_KM
+        dist = np.where(active, fallback, dist)
+    return dist
+
+# Name -> (scalar kernel, vectorized kernel)
+KERNELS = {
+    'cosine': (cosine_distance, cosine_distance_np),
+    'haversine': (haversine_distance, haversine_distance_np),
+    'vincenty': (vincenty_distance, vincenty_distance_np),
+}
+
+# Function to look up a kernel by name
+def get_kernel(name, vectorized=False):
+    """Returns the scalar (or vectorized) distance function for 'cosine', 'haversine' or 'vincenty'"""
+    try:
+        scalar, vector = KERNELS[name]
+    except KeyError:
+        raise ValueError(f"Unknown distance kernel '{name}', choose one of: {', '.join(KERNELS)}") from None
+    return vector if vectorized else scalar
@@ -0,0 +1,242 @@
+import numpy as np
+
+from . import profiling
+from .kernels import EARTH_RADIUS_KM, get_kernel
+from .prefilter import latitude_band, min_dot_for_radius
+
+# Bulk matching: for every point in the first array, find the closest point in the second array.
+# Points are converted to 3D unit vectors once, so the closest candidate is the one with the
+# largest dot product. The work is split into tiles of block_size x block_size so memory stays
+# bounded no matter how large the two arrays are.
+
+DEFAULT_BLOCK_SIZE = 2048
+
+# Function to turn lat/lon input into a float array of shape (N, 2)
+def as_points(points):
+    """Takes a list or array of [latitude, longitude] pairs and returns a float array of shape (N, 2)
+
+    An empty list gives an array of shape (0, 2).
+    """
+    arr = np.asarray(points, dtype=np.float64)
+    if arr.size == 0:
+        return arr.reshape(0, 2)
+    if arr.ndim == 1 and arr.shape[0] == 2:
+        arr = arr.reshape(1, 2)
+    if arr.ndim != 2 or arr.shape[1] != 2:
+        raise ValueError(f"Expected an array of [latitude, longitude] pairs, got shape {arr.shape}")
+    return arr
+
+# Function to convert lat/lon in degrees to 3D unit vectors
+def to_unit_vectors(points):
+    """Takes an array of [latitude, longitude] in degrees and returns an (N, 3) array of unit vectors"""
+    points = as_points(points)
+    lat = np.radians(points[:, 0])
+    lon = np.radians(points[:, 1])
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+# Function to turn the straight-line (chord) distance between unit vectors into km
+def chord_to_km(chord):
+    """Converts chord length on the unit sphere to great-circle distance in km"""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0.0, 1.0))
+
+# Function to match each point in points_a to its closest point in points_b
+@profiling.timed('match')
+def match_nearest(points_a, points_b, block_size=DEFAULT_BLOCK_SIZE, kernel='haversine', max_radius_km=None):
+    """Takes two arrays of [latitude, longitude] and returns (indices, distances) of the closest B for every A
+
+    The closest B is picked on the sphere; kernel only selects how the returned distances are computed.
+    With max_radius_km, points with no B within that distance get index -1 and distance inf.
+    """
+    points_b = as_points(points_b)
+    if len(points_b) == 0:
+        raise ValueError("points_b must contain at least one location")
+    return match_prepared(points_a, points_b, to_unit_vectors(points_b), block_size, kernel, max_radius_km)
+
+# Function to match against candidates whose unit vectors were computed once up front
+def match_prepared(points_a, points_b, vec_b, block_size=DEFAULT_BLOCK_SIZE, kernel='haversine', max_radius_km=None):
+    """Same as match_nearest, with vec_b = to_unit_vectors(points_b) passed in so it can be reused between calls"""
+    distance_function = get_kernel(kernel, vectorized=True)
+    points_a = as_points(points_a)
+    vec_a = to_unit_vectors(points_a)
+    if max_radius_km is None:
+        indices, distances = match_unit_vectors(vec_a, vec_b, block_size)
+    else:
+        indices, distances = match_within_radius(points_a, points_b, vec_a, vec_b, max_radius_km, block_size)
+
+    # The chord distance already is the haversine distance
+    if kernel != 'haversine':
+        found = indices >= 0
+        nearest = points_b[indices[found]]
+        distances[found] = distance_function(points_a[found, 0], points_a[found, 1], nearest[:, 0], nearest[:, 1])
+    return indices, distances
+
+# Function to match points only against candidates that can be within max_radius_km
+def match_within_radius(points_a, points_b, vec_a, vec_b, max_radius_km, block_size=DEFAULT_BLOCK_SIZE):
+    """Like match_unit_vectors, but returns index -1 and distance inf where no B is within max_radius_km
+
+    Both sets are sorted by latitude, so each block of A points is only compared with the
+    B points in the latitude band that the radius can reach.
+    """
+    if max_radius_km < 0:
+        raise ValueError("max_radius_km must not be negative")
+    order_a = np.argsort(points_a[:, 0], kind='stable')
+    order_b = np.argsort(points_b[:, 0], kind='stable')
+    sorted_lat_b = points_b[order_b, 0]
+    sorted_vec_b = vec_b[order_b]
+    min_dot = min_dot_for_radius(max_radius_km)
+
+    indices = np.full(len(points_a), -1, dtype=np.int64)
+    for a_start in range(0, len(points_a), block_size):
+        rows = order_a[a_start:a_start + block_size]
+        start, end = latitude_band(sorted_lat_b, points_a[rows[0], 0], points_a[rows[-1], 0], max_radius_km)
+        if start == end:
+            continue
+
+        band_idx, _ = match_unit_vectors(vec_a[rows], sorted_vec_b[start:end], block_size)
+        dots = np.einsum('ij,ij->i', vec_a[rows], sorted_vec_b[start + band_idx])
+        in_range = dots >= min_dot
+        indices[rows[in_range]] = order_b[start + band_idx[in_range]]
+
+    found = indices >= 0
+    distances = np.full(len(points_a), np.inf)
+    distances[found] = chord_to_km(np.linalg.norm(vec_a[found] - vec_b[indices[found]], axis=1))
+    return indices, distances
+
+# Function doing the tiled search on points already converted with to_unit_vectors
+def match_unit_vectors(vec_a, vec_b, block_size=DEFAULT_BLOCK_SIZE):
+    """Takes two arrays of unit vectors and returns (indices, distances) of the closest B for every A"""
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1")
+
+    profiling.count('distance_evaluations', len(vec_a) * len(vec_b))
+    indices = np.empty(len(vec_a), dtype=np.int64)
+
+    for a_start in range(0, len(vec_a), block_size):
+        block_a = vec_a[a_start:a_start + block_size]
+        best_dot = np.full(len(block_a), -np.inf)
+        best_idx = np.zeros(len(block_a), dtype=np.int64)
+
+        for b_start in range(0, len(vec_b), block_size):
+            dots = block_a @ vec_b[b_start:b_start + block_size].T
+            tile_idx = np.argmax(dots, axis=1)
+            tile_dot = dots[np.arange(len(block_a)), tile_idx]
+
+            better = tile_dot > best_dot
+            best_dot[better] = tile_dot[better]
+            best_idx[better] = tile_idx[better] + b_start
+
+        indices[a_start:a_start + block_size] = best_idx
+
+    # Recompute the winning distances from the vector difference, which stays accurate for close points
+    chord = np.linalg.norm(vec_a - vec_b[indices], axis=1)
+    return indices, chord_to_km(chord)
+
+# Function to find the k closest points in points_b for every point in points_a
+@profiling.timed('match')
+def match_k_nearest(points_a, points_b, k, block_size=DEFAULT_BLOCK_SIZE, kernel='haversine'):
+    """Takes two arrays of [latitude, longitude] and returns (indices, distances), both of shape (len(A), k)
+
+    Row i holds the k closest B for A[i], closest first. When B has fewer than k points, all of them are returned.
+    Each tile keeps only its k best candidates with np.argpartition, so nothing is ever fully sorted except the final k.
+    """
+    if k < 1:
+        raise ValueError("k must be at least 1")
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1")
+    points_a = as_points(points_a)
+    points_b = as_points(points_b)
+    if len(points_b) == 0:
+        raise ValueError("points_b must contain at least one location")
+    k = min(k, len(points_b))
+    vec_a = to_unit_vectors(points_a)
+    vec_b = to_unit_vectors(points_b)
+
+    profiling.count('distance_evaluations', len(vec_a) * len(vec_b))
+    indices = np.empty((len(points_a), k), dtype=np.int64)
+    for a_start in range(0, len(vec_a), block_size):
+        block_a = vec_a[a_start:a_start + block_size]
+        best_dot = np.empty((len(block_a), 0))
+        best_idx = np.empty((len(block_a), 0), dtype=np.int64)
+
+        for b_start in range(0, len(vec_b), block_size):
+            dots = block_a @ vec_b[b_start:b_start + block_size].T
+            # Keep the k largest dot products of the tile, then merge them with the running best k
+            if dots.shape[1] > k:
+                tile_idx = np.argpartition(dots, -k, axis=1)[:, -k:]
+                dots = np.take_along_axis(dots, tile_idx, axis=1)
+            else:
+                tile_idx = np.broadcast_to(np.arange(dots.shape[1]), dots.shape)
+            dots = np.hstack((best_dot, dots))
+            idx = np.hstack((best_idx, tile_idx + b_start))
+            if dots.shape[1] > k:
+                keep = np.argpartition(dots, -k, axis=1)[:, -k:]
+                dots = np.take_along_axis(dots, keep, axis=1)
+                idx = np.take_along_axis(idx, keep, axis=1)
+            best_dot, best_idx = dots, idx
+
+        order = np.argsort(-best_dot, axis=1, kind='stable')
+        indices[a_start:a_start + block_size] = np.take_along_axis(best_idx, order, axis=1)
+
+    # Distances from the vector difference, which stays accurate for close points
+    distances = chord_to_km(np.linalg.norm(vec_a[:, None, :] - vec_b[indices], axis=2))
+    if kernel != 'haversine':
+        distance_function = get_kernel(kernel, vectorized=True)
+        rows = np.repeat(points_a, k, axis=0)
+        nearest = points_b[indices.ravel()]
+        distances = distance_function(rows[:, 0], rows[:, 1], nearest[:, 0], nearest[:, 1]).reshape(-1, k)
+    return indices, distances
+
+# Function to find every point in points_b within radius_km of each point in points_a
+@profiling.timed('match')
+def match_all_within_radius(points_a, points_b, radius_km, block_size=DEFAULT_BLOCK_SIZE, kernel='haversine'):
+    """Takes two arrays of [latitude, longitude] and a radius, returns (offsets, indices, distances)
+
+    The result is in compressed rows: the B points within radius_km of A[i] are
+    indices[offsets[i]:offsets[i + 1]] (closest first), with their distances at the same positions.
+    Like match_within_radius, A points are only compared with the latitude band the radius can reach.
+    """
+    if radius_km < 0:
+        raise ValueError("radius_km must not be negative")
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1")
+    points_a = as_points(points_a)
+    points_b = as_points(points_b)
+    vec_a = to_unit_vectors(points_a)
+    vec_b = to_unit_vectors(points_b)
+    order_a = np.argsort(points_a[:, 0], kind='stable')
+    order_b = np.argsort(points_b[:, 0], kind='stable')
+    sorted_lat_b = points_b[order_b, 0]
+    sorted_vec_b = vec_b[order_b]
+    min_dot = min_dot_for_radius(radius_km)
+
+    pairs_a, pairs_b, pair_dots = [], [], []
+    for a_start in range(0, len(points_a), block_size):
+        rows = order_a[a_start:a_start + block_size]
+        start, end = latitude_band(sorted_lat_b, points_a[rows[0], 0], points_a[rows[-1], 0], radius_km)
+        for b_start in range(start, end, block_size):
+            b_end = min(b_start + block_size, end)
+            dots = vec_a[rows] @ sorted_vec_b[b_start:b_end].T
+            profiling.count('distance_evaluations', dots.size)
+            row_hit, col_hit = np.nonzero(dots >= min_dot)
+            pairs_a.append(rows[row_hit])
+            pairs_b.append(order_b[b_start + col_hit])
+            pair_dots.append(dots[row_hit, col_hit])
+
+    if pairs_a:
+        pairs_a, pairs_b, pair_dots = np.concatenate(pairs_a), np.concatenate(pairs_b), np.concatenate(pair_dots)
+    else:
+        pairs_a, pairs_b, pair_dots = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+    # Group the pairs by A point, closest first within each group
+    order = np.lexsort((-pair_dots, pairs_a))
+    pairs_a, indices = pairs_a[order], pairs_b[order]
+    offsets = np.zeros(len(points_a) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pairs_a, minlength=len(points_a)), out=offsets[1:])
+
+    if kernel == 'haversine':
+        distances = chord_to_km(np.linalg.norm(vec_a[pairs_a] - vec_b[indices], axis=1))
+    else:
+        distance_function = get_kernel(kernel, vectorized=True)
+        distances = distance_function(points_a[pairs_a, 0], points_a[pairs_a, 1], points_b[indices, 0], points_b[indices, 1])
+    return offsets, indices, distances
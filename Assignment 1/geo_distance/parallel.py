@@ -0,0 +1,115 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .matching import DEFAULT_BLOCK_SIZE, as_points, to_unit_vectors, match_prepared
+
+# Multi-process driver for match_nearest.
+# The candidate points and their unit vectors are copied into shared memory once, when the worker
+# pool starts, and every worker reads them in place. Each call then only sends chunks of query
+# points to the workers and concatenates the (indices, distances) they send back.
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Candidate arrays attached in each worker process by _init_worker
+_shared = {}
+
+def _create_shared(array):
+    """Copies an array into a new shared memory block and returns (block, shared array)"""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    shared[...] = array
+    return shm, shared
+
+def _init_worker(specs, options):
+    """Runs once per worker: attaches the shared candidate arrays described by specs"""
+    for key, (name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _shared[key] = (shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+    _shared['options'] = options
+
+def _match_chunk(points):
+    """Matches one chunk of query points against the shared candidates"""
+    return match_prepared(points, _shared['points_b'][1], _shared['vec_b'][1], **_shared['options'])
+
+class ParallelMatcher:
+    """Pool of worker processes matching query points against a fixed candidate set in shared memory
+
+    Use it as a context manager, or call close() when done, so the workers and shared memory are released.
+    """
+
+    def __init__(self, points_b, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, block_size=DEFAULT_BLOCK_SIZE,
+                 kernel='haversine', max_radius_km=None):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+        points_b = as_points(points_b)
+        if len(points_b) == 0:
+            raise ValueError("points_b must contain at least one location")
+
+        self._blocks = {}
+        self._views = {}
+        try:
+            for key, array in (('points_b', points_b), ('vec_b', to_unit_vectors(points_b))):
+                self._blocks[key], self._views[key] = _create_shared(array)
+            specs = {key: (shm.name, self._views[key].shape, self._views[key].dtype) for key, shm in self._blocks.items()}
+            options = {'block_size': block_size, 'kernel': kernel, 'max_radius_km': max_radius_km}
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(specs, options))
+        except Exception:
+            self._release_shared()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def match(self, points_a):
+        """Takes an array of [latitude, longitude] and returns (indices, distances) of the closest candidate for every point"""
+        points_a = as_points(points_a)
+        # Spread small inputs over all workers instead of sending everything to one
+        chunk_size = max(1, min(self.chunk_size, -(-len(points_a) // self.workers)))
+        chunks = [points_a[start:start + chunk_size] for start in range(0, len(points_a), chunk_size)]
+        if not chunks:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        results = list(self._executor.map(_match_chunk, chunks))
+        return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results])
+
+    def close(self):
+        """Stops the workers and frees the shared memory"""
+        self._executor.shutdown()
+        self._release_shared()
+
+    def _release_shared(self):
+        # Views into the shared buffers must be gone before the blocks can be closed
+        self._views.clear()
+        for shm in self._blocks.values():
+            shm.close()
+            shm.unlink()
+        self._blocks.clear()
+
+# Function to match each point in points_a to its closest point in points_b using several processes
+def parallel_match_nearest(points_a, points_b, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, block_size=DEFAULT_BLOCK_SIZE,
+                           kernel='haversine', max_radius_km=None):
+    """Takes two arrays of [latitude, longitude] and returns (indices, distances) of the closest B for every A"""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    workers = workers or os.cpu_count() or 1
+    points_a = as_points(points_a)
+
+    # Not worth starting processes for a single chunk
+    if workers == 1 or len(points_a) <= chunk_size:
+        points_b = as_points(points_b)
+        if len(points_b) == 0:
+            raise ValueError("points_b must contain at least one location")
+        return match_prepared(points_a, points_b, to_unit_vectors(points_b), block_size, kernel, max_radius_km)
+
+    with ParallelMatcher(points_b, workers, chunk_size, block_size, kernel, max_radius_km) as matcher:
+        return matcher.match(points_a)
@@ -0,0 +1,117 @@
+import json
+
+import numpy as np
+
+# Compact columnar storage for large candidate sets.
+# A list of [lat, lon] lists costs 100+ bytes per point; a PointSet keeps latitudes and longitudes
+# in two contiguous float64 (or float32) arrays, 16 (or 8) bytes per point, plus an optional ID column.
+#
+# PointSet.save writes a small binary file that PointSet.load can memory-map: the columns are read
+# straight from the OS page cache, so several processes can share one candidate file without
+# copying it, and loading is instant no matter how large the file is.
+#
+# File layout: MAGIC, 4-byte little-endian header length, JSON header, padding, then the columns,
+# each starting at a multiple of ALIGNMENT bytes at the offset listed in the header.
+
+MAGIC = b'GEOPTS1\0'
+ALIGNMENT = 64
+
+class PointSet:
+    """Latitude/longitude columns (float64 or float32) with an optional ID column"""
+
+    def __init__(self, lat, lon, ids=None, dtype=np.float64):
+        dtype = np.dtype(dtype)
+        if dtype not in (np.float32, np.float64):
+            raise ValueError("dtype must be float32 or float64")
+        # asarray keeps memory-mapped columns as they are when the dtype already matches
+        self.lat = np.ascontiguousarray(lat, dtype=dtype)
+        self.lon = np.ascontiguousarray(lon, dtype=dtype)
+        if self.lat.ndim != 1 or self.lat.shape != self.lon.shape:
+            raise ValueError("lat and lon must be 1-D arrays of the same length")
+
+        if ids is not None:
+            ids = np.ascontiguousarray(ids)
+            if ids.dtype == object:
+                raise ValueError("ids must be numbers or strings, not Python objects")
+            if ids.shape != self.lat.shape:
+                raise ValueError("ids must have one value per point")
+        self.ids = ids
+
+    @classmethod
+    def from_points(cls, points, ids=None, dtype=np.float64):
+        """Builds a PointSet from a list or array of [latitude, longitude] pairs"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return cls(points[:, 0], points[:, 1], ids, dtype)
+
+    def __len__(self):
+        return len(self.lat)
+
+    def __array__(self, dtype=None, copy=None):
+        # Lets every function that takes an array of [latitude, longitude] take a PointSet
+        return np.column_stack((self.lat, self.lon)).astype(dtype or np.float64, copy=False)
+
+    @property
+    def points(self):
+        """(N, 2) float64 array of [latitude, longitude]"""
+        return np.asarray(self)
+
+    @property
+    def nbytes(self):
+        return self.lat.nbytes + self.lon.nbytes + (self.ids.nbytes if self.ids is not None else 0)
+
+    def save(self, path):
+        """Writes the point set to a binary file that load() can memory-map"""
+        columns = {'lat': self.lat, 'lon': self.lon}
+        if self.ids is not None:
+            columns['ids'] = self.ids
+
+        # The header holds the column offsets, which depend on the header size;
+        # grow the space reserved for the header until it fits
+        data_start = 0
+        while True:
+            header = {'count': len(self), 'columns': {}}
+            offset = data_start
+            for name, col in columns.items():
+                header['columns'][name] = {'dtype': col.dtype.str, 'offset': offset}
+                offset = _align(offset + col.nbytes)
+            header_bytes = json.dumps(header).encode()
+            needed = _align(len(MAGIC) + 4 + len(header_bytes))
+            if needed <= data_start:
+                break
+            data_start = needed
+
+        with open(path, 'wb') as outfile:
+            outfile.write(MAGIC)
+            outfile.write(len(header_bytes).to_bytes(4, 'little'))
+            outfile.write(header_bytes)
+            for name, col in columns.items():
+                outfile.write(b'\0' * (header['columns'][name]['offset'] - outfile.tell()))
+                outfile.write(col.tobytes())
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Reads a file written by save(); with mmap=True the columns are memory-mapped read-only"""
+        with open(path, 'rb') as infile:
+            if infile.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a PointSet file")
+            header_len = int.from_bytes(infile.read(4), 'little')
+            header = json.loads(infile.read(header_len))
+
+        count = header['count']
+        columns = {}
+        for name, info in header['columns'].items():
+            dtype = np.dtype(info['dtype'])
+            if mmap:
+                columns[name] = np.memmap(path, dtype=dtype, mode='r', offset=info['offset'], shape=(count,))
+            else:
+                columns[name] = np.fromfile(path, dtype=dtype, count=count, offset=info['offset'])
+
+        point_set = cls.__new__(cls)
+        point_set.lat = columns['lat']
+        point_set.lon = columns['lon']
+        point_set.ids = columns.get('ids')
+        return point_set
+
+def _align(offset):
+    """Rounds offset up to the next multiple of ALIGNMENT"""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
@@ -0,0 +1,51 @@
+import math
+
+import numpy as np
+
+from .kernels import EARTH_RADIUS_KM
+
+# Cheap checks that rule out candidates before any trig distance is computed.
+# Every point within radius_km of a center lies inside the lat/lon bounding box returned by
+# bounding_box, so anything outside the box can be skipped.
+
+# Function to compute the lat/lon box that contains a circle on the globe
+def bounding_box(point, radius_km):
+    """Takes a [latitude, longitude] center and a radius in km, returns (lat_min, lat_max, lon_min, lon_max)
+
+    lon_min > lon_max means the box crosses the 180th meridian.
+    """
+    lat, lon = float(point[0]), float(point[1])
+    angle = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angle)
+    lat_min, lat_max = lat - dlat, lat + dlat
+
+    # Circle reaches a pole (or covers half the globe): every longitude is possible
+    if lat_min <= -90 or lat_max >= 90 or angle >= math.pi / 2:
+        return max(lat_min, -90.0), min(lat_max, 90.0), -180.0, 180.0
+
+    dlon = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(lat))))
+    lon_min = (lon - dlon + 180) % 360 - 180
+    lon_max = (lon + dlon + 180) % 360 - 180
+    return lat_min, lat_max, lon_min, lon_max
+
+# Function to test points against a bounding box (works on numbers or NumPy arrays)
+def in_bounding_box(lat, lon, box):
+    """Returns True (or a boolean array) where lat/lon is inside box from bounding_box"""
+    lat_min, lat_max, lon_min, lon_max = box
+    in_lat = (lat >= lat_min) & (lat <= lat_max)
+    if lon_min <= lon_max:
+        return in_lat & (lon >= lon_min) & (lon <= lon_max)
+    return in_lat & ((lon >= lon_min) | (lon <= lon_max))
+
+# Function to turn a radius in km into the smallest allowed dot product between unit vectors
+def min_dot_for_radius(radius_km):
+    """Two unit vectors are within radius_km of each other when their dot product is at least this value"""
+    return math.cos(min(radius_km / EARTH_RADIUS_KM, math.pi))
+
+# Function to find, in latitude-sorted candidates, the slice that can be within radius_km of a latitude band
+def latitude_band(sorted_lat, lat_low, lat_high, radius_km):
+    """Returns (start, end) of the candidates in sorted_lat that lie within radius_km of [lat_low, lat_high]"""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    start = int(np.searchsorted(sorted_lat, lat_low - dlat, side='left'))
+    end = int(np.searchsorted(sorted_lat, lat_high + dlat, side='right'))
+    return start, end
@@ -0,0 +1,45 @@
+import numpy as np
+
+from . import profiling
+from .matching import as_points, to_unit_vectors, chord_to_km
+from .prefilter import min_dot_for_radius
+
+# Precomputed candidate set for repeated single-point lookups.
+# gps_distance converts both points to radians and recomputes sin/cos for every pair. When the
+# candidate list does not change between queries, that work can be done once: the candidates are
+# stored as 3D unit vectors and each query only converts its own point and takes one dot product
+# with all candidates.
+
+class PreparedLocations:
+    """Fixed list of [latitude, longitude] locations with their unit vectors computed once"""
+
+    def __init__(self, list_of_loc):
+        self.list_of_loc = list(list_of_loc)
+        self.points = as_points(self.list_of_loc) if self.list_of_loc else np.empty((0, 2))
+        self.vectors = to_unit_vectors(self.points)
+
+    def __len__(self):
+        return len(self.list_of_loc)
+
+    def nearest(self, point, max_radius_km=None):
+        """Takes a [latitude, longitude] point and returns (index, distance) of the closest location
+
+        With max_radius_km, returns (None, inf) when no location is within that distance.
+        """
+        if not self.list_of_loc:
+            return None, float('inf')
+        q = to_unit_vectors(point)[0]
+        dots = self.vectors @ q
+        profiling.count('distance_evaluations', len(dots))
+        idx = int(np.argmax(dots))
+        if max_radius_km is not None and dots[idx] < min_dot_for_radius(max_radius_km):
+            return None, float('inf')
+        chord = np.linalg.norm(self.vectors[idx] - q)
+        return idx, float(chord_to_km(chord))
+
+    def closest(self, point, max_radius_km=None):
+        """Takes a [latitude, longitude] point and returns the closest location and distance, like decide_min_geodistance"""
+        idx, distance = self.nearest(point, max_radius_km)
+        if idx is None:
+            return None, distance
+        return self.list_of_loc[idx], distance
@@ -0,0 +1,108 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Opt-in instrumentation of the hot paths.
+# Inside a `with profile() as prof:` block, the library records how long each stage takes
+# (read, clean, index_build, match, write) and counts rows read, rows rejected, distance
+# evaluations and index nodes visited. Outside such a block every hook is a cheap no-op.
+#
+#   with profile() as prof:
+#       stream_match_csv("requests.csv", depots, "matched.csv")
+#   print(prof.summary())
+#   open("metrics.prom", "w").write(prof.to_prometheus())
+
+# Profiler that the hooks currently report to (None when profiling is off)
+_active = None
+_NO_STAGE = nullcontext()
+
+class Profiler:
+    """Per-stage timings (total seconds and number of calls) and named counters"""
+
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Times the body of the with block as one call of the stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                total, calls = self.timings.get(name, (0.0, 0))
+                self.timings[name] = (total + elapsed, calls + 1)
+
+    def count(self, name, n=1):
+        """Adds n to the counter called name"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def summary(self):
+        """Returns {'stages': {name: {'seconds', 'calls'}}, 'counters': {name: value}}"""
+        with self._lock:
+            return {
+                'stages': {name: {'seconds': total, 'calls': calls} for name, (total, calls) in self.timings.items()},
+                'counters': dict(self.counters),
+            }
+
+    def to_prometheus(self, prefix='geo_distance'):
+        """Returns the timings and counters in the Prometheus text exposition format"""
+        summary = self.summary()
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Time spent in each stage.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        lines += [f'{prefix}_stage_seconds_total{{stage="{name}"}} {stats["seconds"]:.6f}'
+                  for name, stats in sorted(summary['stages'].items())]
+        lines += [
+            f"# HELP {prefix}_stage_calls_total Number of times each stage ran.",
+            f"# TYPE {prefix}_stage_calls_total counter",
+        ]
+        lines += [f'{prefix}_stage_calls_total{{stage="{name}"}} {stats["calls"]}'
+                  for name, stats in sorted(summary['stages'].items())]
+        for name, value in sorted(summary['counters'].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+# Function to turn profiling on for the duration of a with block
+@contextmanager
+def profile(profiler=None):
+    """Records timings and counters into profiler (a new Profiler by default) inside the with block
+
+    Blocks can be nested; the innermost profiler receives the records.
+    """
+    global _active
+    profiler = profiler if profiler is not None else Profiler()
+    previous, _active = _active, profiler
+    try:
+        yield profiler
+    finally:
+        _active = previous
+
+# Hooks called by the library code
+def stage(name):
+    """Context manager timing a stage when profiling is on, a no-op otherwise"""
+    return _active.stage(name) if _active is not None else _NO_STAGE
+
+def timed(name):
+    """Decorator that times every call of the function as the stage called name"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with _active.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name, n=1):
+    """Adds n to a counter when profiling is on"""
+    if _active is not None:
+        _active.count(name, n)
@@ -0,0 +1,171 @@
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from . import profiling
+from .cleaning import clean_coordinates_frame
+from .geo_index import GeoIndex
+from .kernels import get_kernel
+from .matching import DEFAULT_BLOCK_SIZE, as_points, to_unit_vectors, match_prepared
+from .parallel import ParallelMatcher
+
+# Streaming pipeline for large CSV files of locations.
+# The input is read chunk_size rows at a time; each chunk is cleaned, matched against the candidate
+# locations and appended to the output file before the next chunk is read, so peak memory depends
+# on chunk_size and the number of candidates, not on the size of the input file.
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+class _CsvWriter:
+    """Appends DataFrame chunks to a CSV file, writing the header once"""
+
+    def __init__(self, path, column_types=None):
+        self.path = path
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.path, mode='w' if self.header else 'a', header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        # Always leave a file behind, even if no rows were written
+        if self.header:
+            pd.DataFrame().to_csv(self.path, index=False)
+
+class _ParquetWriter:
+    """Appends DataFrame chunks to a Parquet file as row groups (needs pyarrow)
+
+    The file's schema comes from the first chunk. A column that is all missing there has no type
+    of its own, so it takes the type of the matching Series in column_types.
+    """
+
+    def __init__(self, path, column_types=None):
+        self.path = path
+        self.column_types = column_types or {}
+        self.writer = None
+
+    def write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.writer is None:
+            schema = table.schema
+            for i, field in enumerate(schema):
+                if pa.types.is_null(field.type) and field.name in self.column_types:
+                    column_type = pa.Array.from_pandas(self.column_types[field.name]).type
+                    schema = schema.set(i, field.with_type(column_type))
+            self.writer = pq.ParquetWriter(self.path, schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+def _open_writer(output_path, column_types=None):
+    """Picks the output format from the file extension"""
+    if str(output_path).lower().endswith(('.parquet', '.pq')):
+        return _ParquetWriter(output_path, column_types)
+    return _CsvWriter(output_path, column_types)
+
+# Function to build a matcher for chunks of points against a fixed candidate set
+@contextmanager
+def make_matcher(candidates, block_size=DEFAULT_BLOCK_SIZE, kernel='haversine', max_radius_km=None, workers=1):
+    """Takes a GeoIndex or an array of [latitude, longitude] and yields a function points -> (indices, distances)
+
+    Points with no candidate within max_radius_km get index -1 and distance inf.
+    workers > 1 matches each chunk in a pool of worker processes (array candidates only).
+    """
+    if isinstance(candidates, GeoIndex):
+        if workers > 1:
+            raise ValueError("workers > 1 needs the candidates as an array, not a GeoIndex")
+        distance_function = get_kernel(kernel, vectorized=True)
+
+        def match(points):
+            indices, distances = candidates.query(points)
+            if max_radius_km is not None:
+                out_of_range = distances > max_radius_km
+                indices[out_of_range] = -1
+                distances[out_of_range] = np.inf
+            # The index returns haversine distances
+            if kernel != 'haversine':
+                found = indices >= 0
+                nearest = candidates.locations[indices[found]]
+                distances[found] = distance_function(points[found, 0], points[found, 1], nearest[:, 0], nearest[:, 1])
+            return indices, distances
+
+        yield match
+    elif workers > 1:
+        with ParallelMatcher(candidates, workers, block_size=block_size, kernel=kernel, max_radius_km=max_radius_km) as pool:
+            yield pool.match
+    else:
+        # Convert the candidates once instead of once per chunk
+        points_b = as_points(candidates)
+        if len(points_b) == 0:
+            raise ValueError("candidates must contain at least one location")
+        vec_b = to_unit_vectors(points_b)
+        yield lambda points: match_prepared(points, points_b, vec_b, block_size, kernel, max_radius_km)
+
+# Function to match every location in a large CSV file against a set of candidates
+def stream_match_csv(input_path, candidates, output_path, lat_col='latitude', lon_col='longitude',
+                     chunk_size=DEFAULT_CHUNK_SIZE, usecols=None, kernel='haversine', max_radius_km=None,
+                     workers=1, candidate_ids=None):
+    """Reads input_path in chunks, matches each row to its closest candidate and writes the rows to output_path
+
+    The output has the input columns plus nearest_index, nearest_latitude, nearest_longitude and distance_km
+    (and nearest_id when candidate_ids, one per candidate, is given). Rows with no candidate within
+    max_radius_km are written with nearest_index -1 and empty nearest columns.
+    The output is Parquet if output_path ends in .parquet (needs pyarrow), otherwise CSV.
+    Returns a dict with the number of rows read, matched, unmatched (out of range) and rejected.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if usecols is not None:
+        usecols = list(dict.fromkeys([*usecols, lat_col, lon_col]))
+
+    candidate_points = candidates.locations if isinstance(candidates, GeoIndex) else as_points(candidates)
+    if candidate_ids is not None:
+        candidate_ids = pd.Series(candidate_ids).reset_index(drop=True)
+        if len(candidate_ids) != len(candidate_points):
+            raise ValueError("candidate_ids must have one id per candidate")
+    stats = {'rows_read': 0, 'rows_matched': 0, 'rows_unmatched': 0, 'rows_rejected': 0}
+
+    # nearest_id is all missing in a chunk without matches, so its type comes from the ids
+    writer = _open_writer(output_path, {'nearest_id': candidate_ids} if candidate_ids is not None else None)
+    try:
+        with make_matcher(candidates, kernel=kernel, max_radius_km=max_radius_km, workers=workers) as matcher:
+            reader = iter(pd.read_csv(input_path, chunksize=chunk_size, usecols=usecols))
+            while True:
+                with profiling.stage('read'):
+                    chunk = next(reader, None)
+                if chunk is None:
+                    break
+                stats['rows_read'] += len(chunk)
+                profiling.count('rows_read', len(chunk))
+                clean, report = clean_coordinates_frame(chunk, lat_col, lon_col)
+                stats['rows_rejected'] += report['rows'] - report['valid']
+                if clean.empty:
+                    continue
+
+                with profiling.stage('match'):
+                    indices, distances = matcher(clean[[lat_col, lon_col]].to_numpy(dtype=np.float64))
+                found = indices >= 0
+                nearest = np.full((len(indices), 2), np.nan)
+                nearest[found] = candidate_points[indices[found]]
+
+                clean['nearest_index'] = indices
+                if candidate_ids is not None:
+                    clean['nearest_id'] = candidate_ids.reindex(indices).to_numpy()
+                clean['nearest_latitude'] = nearest[:, 0]
+                clean['nearest_longitude'] = nearest[:, 1]
+                clean['distance_km'] = np.where(found, distances, np.nan)
+
+                with profiling.stage('write'):
+                    writer.write(clean)
+                stats['rows_matched'] += int(found.sum())
+                stats['rows_unmatched'] += int((~found).sum())
+    finally:
+        writer.close()
+
+    return stats
@@ -0,0 +1,143 @@
+import numpy as np
+
+from .kernels import EARTH_RADIUS_KM, get_kernel
+from .matching import as_points, to_unit_vectors
+
+# Distances along GPS tracks (trajectories): an (N, 2) array of [latitude, longitude] fixes in order.
+# Everything works on whole arrays at once, so a track with millions of fixes needs no Python loop.
+# Distances to a polyline and the Douglas-Peucker simplification use great-circle arcs between
+# consecutive vertices, computed on 3D unit vectors.
+
+# Number of point/segment pairs compared at once in distance_to_polyline
+DEFAULT_TILE = 1_000_000
+
+# Function to compute the length of every segment of a track
+def segment_lengths(track, kernel='haversine'):
+    """Takes an (N, 2) track and returns the N-1 distances in km between consecutive fixes"""
+    track = as_points(track)
+    distance_function = get_kernel(kernel, vectorized=True)
+    return distance_function(track[:-1, 0], track[:-1, 1], track[1:, 0], track[1:, 1])
+
+# Function to compute the distance travelled up to every fix
+def cumulative_distance(track, kernel='haversine'):
+    """Takes an (N, 2) track and returns N distances in km from the first fix (the first one is 0)"""
+    lengths = segment_lengths(track, kernel)
+    return np.concatenate(([0.0], np.cumsum(lengths)))
+
+# Function to compute the speed on every segment of a track
+def segment_speeds(track, times, kernel='haversine'):
+    """Takes an (N, 2) track and N timestamps, returns the N-1 segment speeds in km/h
+
+    times are numbers in seconds or numpy datetime64 values. Segments whose time does not
+    increase get a speed of nan.
+    """
+    times = np.asarray(times)
+    if np.issubdtype(times.dtype, np.datetime64):
+        times = (times - times[0]) / np.timedelta64(1, 's')
+    times = times.astype(np.float64)
+    lengths = segment_lengths(track, kernel)
+    if len(times) != len(lengths) + 1:
+        raise ValueError("times must have one value per fix")
+
+    hours = np.diff(times) / 3600
+    speeds = np.full(len(lengths), np.nan)
+    np.divide(lengths, hours, out=speeds, where=hours > 0)
+    return speeds
+
+def _segment_frames(a, b):
+    """Per arc from a to b: its plane normal, the two side normals used by _segment_angle, and whether a == b"""
+    normal = np.cross(a, b)
+    norm = np.linalg.norm(normal, axis=-1)
+    degenerate = norm < 1e-15
+    normal = normal / np.where(degenerate, 1.0, norm)[..., None]
+    return normal, np.cross(normal, a), np.cross(b, normal), degenerate
+
+def _segment_angle(p, a, b, frames=None):
+    """Angle in radians from unit vectors p to the great-circle arcs from a to b (arrays broadcast)
+
+    frames is _segment_frames(a, b), when it was already computed.
+    """
+    normal, side_a, side_b, degenerate = frames if frames is not None else _segment_frames(a, b)
+    # p lies beside the arc when it is past a and before b, seen along the arc's plane
+    inside = (np.sum(p * side_a, axis=-1) >= 0) & (np.sum(p * side_b, axis=-1) >= 0) & ~degenerate
+    cross_track = np.arcsin(np.minimum(np.abs(np.sum(p * normal, axis=-1)), 1.0))
+    # Otherwise the closest point is an end of the arc; the chord keeps small distances accurate
+    chord = np.minimum(np.linalg.norm(p - a, axis=-1), np.linalg.norm(p - b, axis=-1))
+    to_end = 2 * np.arcsin(np.minimum(chord / 2, 1.0))
+    return np.where(inside, cross_track, to_end)
+
+# Function to find the closest point on a polyline for many points
+def distance_to_polyline(points, polyline, tile=DEFAULT_TILE):
+    """Takes an array of [latitude, longitude] points and an (M, 2) polyline
+
+    Returns (distances, segments): the great-circle distance in km from every point to the polyline
+    and the index of the closest segment (segment i runs from vertex i to vertex i + 1).
+    """
+    vec_p = to_unit_vectors(points)
+    vec_line = to_unit_vectors(polyline)
+    if len(vec_line) == 0:
+        raise ValueError("polyline must contain at least one vertex")
+    if len(vec_line) == 1:
+        vec_line = np.vstack((vec_line, vec_line))
+    a, b = vec_line[:-1], vec_line[1:]
+
+    normal, side_a, side_b, degenerate = _segment_frames(a, b)
+
+    distances = np.empty(len(vec_p))
+    segments = np.empty(len(vec_p), dtype=np.int64)
+    rows = max(1, tile // len(a))
+    for start in range(0, len(vec_p), rows):
+        block = vec_p[start:start + rows]
+        # Rank the segments by 1 - cos(angle), which only needs matrix products,
+        # then measure the angle to the closest segment precisely
+        inside = (block @ side_a.T >= 0) & (block @ side_b.T >= 0) & ~degenerate
+        cross_track = 1 - np.sqrt(1 - np.minimum((block @ normal.T) ** 2, 1.0))
+        to_end = 1 - np.maximum(block @ a.T, block @ b.T)
+        best = np.argmin(np.where(inside, cross_track, to_end), axis=1)
+        segments[start:start + rows] = best
+        distances[start:start + rows] = _segment_angle(block, a[best], b[best])
+    return distances * EARTH_RADIUS_KM, segments
+
+# Function to simplify a track with the Douglas-Peucker algorithm
+def simplify(track, tolerance_km):
+    """Takes an (N, 2) track and returns the indices of the fixes to keep
+
+    Every dropped fix lies within tolerance_km of the simplified track, and the first and last
+    fixes are always kept. Use track[simplify(track, tolerance_km)] to get the simplified track.
+    """
+    if tolerance_km < 0:
+        raise ValueError("tolerance_km must not be negative")
+    vectors = to_unit_vectors(track)
+    if len(vectors) < 3:
+        return np.arange(len(vectors))
+    tolerance = tolerance_km / EARTH_RADIUS_KM
+
+    keep = np.zeros(len(vectors), dtype=bool)
+    keep[[0, -1]] = True
+    # Spans (first, last) whose interior has not been checked yet. All spans are handled together:
+    # one vectorized pass finds the farthest interior fix of every span, and spans where it is
+    # beyond the tolerance are split in two for the next pass.
+    first = np.array([0])
+    last = np.array([len(vectors) - 1])
+    while len(first):
+        lengths = last - first - 1
+        has_interior = lengths > 0
+        first, last, lengths = first[has_interior], last[has_interior], lengths[has_interior]
+        if len(first) == 0:
+            break
+
+        span = np.repeat(np.arange(len(first)), lengths)
+        starts = np.cumsum(lengths) - lengths
+        position = first[span] + 1 + np.arange(len(span)) - starts[span]
+        frames = [frame[span] for frame in _segment_frames(vectors[first], vectors[last])]
+        angles = _segment_angle(vectors[position], vectors[first[span]], vectors[last[span]], frames)
+
+        # Farthest fix of each span: its largest angle, and the first position reaching it
+        span_max = np.maximum.reduceat(angles, starts)
+        candidates = np.where(angles == span_max[span], position, len(vectors))
+        split = np.minimum.reduceat(candidates, starts)
+
+        far = span_max > tolerance
+        keep[split[far]] = True
+        first, last = np.concatenate((first[far], split[far])), np.concatenate((split[far], last[far]))
+    return np.flatnonzero(keep)
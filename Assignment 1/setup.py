@@ -7,12 +7,15 @@ setup(
     install_requires=[
         "pandas",  # Add pandas if you're using it
         "numpy",   # Add numpy if you're using it
+        "scipy",   # assign_nearest
         # Add any other dependencies here
     ],
+    extras_require={
+        "parquet": ["pyarrow"],  # Parquet output and dataset cache
+    },
     entry_points={
         'console_scripts': [
-            # Add command-line interface (CLI) commands if applicable
-            # For example: "geo-distance = geo_distance:main_function"
+            "geo-distance = geo_distance.cli:main",
         ],
     },
     test_suite="tests",